@@ -17,10 +17,11 @@ class AccountAdmin(admin.ModelAdmin):
         "currency",
         "balance",
         "status",
+        "posting_mode",
         "created_at",
     )
     search_fields = ("owner__email", "name", "number")
-    list_filter = ("currency", "status")
+    list_filter = ("currency", "status", "posting_mode")
     readonly_fields = ("balance", "created_at", "updated_at")
 
     def get_owner_email(self, obj):
@@ -38,6 +39,12 @@ class AccountAdmin(admin.ModelAdmin):
 # ----------------------------
 @admin.register(TransactionHistory)
 class TransactionHistoryAdmin(admin.ModelAdmin):
+    """
+    거래내역은 조회만 가능
+    - 직접 생성/수정/삭제하면 잔액·일별 롤업·원장 버전이 갱신되지 않아 분석/요약과 어긋남
+      → 거래는 posting 서비스(API, 가져오기, 일괄 처리)로만 반영
+    """
+
     list_display = (
         "id",
         "account",
@@ -66,6 +73,15 @@ class TransactionHistoryAdmin(admin.ModelAdmin):
         qs = super().get_queryset(request)
         return qs.select_related("account", "counterparty")
 
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
     # 1️⃣ Transfer id
     # 보통 외부 송금/이체 시스템에서 생성된 고유 ID
     # 예: 은행 API에서 받아오는 트랜잭션 ID
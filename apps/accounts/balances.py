@@ -0,0 +1,73 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models.functions import TruncDate
+
+from .models import TransactionHistory as TH
+from .rollups import day_bounds, rollup_timezone
+
+ZERO = Decimal("0.00")
+
+
+def _posted(account_ids):
+    # 잔액에 반영된 거래만 (대기 중 거래는 running_balance 가 NULL)
+    return TH.objects.filter(account_id__in=account_ids, running_balance__isnull=False)
+
+
+def balances_as_of(account_ids, at):
+    """
+    시각 at 시점의 계좌별 잔액 {account_id: {"balance", "occurred_at"}}
+    - DISTINCT ON (account_id) ... ORDER BY account_id, occurred_at DESC, seq DESC 쿼리 1회
+      → (account, -occurred_at) 인덱스로 범위 검색하지만 PostgreSQL 은 skip scan 이 없어
+        계좌마다 at 이전 행을 모두 훑고 첫 행만 남김 (거래가 많은 계좌일수록 비용 증가)
+    - 같은 시각 거래는 반영 순서(seq)가 마지막인 거래 기준 → 같은 일자로 가져온 거래도 최종 잔액
+    - at 이전 거래가 없는 계좌는 0, occurred_at 은 None
+    - running_balance 는 반영 순서로 계산되므로 과거 일자로 늦게 가져온 거래가 있으면
+      그 거래 이후 잔액은 반영 시점 기준 값
+    """
+    rows = (
+        _posted(account_ids)
+        .filter(occurred_at__lte=at)
+        .order_by("account_id", "-occurred_at", "-seq")
+        .distinct("account_id")
+        .values_list("account_id", "running_balance", "occurred_at")
+    )
+    balances = {
+        account_id: {"balance": ZERO, "occurred_at": None} for account_id in account_ids
+    }
+    for account_id, balance, occurred_at in rows:
+        balances[account_id] = {"balance": balance, "occurred_at": occurred_at}
+    return balances
+
+
+def daily_balances(account_ids, start_date, end_date):
+    """
+    기간(양 끝 포함) 일자별 마감 잔액 {account_id: [(일자, 잔액), ...]} (TIME_ZONE 기준)
+    - 시작 전 잔액: balances_as_of 1회
+    - 기간 안: DISTINCT ON (account_id, 일자) 로 계좌/일자별 마지막 거래(시각, seq 순)의 running_balance
+      → 기간의 거래를 한 번 훑어 계좌/일자마다 1행만 반환, 거래가 없는 날은 전날 잔액을 이어 씀
+    """
+    lower, upper = day_bounds(start_date, end_date)
+    opening = balances_as_of(account_ids, lower - timedelta(microseconds=1))
+    closing = {
+        (account_id, day): balance
+        for account_id, day, balance in _posted(account_ids)
+        .filter(occurred_at__gte=lower, occurred_at__lt=upper)
+        .annotate(day=TruncDate("occurred_at", tzinfo=rollup_timezone()))
+        .order_by("account_id", "day", "-occurred_at", "-seq")
+        .distinct("account_id", "day")
+        .values_list("account_id", "day", "running_balance")
+    }
+
+    days = [
+        start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)
+    ]
+    result = {}
+    for account_id in account_ids:
+        balance = opening[account_id]["balance"]
+        series = []
+        for day in days:
+            balance = closing.get((account_id, day), balance)
+            series.append((day, balance))
+        result[account_id] = series
+    return result
@@ -0,0 +1,153 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from apps.accounts.partitions import (
+    add_months,
+    create_partition,
+    default_partition,
+    month_bounds,
+    month_start,
+    partition_name,
+)
+from apps.accounts.rollups import rollup_timezone
+
+PLAIN = "bench_th_plain"
+PARTITIONED = "bench_th_partitioned"
+
+
+class Command(BaseCommand):
+    """
+    거래내역 월 파티셔닝 벤치마크 (PostgreSQL)
+    - 같은 합성 데이터(generate_series)를 일반 테이블과 월 파티션 테이블에 적재하고
+      (account_id, occurred_at DESC) 인덱스를 만든 뒤 대표 조회를 비교
+    - 조회: 계좌 1개 한 달 합계 / 전체 계좌 한 달 GROUP BY / 최근 50건 / 가장 오래된 달 삭제
+    - 임시 테이블은 종료 시 삭제
+    - 예) python manage.py benchmark_partitions --rows 50000000 --accounts 20000
+    """
+
+    help = "거래내역 파티셔닝 벤치마크"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10_000_000)
+        parser.add_argument("--accounts", type=int, default=10_000)
+        parser.add_argument("--months", type=int, default=24, help="데이터 기간(개월)")
+        parser.add_argument("--repeat", type=int, default=5, help="조회 반복 횟수")
+
+    def handle(self, *args, **options):
+        current = month_start(timezone.localdate(timezone=rollup_timezone()))
+        self.months = [
+            add_months(current, -i) for i in reversed(range(options["months"]))
+        ]
+        try:
+            with connection.cursor() as cursor:
+                self.cursor = cursor
+                self._load(options["rows"], options["accounts"])
+                self._compare(options["accounts"], options["repeat"])
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP TABLE IF EXISTS {PLAIN}, {PARTITIONED}")
+
+    # ----------------------------
+    # 데이터 준비
+    # ----------------------------
+    def _timed(self, sql, params=None):
+        started = time.perf_counter()
+        self.cursor.execute(sql, params)
+        return time.perf_counter() - started
+
+    def _load(self, rows, accounts):
+        columns = """
+            id bigint NOT NULL,
+            account_id integer NOT NULL,
+            tx_type varchar(16) NOT NULL,
+            amount numeric(20, 2) NOT NULL,
+            occurred_at timestamptz NOT NULL
+        """
+        self.cursor.execute(f"DROP TABLE IF EXISTS {PLAIN}, {PARTITIONED}")
+        self.cursor.execute(f"CREATE TABLE {PLAIN} ({columns})")
+        self.cursor.execute(
+            f"CREATE TABLE {PARTITIONED} ({columns}) PARTITION BY RANGE (occurred_at)"
+        )
+        for month in self.months:
+            create_partition(self.cursor, month, PARTITIONED)
+        self.cursor.execute(
+            f"CREATE TABLE {default_partition(PARTITIONED)} "
+            f"PARTITION OF {PARTITIONED} DEFAULT"
+        )
+
+        lower = month_bounds(self.months[0])[0]
+        upper = month_bounds(self.months[-1])[1]
+        elapsed = self._timed(
+            f"""
+            INSERT INTO {PLAIN}
+            SELECT g, 1 + (g %% %s), (ARRAY['DEPOSIT', 'WITHDRAW', 'FEE'])[1 + g %% 3],
+                   round((random() * 100000)::numeric, 2) + 1,
+                   %s + random() * (%s - %s)
+              FROM generate_series(1, %s) g
+            """,
+            [accounts, lower, upper, lower, rows],
+        )
+        self.stdout.write(f"일반 테이블 적재 {rows}건: {elapsed:.1f}s")
+        elapsed = self._timed(f"INSERT INTO {PARTITIONED} SELECT * FROM {PLAIN}")
+        self.stdout.write(f"파티션 테이블 적재 {rows}건: {elapsed:.1f}s")
+        for table in (PLAIN, PARTITIONED):
+            elapsed = self._timed(
+                f"CREATE INDEX ON {table} (account_id, occurred_at DESC)"
+            )
+            self.cursor.execute(f"VACUUM ANALYZE {table}")
+            self.stdout.write(f"{table} 인덱스 생성: {elapsed:.1f}s")
+
+    # ----------------------------
+    # 비교
+    # ----------------------------
+    def _median(self, sql, params, repeat):
+        # 첫 실행은 캐시 워밍업으로 버림
+        self._timed(sql, params)
+        return statistics.median(self._timed(sql, params) for _ in range(repeat))
+
+    def _compare(self, accounts, repeat):
+        lower, upper = month_bounds(self.months[-2])
+        account_id = accounts // 2
+        queries = {
+            "계좌 1개 한 달 합계": (
+                "SELECT count(*), sum(amount) FROM {table} "
+                "WHERE account_id = %s AND occurred_at >= %s AND occurred_at < %s",
+                [account_id, lower, upper],
+            ),
+            "전체 계좌 한 달 GROUP BY": (
+                "SELECT account_id, sum(amount) FROM {table} "
+                "WHERE occurred_at >= %s AND occurred_at < %s GROUP BY account_id",
+                [lower, upper],
+            ),
+            "계좌 1개 최근 50건": (
+                "SELECT * FROM {table} WHERE account_id = %s "
+                "ORDER BY occurred_at DESC LIMIT 50",
+                [account_id],
+            ),
+        }
+        self.stdout.write(f"{'조회':<24}{'일반':>12}{'파티션':>12}")
+        for label, (sql, params) in queries.items():
+            plain = self._median(sql.format(table=PLAIN), params, repeat)
+            partitioned = self._median(sql.format(table=PARTITIONED), params, repeat)
+            self.stdout.write(
+                f"{label:<24}{plain * 1000:>10.1f}ms{partitioned * 1000:>10.1f}ms"
+            )
+
+        # 보존 기간 정리: 가장 오래된 달 DELETE vs 파티션 DROP
+        lower, upper = month_bounds(self.months[0])
+        plain = self._timed(
+            f"DELETE FROM {PLAIN} WHERE occurred_at >= %s AND occurred_at < %s",
+            [lower, upper],
+        )
+        deleted = self.cursor.rowcount
+        partitioned = self._timed(
+            f"DROP TABLE {partition_name(self.months[0], PARTITIONED)}"
+        )
+        self.stdout.write(
+            f"{'가장 오래된 달 삭제':<24}{plain * 1000:>10.1f}ms"
+            f"{partitioned * 1000:>10.1f}ms ({deleted}건)"
+        )
@@ -0,0 +1,178 @@
+import random
+import statistics
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+from apps.accounts import services
+from apps.accounts.models import Account, AccountBalanceBucket, TransactionHistory
+from apps.users.models import CustomUser
+
+
+class Command(BaseCommand):
+    """
+    입출금 서비스 동시성 벤치마크
+    - 현재 DB에 임시 사용자/계좌를 만들고 종료 시 삭제
+    - 예) python manage.py benchmark_postings idempotency --threads 16
+          python manage.py benchmark_postings buckets --buckets 1 8 32
+          python manage.py benchmark_postings locking --accounts 2
+    """
+
+    help = "입출금 서비스 동시성 벤치마크"
+
+    def add_arguments(self, parser):
+        parser.add_argument("scenario", choices=["idempotency", "buckets", "locking"])
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--requests", type=int, default=1000)
+        parser.add_argument("--accounts", type=int, default=8)
+        parser.add_argument(
+            "--retries", type=int, default=3, help="키 하나당 동시 재시도 횟수"
+        )
+        parser.add_argument(
+            "--buckets", type=int, nargs="+", default=[1, 8, 32], help="SHARDED 버킷 수"
+        )
+
+    def handle(self, *args, **options):
+        self.user = CustomUser.objects.create_user(
+            email=f"bench-{uuid.uuid4().hex[:12]}@bench.local", password=None
+        )
+        try:
+            getattr(self, f"bench_{options['scenario']}")(**options)
+        finally:
+            TransactionHistory.objects.filter(account__owner=self.user).delete()
+            AccountBalanceBucket.objects.filter(account__owner=self.user).delete()
+            Account.objects.filter(owner=self.user).delete()
+            self.user.delete()
+
+    # ----------------------------
+    # 공통 도구
+    # ----------------------------
+    def _make_accounts(self, count, balance=Decimal("0.00")):
+        return [
+            Account.objects.create(
+                owner=self.user,
+                name="bench",
+                number=uuid.uuid4().hex[:32],
+                balance=balance,
+            )
+            for _ in range(count)
+        ]
+
+    def _run_threads(self, worker, jobs, threads):
+        """jobs 를 스레드별로 나눠 실행하고 (경과시간, 요청별 지연시간 목록) 반환"""
+        latencies = []
+        lock = threading.Lock()
+
+        def run(chunk):
+            local = []
+            try:
+                for job in chunk:
+                    started = time.perf_counter()
+                    worker(job)
+                    local.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+            with lock:
+                latencies.extend(local)
+
+        workers = [
+            threading.Thread(target=run, args=(jobs[i::threads],))
+            for i in range(threads)
+        ]
+        started = time.perf_counter()
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        return time.perf_counter() - started, latencies
+
+    def _report(self, label, elapsed, latencies):
+        latencies = sorted(latencies)
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+        self.stdout.write(
+            f"{label:<24} {len(latencies) / elapsed:>10.1f} req/s"
+            f"  p50={statistics.median(latencies) * 1000:7.2f}ms"
+            f"  p95={p95 * 1000:7.2f}ms"
+        )
+
+    # ----------------------------
+    # 시나리오
+    # ----------------------------
+    def bench_idempotency(self, threads, requests, accounts, retries, **_):
+        """
+        재시도 폭주: 멱등성 키마다 retries 번씩 동시에 deposit 호출
+        SELECT 우선(기존) vs INSERT 우선 비교
+        """
+        for label, insert_first in (("select-first", False), ("insert-first", True)):
+            accs = self._make_accounts(accounts)
+            keys = [(random.choice(accs).pk, f"{label}-{i}") for i in range(requests)]
+            jobs = [job for job in keys for _ in range(retries)]
+            random.shuffle(jobs)
+
+            def worker(job):
+                services.deposit(job[0], Decimal("1.00"), idempotency_key=job[1])
+
+            with override_settings(ACCOUNTS_IDEMPOTENCY_INSERT_FIRST=insert_first):
+                elapsed, latencies = self._run_threads(worker, jobs, threads)
+            self._report(label, elapsed, latencies)
+
+            posted = TransactionHistory.objects.filter(account__in=accs).count()
+            assert posted == requests, f"{label}: expected {requests}, got {posted}"
+
+    def bench_buckets(self, threads, requests, buckets, **_):
+        """
+        단일 핫 계좌에 동시 입금: STANDARD(계좌 행 잠금) vs SHARDED(N개 버킷)
+        """
+        runs = [("standard", None)] + [(f"sharded N={n}", n) for n in buckets]
+        for label, bucket_count in runs:
+            (acc,) = self._make_accounts(1)
+            if bucket_count:
+                services.set_posting_mode(
+                    acc.pk, Account.PostingMode.SHARDED, bucket_count=bucket_count
+                )
+
+            def worker(_):
+                services.deposit(acc.pk, Decimal("1.00"))
+
+            elapsed, latencies = self._run_threads(
+                worker, list(range(requests)), threads
+            )
+            self._report(label, elapsed, latencies)
+
+            services.materialize_pending(acc.pk)
+            acc.refresh_from_db()
+            assert acc.balance == requests, f"{label}: balance {acc.balance}"
+
+    def bench_locking(self, threads, requests, accounts, **_):
+        """
+        소수 계좌에 입금/출금 혼합 경합: pessimistic vs optimistic 잠금 방식
+        """
+        for mode in ("pessimistic", "optimistic"):
+            accs = self._make_accounts(accounts, balance=Decimal(requests))
+            jobs = [
+                (random.choice(accs).pk, random.random() < 0.5) for _ in range(requests)
+            ]
+
+            def worker(job):
+                account_id, is_deposit = job
+                post = services.deposit if is_deposit else services.withdraw
+                post(account_id, Decimal("1.00"))
+
+            with override_settings(ACCOUNTS_LOCKING_MODE=mode):
+                elapsed, latencies = self._run_threads(worker, jobs, threads)
+            self._report(mode, elapsed, latencies)
+
+            expected = requests * accounts + sum(
+                1 if is_deposit else -1 for _, is_deposit in jobs
+            )
+            total = sum(
+                Account.objects.filter(pk__in=[a.pk for a in accs]).values_list(
+                    "balance", flat=True
+                )
+            )
+            assert total == expected, f"{mode}: balance {total} != {expected}"
@@ -0,0 +1,44 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.accounts.importers import PARSERS, import_statement
+
+
+class Command(BaseCommand):
+    """
+    은행 거래내역(CSV/OFX) 파일을 계좌에 일괄 반영
+    - 예) python manage.py import_statement statement.csv --account <uuid>
+    - 같은 파일을 다시 실행해도 중복 거래는 건너뜀
+    """
+
+    help = "은행 거래내역(CSV/OFX) 가져오기"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--account", required=True, help="계좌 UUID")
+        parser.add_argument(
+            "--file-format",
+            choices=sorted(PARSERS),
+            help="파일 형식 (기본: 확장자로 판단)",
+        )
+        parser.add_argument("--encoding", default="utf-8-sig")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["file_format"] or os.path.splitext(path)[1][1:].lower()
+        if file_format not in PARSERS:
+            raise CommandError(f"지원하지 않는 파일 형식: {file_format}")
+
+        started = time.perf_counter()
+        try:
+            with open(path, encoding=options["encoding"], newline="") as f:
+                result = import_statement(options["account"], f, file_format)
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{result['imported']}건 반영, 중복 {result['duplicates']}건 건너뜀, "
+            f"잔액 {result['balance']} ({elapsed:.1f}s)"
+        )
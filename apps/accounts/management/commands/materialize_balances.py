@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.accounts.models import TransactionHistory
+from apps.accounts.services import materialize_pending
+
+
+class Command(BaseCommand):
+    """
+    고처리량(APPEND_ONLY) 계좌의 대기 중 거래를 잔액/running_balance 에 반영하는 compactor
+    - 기본: 한 번 실행 후 종료
+    - --loop: 백그라운드 워커로 계속 실행
+    """
+
+    help = "대기 중 거래를 계좌 잔액에 반영"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="계속 실행")
+        parser.add_argument("--interval", type=float, default=1.0, help="반복 간격(초)")
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            # 부분 인덱스(th_pending_idx)만 읽음
+            account_ids = (
+                TransactionHistory.objects.filter(running_balance__isnull=True)
+                .values_list("account_id", flat=True)
+                .distinct()
+            )
+            total = sum(materialize_pending(pk) for pk in account_ids)
+            if total or not options["loop"]:
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f"{total}건 반영 ({elapsed:.2f}s)")
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,66 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.accounts.partitions import (
+    MONTHS_AHEAD,
+    convert_to_partitioned,
+    ensure_partitions,
+    is_partitioned,
+    list_partitions,
+    month_start,
+)
+
+
+class Command(BaseCommand):
+    """
+    거래내역 테이블 occurred_at 월 단위 RANGE 파티셔닝 (PostgreSQL)
+    - convert: 기존 테이블을 파티션 테이블로 1회 변환 (테이블 잠금, 점검 시간에 실행 후 앱 재시작)
+    - ensure: 이번 달 ~ --months-ahead 개월 뒤 파티션 생성, cron 으로 매일 실행
+    - status: 파티션 목록과 예상 행 수
+    - 예) python manage.py partition_transactions convert --since 2024-01-01
+          python manage.py partition_transactions ensure --months-ahead 3
+    """
+
+    help = "거래내역 월 단위 파티셔닝"
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["convert", "ensure", "status"])
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=MONTHS_AHEAD,
+            help="미리 만들 미래 파티션 개월 수",
+        )
+        parser.add_argument(
+            "--since",
+            type=date.fromisoformat,
+            help="convert: 첫 파티션 월 YYYY-MM-DD (생략 시 가장 오래된 거래의 월)",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            if options["action"] == "convert":
+                since = options["since"] and month_start(options["since"])
+                count = convert_to_partitioned(
+                    options["months_ahead"], since, log=self.stdout.write
+                )
+                self.stdout.write(
+                    f"변환 완료: 월 파티션 {count}개 "
+                    f"({time.perf_counter() - started:.1f}s), 앱 프로세스를 재시작하세요"
+                )
+            elif options["action"] == "ensure":
+                created = ensure_partitions(options["months_ahead"])
+                for name in created:
+                    self.stdout.write(f"파티션 생성: {name}")
+                self.stdout.write(f"파티션 {len(created)}개 생성")
+            else:
+                if not is_partitioned():
+                    self.stdout.write("파티션 테이블이 아님")
+                    return
+                for name, bound, rows in list_partitions():
+                    self.stdout.write(f"{name}\t{bound}\t~{max(rows, 0)}건")
+        except ValueError as e:
+            raise CommandError(str(e))
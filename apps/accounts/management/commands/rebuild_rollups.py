@@ -0,0 +1,29 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from apps.accounts.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    """
+    일별 거래 롤업(DailyAccountRollup)을 원본 거래내역에서 다시 집계
+    - 예) python manage.py rebuild_rollups --start 2025-01-01 --end 2025-12-31
+    - 기간 생략 시 전체, --account 로 계좌 한정 (여러 번 지정 가능)
+    """
+
+    help = "일별 거래 롤업 재생성"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", type=date.fromisoformat, help="YYYY-MM-DD")
+        parser.add_argument("--end", type=date.fromisoformat, help="YYYY-MM-DD")
+        parser.add_argument("--account", action="append", help="계좌 UUID")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        created = rebuild_rollups(
+            options["start"], options["end"], account_ids=options["account"]
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"롤업 {created}건 생성 ({elapsed:.2f}s)")
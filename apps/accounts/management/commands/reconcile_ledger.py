@@ -0,0 +1,67 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.accounts.reconcile import (
+    CHUNK_SIZE,
+    account_ranges,
+    reconcile_range,
+    repair_balances,
+)
+
+
+class Command(BaseCommand):
+    """
+    계좌 잔액(Account.balance)을 거래내역과 대조
+    - 확인: 잔액 == 부호 적용 거래 합계 == 마지막 running_balance (대기 중 거래 제외)
+    - 계좌 id 를 --chunk-size 개 구간으로 나눠 구간마다 집계 쿼리 1회, 모델 인스턴스 없이 튜플만 읽음
+    - --workers N: 구간을 프로세스 풀로 분산 (fork 방식, Linux/Docker 기준)
+    - --repair: 잔액을 거래 합계로 수정 (계좌 잠금 후 다시 확인)
+    - 예) python manage.py reconcile_ledger --workers 4
+    """
+
+    help = "계좌 잔액과 거래내역 대조"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size", type=int, default=CHUNK_SIZE, help="구간당 계좌 수"
+        )
+        parser.add_argument("--workers", type=int, default=1, help="프로세스 수")
+        parser.add_argument(
+            "--repair", action="store_true", help="잔액을 거래 합계로 수정"
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        ranges = account_ranges(options["chunk_size"])
+        if options["workers"] > 1 and len(ranges) > 1:
+            # 부모의 DB 연결을 자식이 공유하지 않도록 fork 전에 닫음
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=options["workers"],
+                mp_context=multiprocessing.get_context("fork"),
+            ) as pool:
+                results = list(pool.map(reconcile_range, *zip(*ranges)))
+        else:
+            results = [reconcile_range(lower, upper) for lower, upper in ranges]
+
+        checked = sum(r[0] for r in results)
+        rows = sum(r[1] for r in results)
+        drifts = [drift for r in results for drift in r[2]]
+        elapsed = time.perf_counter() - started
+
+        for pk, owner_id, balance, total, count, last in drifts:
+            self.stdout.write(
+                f"불일치 {pk}: balance={balance} 거래합계={total} "
+                f"마지막 running_balance={last} ({count}건)"
+            )
+        self.stdout.write(
+            f"계좌 {checked}개, 거래 {rows}건 대조, 불일치 {len(drifts)}개 "
+            f"({elapsed:.1f}s, {checked / elapsed if elapsed else 0:.0f} accounts/s)"
+        )
+        if options["repair"] and drifts:
+            repaired = repair_balances([drift[0] for drift in drifts])
+            self.stdout.write(f"잔액 {repaired}개 수정")
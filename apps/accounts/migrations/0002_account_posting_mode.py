@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="account",
+            name="posting_mode",
+            field=models.CharField(
+                choices=[("STANDARD", "STANDARD"), ("APPEND_ONLY", "APPEND_ONLY")],
+                default="STANDARD",
+                max_length=16,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="transactionhistory",
+            name="running_balance",
+            field=models.DecimalField(
+                blank=True, decimal_places=2, max_digits=20, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transactionhistory",
+            index=models.Index(
+                condition=models.Q(("running_balance__isnull", True)),
+                fields=["account", "posted_at"],
+                name="th_pending_idx",
+            ),
+        ),
+    ]
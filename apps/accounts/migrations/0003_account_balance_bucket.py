@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:32
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0002_account_posting_mode"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="account",
+            name="bucket_count",
+            field=models.PositiveSmallIntegerField(default=8),
+        ),
+        migrations.AlterField(
+            model_name="account",
+            name="posting_mode",
+            field=models.CharField(
+                choices=[
+                    ("STANDARD", "STANDARD"),
+                    ("APPEND_ONLY", "APPEND_ONLY"),
+                    ("SHARDED", "SHARDED"),
+                ],
+                default="STANDARD",
+                max_length=16,
+            ),
+        ),
+        migrations.CreateModel(
+            name="AccountBalanceBucket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("bucket", models.PositiveSmallIntegerField()),
+                (
+                    "balance",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=20
+                    ),
+                ),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="balance_buckets",
+                        to="accounts.account",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("account", "bucket"), name="unique_account_bucket"
+                    )
+                ],
+            },
+        ),
+    ]
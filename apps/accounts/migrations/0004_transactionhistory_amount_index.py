@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0003_account_balance_bucket"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="transactionhistory",
+            index=models.Index(
+                fields=["account", "amount", "id"],
+                name="accounts_tr_account_c5e7ed_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:19
+
+import django.db.models.deletion
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    """
+    기존 거래내역으로 일별 롤업 채우기 (rebuild_rollups 와 같은 GROUP BY)
+    - 잔액에 반영된 거래만, 일자는 TIME_ZONE 기준
+    """
+    TransactionHistory = apps.get_model("accounts", "TransactionHistory")
+    DailyAccountRollup = apps.get_model("accounts", "DailyAccountRollup")
+    grouped = (
+        TransactionHistory.objects.using(schema_editor.connection.alias)
+        .filter(running_balance__isnull=False)
+        .annotate(date=TruncDate("occurred_at", tzinfo=ZoneInfo(settings.TIME_ZONE)))
+        .values("account_id", "date", "tx_type", "currency")
+        .annotate(total_amount=Sum("amount"), transaction_count=Count("id"))
+        .order_by()
+    )
+    DailyAccountRollup.objects.using(schema_editor.connection.alias).bulk_create(
+        (DailyAccountRollup(**row) for row in grouped), batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0004_transactionhistory_amount_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyAccountRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                (
+                    "tx_type",
+                    models.CharField(
+                        choices=[
+                            ("DEPOSIT", "DEPOSIT"),
+                            ("WITHDRAW", "WITHDRAW"),
+                            ("TRANSFER_OUT", "TRANSFER_OUT"),
+                            ("TRANSFER_IN", "TRANSFER_IN"),
+                            ("FEE", "FEE"),
+                            ("REVERSAL", "REVERSAL"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                (
+                    "currency",
+                    models.CharField(
+                        choices=[("KRW", "KRW"), ("USD", "USD")],
+                        default="KRW",
+                        max_length=3,
+                    ),
+                ),
+                (
+                    "total_amount",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=20
+                    ),
+                ),
+                ("transaction_count", models.PositiveIntegerField(default=0)),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_rollups",
+                        to="accounts.account",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("account", "date", "tx_type", "currency"),
+                        name="unique_daily_rollup",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:49
+
+from django.db import migrations, models
+
+SEQUENCE = "accounts_transactionhistory_seq"
+
+# 기존 거래는 반영 시각 → 발생 시각 → id 순서로 번호를 매긴 뒤 시퀀스를 그 다음 값부터 시작
+BACKFILL = f"""
+    UPDATE accounts_transactionhistory AS t
+       SET seq = o.n
+      FROM (
+          SELECT id, row_number() OVER (ORDER BY posted_at, occurred_at, id) AS n
+            FROM accounts_transactionhistory
+      ) AS o
+     WHERE t.id = o.id;
+    SELECT setval('{SEQUENCE}', COALESCE(MAX(seq), 0) + 1, false)
+      FROM accounts_transactionhistory;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0006_ledger_version"),
+    ]
+
+    operations = [
+        migrations.RunSQL(f"CREATE SEQUENCE {SEQUENCE}", f"DROP SEQUENCE {SEQUENCE}"),
+        migrations.AddField(
+            model_name="transactionhistory",
+            name="seq",
+            field=models.BigIntegerField(editable=False, null=True),
+        ),
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+        migrations.AlterField(
+            model_name="transactionhistory",
+            name="seq",
+            field=models.BigIntegerField(
+                db_default=models.Func(models.Value(SEQUENCE), function="nextval"),
+                editable=False,
+            ),
+        ),
+    ]
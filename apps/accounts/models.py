@@ -11,6 +11,11 @@ CURRENCY_CHOICES = [
 
 
 class Account(models.Model):
+    class PostingMode(models.TextChoices):
+        STANDARD = "STANDARD", "STANDARD"  # 매 거래마다 계좌 행 잠금
+        APPEND_ONLY = "APPEND_ONLY", "APPEND_ONLY"  # 입금은 잠금 없이 내역만 추가
+        SHARDED = "SHARDED", "SHARDED"  # 입금은 N개 버킷 중 하나만 잠금
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     owner = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -27,6 +32,10 @@ class Account(models.Model):
         max_length=16, default="ACTIVE"
     )  # ACTIVE, FROZEN, CLOSED 등
     version = models.PositiveIntegerField(default=0)  # 낙관적 락 보조용
+    posting_mode = models.CharField(
+        max_length=16, choices=PostingMode.choices, default=PostingMode.STANDARD
+    )  # 고처리량 계좌는 APPEND_ONLY/SHARDED (잔액은 compactor 가 반영)
+    bucket_count = models.PositiveSmallIntegerField(default=8)  # SHARDED 버킷 수
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -40,6 +49,35 @@ class Account(models.Model):
         return f"{self.name}({self.number}) {self.currency}"
 
 
+class AccountBalanceBucket(models.Model):
+    """
+    SHARDED 계좌의 하위 잔액 버킷
+    - 입금은 임의의 버킷 하나만 증가 → 잠금 경합을 N개 행으로 분산
+    - 실제 잔액 = Account.balance + 버킷 합계 (compactor 가 주기적으로 Account.balance 로 합산)
+    """
+
+    account = models.ForeignKey(
+        Account, on_delete=models.CASCADE, related_name="balance_buckets"
+    )
+    bucket = models.PositiveSmallIntegerField()
+    balance = models.DecimalField(
+        max_digits=20, decimal_places=2, default=Decimal("0.00")
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["account", "bucket"], name="unique_account_bucket"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.account_id}#{self.bucket} {self.balance}"
+
+
+TRANSACTION_SEQUENCE = "accounts_transactionhistory_seq"
+
+
 class TransactionHistory(models.Model):
     class TxType(models.TextChoices):
         DEPOSIT = "DEPOSIT", "DEPOSIT"
@@ -57,13 +95,21 @@ class TransactionHistory(models.Model):
     )
     tx_type = models.CharField(max_length=16, choices=TxType.choices)
     amount = models.DecimalField(max_digits=20, decimal_places=2)
-    running_balance = models.DecimalField(max_digits=20, decimal_places=2)
+    # NULL: APPEND_ONLY 계좌에 추가만 되고 아직 잔액에 반영되지 않은 거래
+    running_balance = models.DecimalField(
+        max_digits=20, decimal_places=2, null=True, blank=True
+    )
     currency = models.CharField(
         max_length=3, choices=[("KRW", "KRW"), ("USD", "USD")], default="KRW"
     )
     description = models.CharField(max_length=255, blank=True, default="")
     occurred_at = models.DateTimeField(default=timezone.now)
     posted_at = models.DateTimeField(auto_now_add=True)
+    # 반영 순서 (DB 시퀀스, 행마다 증가): 같은 시각/같은 배치 거래도 running_balance 계산 순서 그대로
+    seq = models.BigIntegerField(
+        db_default=models.Func(models.Value(TRANSACTION_SEQUENCE), function="nextval"),
+        editable=False,
+    )
 
     transfer_id = models.UUIDField(null=True, blank=True, db_index=True)
     idempotency_key = models.CharField(max_length=64, null=True, blank=True)
@@ -82,7 +128,15 @@ class TransactionHistory(models.Model):
     class Meta:
         indexes = [
             models.Index(fields=["account", "-occurred_at"]),
+            models.Index(
+                fields=["account", "amount", "id"]
+            ),  # 금액순 커서 페이지네이션
             models.Index(fields=["transfer_id"]),
+            models.Index(
+                fields=["account", "posted_at"],
+                condition=models.Q(running_balance__isnull=True),
+                name="th_pending_idx",
+            ),
         ]
         constraints = [
             models.CheckConstraint(check=models.Q(amount__gt=0), name="amount_gt_zero"),
@@ -93,3 +147,67 @@ class TransactionHistory(models.Model):
 
     def __str__(self):
         return f"{self.tx_type} {self.amount} {self.currency} ({self.account.number})"
+
+
+class DailyAccountRollup(models.Model):
+    """
+    계좌/일자(TIME_ZONE 기준)/거래유형/통화별 거래 합계
+    - 입출금 서비스가 거래 생성과 같은 트랜잭션에서 증분 반영
+    - 고처리량 계좌의 대기 중 거래는 compactor 가 잔액에 반영할 때 함께 집계
+    - 분석(일/주/월/연)은 원본 거래내역 대신 이 테이블에서 집계
+    - 어긋난 경우 rebuild_rollups 명령어로 기간 단위 재생성
+    """
+
+    account = models.ForeignKey(
+        Account, on_delete=models.CASCADE, related_name="daily_rollups"
+    )
+    date = models.DateField()
+    tx_type = models.CharField(max_length=16, choices=TransactionHistory.TxType.choices)
+    currency = models.CharField(max_length=3, choices=CURRENCY_CHOICES, default="KRW")
+    total_amount = models.DecimalField(
+        max_digits=20, decimal_places=2, default=Decimal("0.00")
+    )
+    transaction_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["account", "date", "tx_type", "currency"],
+                name="unique_daily_rollup",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.account_id} {self.date} {self.tx_type} {self.total_amount}"
+
+
+class LedgerVersion(models.Model):
+    """
+    사용자 × 월(TIME_ZONE 기준) 원장 버전
+    - 거래 반영이 커밋되면 ledger_changed 수신자가 해당 (사용자, 월) 버전을 1 올림
+    - 분석 결과 캐시 키에 사용 → 캐시 백엔드(프로세스별 메모리 캐시 포함)와 무관하게
+      다른 프로세스(compactor, import_statement, rebuild_rollups 등)의 거래 반영이 바로 보임
+    - user, month 가 모두 NULL 인 행: 전체 (롤업 재생성 등)
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    month = models.DateField(null=True, blank=True)
+    version = models.PositiveBigIntegerField(default=1)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "month"],
+                name="unique_ledger_version",
+                nulls_distinct=False,
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.month} v{self.version}"
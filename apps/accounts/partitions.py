@@ -0,0 +1,256 @@
+import re
+from datetime import date, datetime, time
+from functools import cache
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import TransactionHistory as TH
+from .rollups import local_date, rollup_timezone
+
+TABLE = TH._meta.db_table
+PARTITION_KEY = "occurred_at"
+MONTHS_AHEAD = 3
+
+
+# ----------------------------
+# 월 단위 구간 (TIME_ZONE 기준, 분석/롤업 일자 경계와 동일)
+# ----------------------------
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bounds(month):
+    """월 → [1일 00:00, 다음 달 1일 00:00) timestamptz 구간"""
+    tz = rollup_timezone()
+    return (
+        datetime.combine(month, time.min, tzinfo=tz),
+        datetime.combine(add_months(month, 1), time.min, tzinfo=tz),
+    )
+
+
+def partition_name(month, table=TABLE):
+    return f"{table}_p{month:%Y%m}"
+
+
+def default_partition(table=TABLE):
+    return f"{table}_default"
+
+
+# ----------------------------
+# 조회
+# ----------------------------
+def is_partitioned(table=TABLE):
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT EXISTS (
+                SELECT 1 FROM pg_partitioned_table
+                 WHERE partrelid = to_regclass(%s)
+            )
+            """,
+            [table],
+        )
+        return cursor.fetchone()[0]
+
+
+@cache
+def history_partitioned():
+    """
+    거래내역 테이블이 파티션 테이블인지 (프로세스당 한 번만 확인)
+    - convert 후에는 웹/워커 프로세스를 재시작해야 반영됨
+    """
+    return is_partitioned()
+
+
+def list_partitions(table=TABLE):
+    """(파티션 이름, 구간 표현, 예상 행 수) 목록"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::bigint
+              FROM pg_inherits i
+              JOIN pg_class c ON c.oid = i.inhrelid
+             WHERE i.inhparent = to_regclass(%s)
+             ORDER BY c.relname
+            """,
+            [table],
+        )
+        return cursor.fetchall()
+
+
+# ----------------------------
+# 파티션 생성
+# ----------------------------
+def create_partition(cursor, month, table=TABLE):
+    """
+    월 파티션 1개 생성, 생성했으면 True
+    - 기본(DEFAULT) 파티션에 이미 들어간 해당 월 행은 새 파티션으로 옮긴 뒤 ATTACH
+      (CREATE ... PARTITION OF 는 기본 파티션에 해당 월 행이 있으면 실패)
+    - ATTACH 는 부모 테이블을 SHARE UPDATE EXCLUSIVE 로 잠가 다른 월 파티션의 조회/입력은 막지 않지만,
+      기본 파티션이 있으면 기본 파티션을 ACCESS EXCLUSIVE 로 잠그고 새 범위의 행이 없는지 전체 검사
+      → 행 이동(DELETE)과 검사가 끝날 때(트랜잭션 종료)까지 기본 파티션을 읽거나 쓰는 쿼리는 대기
+        (범위 밖 일자의 입력, 파티션을 좁히지 못하는 조회)
+      → ensure_partitions 를 매일 실행해 미리 만들어 두면 기본 파티션이 비어 있어 잠금이 짧음
+    """
+    name = partition_name(month, table)
+    cursor.execute("SELECT to_regclass(%s)", [name])
+    if cursor.fetchone()[0] is not None:
+        return False
+    lower, upper = month_bounds(month)
+    cursor.execute(
+        f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    )
+    default = default_partition(table)
+    cursor.execute("SELECT to_regclass(%s)", [default])
+    if cursor.fetchone()[0] is not None:
+        cursor.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM {default}
+                 WHERE {PARTITION_KEY} >= %s AND {PARTITION_KEY} < %s
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+            """,
+            [lower, upper],
+        )
+    cursor.execute(
+        f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)",
+        [lower, upper],
+    )
+    return True
+
+
+@transaction.atomic
+def ensure_partitions(months_ahead=MONTHS_AHEAD, table=TABLE):
+    """
+    이번 달부터 months_ahead 개월 뒤까지 월 파티션이 없으면 생성, 생성한 파티션 이름 목록 반환
+    - 매일 실행해도 안전 (이미 있으면 건너뜀), 범위 밖 거래는 기본 파티션에 들어감
+    """
+    if not is_partitioned(table):
+        raise ValueError(f"{table} is not partitioned")
+    month = month_start(timezone.localdate(timezone=rollup_timezone()))
+    created = []
+    with connection.cursor() as cursor:
+        for i in range(months_ahead + 1):
+            if create_partition(cursor, add_months(month, i), table):
+                created.append(partition_name(add_months(month, i), table))
+    return created
+
+
+# ----------------------------
+# 변환
+# ----------------------------
+def _with_partition_key(definition):
+    """PRIMARY KEY/UNIQUE 정의의 컬럼 목록 끝에 파티션 키 추가 (파티션 테이블의 유일 제약 조건)"""
+    return re.sub(r"\(([^()]*)\)", rf"(\1, {PARTITION_KEY})", definition, count=1)
+
+
+@transaction.atomic
+def convert_to_partitioned(months_ahead=MONTHS_AHEAD, since=None, log=None):
+    """
+    거래내역 테이블을 occurred_at 월 단위 RANGE 파티션 테이블로 변환 (PostgreSQL, 1회)
+    - 트랜잭션 1개: 기존 테이블 이름 변경 → 같은 컬럼의 파티션 테이블 생성 → 월 파티션 +
+      기본 파티션 생성 → 행 복사 → 기존 테이블 삭제 → 제약 조건/인덱스를 같은 이름으로 다시 생성
+    - 파티션 범위: since(생략 시 가장 오래된 거래의 월) ~ 이번 달 + months_ahead, 그 밖은 기본 파티션
+    - PRIMARY KEY/UNIQUE 는 파티션 키를 포함해야 하므로 (id, occurred_at),
+      (external_ref, occurred_at), (account_id, idempotency_key, occurred_at) 로 바뀜
+      → 세 값 모두 occurred_at 이 다르면(다른 파티션이면) DB 가 중복을 막지 못함
+      - id: 서버가 만드는 uuid4 라 충돌하지 않음
+      - idempotency_key: posting 서비스가 advisory lock + 존재 확인으로 막음 (_lock_idempotency_key)
+      - external_ref: 서비스는 uuid4 로 생성, 외부 값은 가져오기(import_statement)에서만 들어오므로
+        가져오기가 advisory lock + 존재 확인으로 막음 (_lock_external_refs)
+    - 변환 중에는 테이블 전체가 잠기므로 점검 시간에 실행하고, 끝나면 웹/워커 프로세스 재시작
+    """
+    if connection.vendor != "postgresql":
+        raise ValueError("partitioning requires PostgreSQL")
+    if is_partitioned():
+        raise ValueError(f"{TABLE} is already partitioned")
+    log = log or (lambda message: None)
+    legacy = f"{TABLE}_legacy"
+    quote = connection.ops.quote_name
+
+    with connection.cursor() as cursor:
+        # 같은 트랜잭션에서 지연된 FK 검사가 남아 있으면 기존 테이블을 DROP 할 수 없음
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        cursor.execute(f"LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(
+            """
+            SELECT conname, contype, pg_get_constraintdef(oid)
+              FROM pg_constraint
+             WHERE conrelid = %s::regclass
+             ORDER BY contype DESC, conname
+            """,
+            [TABLE],
+        )
+        constraints = cursor.fetchall()
+        cursor.execute(
+            """
+            SELECT indexname, indexdef
+              FROM pg_indexes
+             WHERE schemaname = current_schema() AND tablename = %s
+               AND indexname NOT IN (
+                   SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass
+               )
+             ORDER BY indexname
+            """,
+            [TABLE, TABLE],
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(f"SELECT min({PARTITION_KEY}) FROM {TABLE}")
+        oldest = cursor.fetchone()[0]
+
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {legacy}")
+        cursor.execute(
+            f"CREATE TABLE {TABLE} (LIKE {legacy} INCLUDING DEFAULTS) "
+            f"PARTITION BY RANGE ({PARTITION_KEY})"
+        )
+
+        current = month_start(timezone.localdate(timezone=rollup_timezone()))
+        month = since or (month_start(local_date(oldest)) if oldest else current)
+        last = add_months(current, months_ahead)
+        count = 0
+        while month <= last:
+            lower, upper = month_bounds(month)
+            cursor.execute(
+                f"CREATE TABLE {partition_name(month)} PARTITION OF {TABLE} "
+                "FOR VALUES FROM (%s) TO (%s)",
+                [lower, upper],
+            )
+            month = add_months(month, 1)
+            count += 1
+        cursor.execute(
+            f"CREATE TABLE {default_partition()} PARTITION OF {TABLE} DEFAULT"
+        )
+        log(f"파티션 {count}개 + 기본 파티션 생성")
+
+        cursor.execute(f"INSERT INTO {TABLE} SELECT * FROM {legacy}")
+        log(f"거래 {cursor.rowcount}건 복사")
+        cursor.execute(f"DROP TABLE {legacy}")
+
+        for name, kind, definition in constraints:
+            if kind in ("p", "u"):
+                definition = _with_partition_key(definition)
+            cursor.execute(
+                f"ALTER TABLE {TABLE} ADD CONSTRAINT {quote(name)} {definition}"
+            )
+        for name, definition in indexes:
+            if definition.startswith("CREATE UNIQUE"):
+                definition = _with_partition_key(definition.split(" USING ", 1)[1])
+                definition = (
+                    f"CREATE UNIQUE INDEX {quote(name)} ON {TABLE} USING {definition}"
+                )
+            cursor.execute(definition)
+        log(f"제약 조건 {len(constraints)}개, 인덱스 {len(indexes)}개 생성")
+        cursor.execute(f"ANALYZE {TABLE}")
+
+    transaction.on_commit(history_partitioned.cache_clear)
+    return count
@@ -0,0 +1,107 @@
+from decimal import Decimal
+
+from django.db import connection, transaction
+
+from .models import Account, TransactionHistory as TH
+from .services import TX_SIGN, _apply_balances
+from .summary import invalidate_account_summaries
+
+ZERO = Decimal("0.00")
+CHUNK_SIZE = 1000
+
+
+def account_ranges(chunk_size=CHUNK_SIZE):
+    """
+    계좌 id 를 chunk_size 개씩 나눈 (lower, upper] 구간 목록 (None: 끝 없음)
+    - 구간 경계만 pk 인덱스로 건너뛰며 조회 → 계좌 id 전체를 메모리에 올리지 않음
+    """
+    ranges, lower = [], None
+    while True:
+        ids = Account.objects.order_by("pk").values_list("pk", flat=True)
+        if lower is not None:
+            ids = ids.filter(pk__gt=lower)
+        upper = list(ids[chunk_size - 1 : chunk_size])
+        if not upper:
+            ranges.append((lower, None))
+            return ranges
+        ranges.append((lower, upper[0]))
+        lower = upper[0]
+
+
+def _ledger(accounts):
+    """
+    계좌별 (id, owner_id, balance, 거래 합계, 건수, 마지막 running_balance) 튜플 반복
+    - 잔액에 반영된 거래(running_balance 있음)만: 대기 중 거래는 Account.balance 에도 없음
+    - 계좌마다 LATERAL 집계 1회 → 거래내역을 한 번만 훑어 합계/건수/마지막 행을 함께 계산
+    - 마지막 running_balance: 반영 순서(seq)가 가장 큰 거래
+      (MAX(ARRAY[seq, running_balance]) 로 정렬 없이 같은 집계에서 고름)
+    - 쿼리 1문장 → 계좌 잔액과 거래를 같은 스냅샷에서 읽음
+    """
+    signed = " ".join(f"WHEN %s THEN t.amount * {sign}" for sign in TX_SIGN.values())
+    ids_sql, ids_params = accounts.values("pk").query.sql_with_params()
+    sql = f"""
+        SELECT a.id, a.owner_id, a.balance,
+               COALESCE(l.total, 0), COALESCE(l.count, 0), l.last
+          FROM {Account._meta.db_table} AS a
+          LEFT JOIN LATERAL (
+              SELECT SUM(CASE t.tx_type {signed} END) AS total,
+                     COUNT(*) AS count,
+                     (MAX(ARRAY[t.seq::numeric, t.running_balance]))[2] AS last
+                FROM {TH._meta.db_table} AS t
+               WHERE t.account_id = a.id AND t.running_balance IS NOT NULL
+          ) AS l ON true
+         WHERE a.id IN ({ids_sql})
+         ORDER BY a.id
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*TX_SIGN, *ids_params])
+        yield from cursor
+
+
+def _drift(row):
+    pk, owner_id, balance, total, count, last = row
+    return balance != total or (last if last is not None else ZERO) != balance
+
+
+def reconcile_range(lower, upper):
+    """
+    (lower, upper] 구간 계좌 대조, (계좌 수, 거래 건수, 불일치 행 목록) 반환
+    - 불일치: Account.balance != 부호 적용 거래 합계, 또는 != 마지막 running_balance
+    - 쿼리 1문장이라 같은 스냅샷에서 잔액과 거래를 읽음 (진행 중인 입출금과 섞이지 않음)
+    """
+    accounts = Account.objects.all()
+    if lower is not None:
+        accounts = accounts.filter(pk__gt=lower)
+    if upper is not None:
+        accounts = accounts.filter(pk__lte=upper)
+    checked, rows, drifts = 0, 0, []
+    for row in _ledger(accounts):
+        checked += 1
+        rows += row[4]
+        if _drift(row):
+            drifts.append(row)
+    return checked, rows, drifts
+
+
+@transaction.atomic
+def repair_balances(account_ids):
+    """
+    계좌를 잠근 뒤 다시 대조해 Account.balance 를 거래 합계로 맞춤, 수정한 계좌 수 반환
+    - 대조 후 들어온 거래를 덮어쓰지 않도록 잠근 상태에서 다시 계산
+    - running_balance 불일치(합계는 맞음)는 보고만 함 (거래내역 재계산은 하지 않음)
+    """
+    locked = (
+        Account.objects.select_for_update().filter(pk__in=account_ids).order_by("pk")
+    )
+    list(locked.values_list("pk", flat=True))
+    balances, owners = {}, set()
+    for pk, owner_id, balance, total, *_ in _ledger(
+        Account.objects.filter(pk__in=account_ids)
+    ):
+        if balance != total:
+            balances[pk] = total
+            owners.add(owner_id)
+    _apply_balances(balances)
+    if owners:
+        transaction.on_commit(lambda: invalidate_account_summaries(owners))
+    return len(balances)
@@ -0,0 +1,167 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailyAccountRollup, TransactionHistory as TH
+from .signals import ledger_changed
+
+UPSERT_CHUNK_SIZE = 1000
+
+
+def rollup_timezone():
+    """일자 경계 기준 시간대: 요청별 activate() 와 무관하게 항상 settings.TIME_ZONE"""
+    return ZoneInfo(settings.TIME_ZONE)
+
+
+def local_date(value, tz=None):
+    return timezone.localdate(value, tz or rollup_timezone())
+
+
+def day_bounds(start_date=None, end_date=None):
+    """
+    날짜 범위(양 끝 포함) → [start 00:00, end+1일 00:00) 반열림 datetime 구간 (TIME_ZONE 기준)
+    - occurred_at__date 처럼 컬럼을 캐스트하지 않으므로 (account, -occurred_at) 인덱스 범위 검색 가능
+    - 생략한 쪽은 None
+    """
+    tz = rollup_timezone()
+    lower = datetime.combine(start_date, time.min, tzinfo=tz) if start_date else None
+    upper = (
+        datetime.combine(end_date + timedelta(days=1), time.min, tzinfo=tz)
+        if end_date
+        else None
+    )
+    return lower, upper
+
+
+def rollup_upsert_sql(source):
+    """
+    롤업 증분 반영 INSERT ... ON CONFLICT DO UPDATE (PostgreSQL)
+    - source: (account_id, date, tx_type, currency, total_amount, transaction_count) 를
+      내는 VALUES 절 또는 SELECT 문
+    """
+    table = DailyAccountRollup._meta.db_table
+    return f"""
+        INSERT INTO {table} (
+            account_id, date, tx_type, currency, total_amount, transaction_count
+        )
+        {source}
+        ON CONFLICT (account_id, date, tx_type, currency) DO UPDATE
+           SET total_amount = {table}.total_amount + EXCLUDED.total_amount,
+               transaction_count = {table}.transaction_count + EXCLUDED.transaction_count
+    """
+
+
+def notify_ledger_changed(changes):
+    """
+    커밋 후 ledger_changed 시그널 발송
+    - changes: {owner_id: {일자, ...}} 또는 None(전체)
+    - 커밋 전에 보내면 다른 요청이 아직 안 보이는 데이터로 캐시를 다시 채울 수 있음
+    """
+    transaction.on_commit(
+        lambda: ledger_changed.send(sender=DailyAccountRollup, changes=changes)
+    )
+
+
+def rollup_rows(transactions):
+    """TransactionHistory 목록 → bump_rollups 입력 형태 (tx.account 가 로드되어 있어야 함)"""
+    for tx in transactions:
+        yield (
+            tx.account_id,
+            tx.account.owner_id,
+            tx.occurred_at,
+            tx.tx_type,
+            tx.currency,
+            tx.amount,
+        )
+
+
+def bump_rollups(rows):
+    """
+    거래를 (계좌, 일자, 유형, 통화) 단위로 합쳐 일별 롤업에 더함
+    - rows: (account_id, owner_id, occurred_at, tx_type, currency, amount) 목록
+    - 일자는 TIME_ZONE 기준 (분석의 날짜 범위와 동일)
+    - 교착 방지를 위해 키 순서대로 반영
+    - 커밋 후 소유자별 변경 일자로 ledger_changed 발송
+    """
+    tz = rollup_timezone()
+    totals = defaultdict(lambda: [Decimal("0.00"), 0])
+    changes = defaultdict(set)
+    for account_id, owner_id, occurred_at, tx_type, currency, amount in rows:
+        day = local_date(occurred_at, tz)
+        total = totals[(str(account_id), day, tx_type, currency)]
+        total[0] += amount
+        total[1] += 1
+        changes[owner_id].add(day)
+    if not totals:
+        return
+    notify_ledger_changed(dict(changes))
+    items = sorted(totals.items())
+
+    if connection.vendor != "postgresql":
+        for (account_id, date, tx_type, currency), (amount, count) in items:
+            rollups = DailyAccountRollup.objects.filter(
+                account_id=account_id, date=date, tx_type=tx_type, currency=currency
+            )
+            if not rollups.update(
+                total_amount=F("total_amount") + amount,
+                transaction_count=F("transaction_count") + count,
+            ):
+                DailyAccountRollup.objects.create(
+                    account_id=account_id,
+                    date=date,
+                    tx_type=tx_type,
+                    currency=currency,
+                    total_amount=amount,
+                    transaction_count=count,
+                )
+        return
+
+    with connection.cursor() as cursor:
+        for i in range(0, len(items), UPSERT_CHUNK_SIZE):
+            chunk = items[i : i + UPSERT_CHUNK_SIZE]
+            values = ", ".join(["(%s::uuid, %s::date, %s, %s, %s, %s)"] * len(chunk))
+            cursor.execute(
+                rollup_upsert_sql(f"VALUES {values}"),
+                [p for key, total in chunk for p in (*key, *total)],
+            )
+
+
+@transaction.atomic
+def rebuild_rollups(start_date=None, end_date=None, account_ids=None):
+    """
+    기간(양 끝 포함) 롤업을 원본 거래내역에서 다시 집계, 생성한 행 수 반환
+    - 잔액에 반영되지 않은 대기 중 거래는 제외 (compactor 가 반영할 때 집계됨)
+    - 재생성 중 들어온 거래가 누락/중복될 수 있으므로 지난 기간 위주로 실행
+    """
+    lower, upper = day_bounds(start_date, end_date)
+    rollups = DailyAccountRollup.objects.all()
+    txs = TH.objects.filter(running_balance__isnull=False)
+    if lower:
+        rollups = rollups.filter(date__gte=start_date)
+        txs = txs.filter(occurred_at__gte=lower)
+    if upper:
+        rollups = rollups.filter(date__lte=end_date)
+        txs = txs.filter(occurred_at__lt=upper)
+    if account_ids is not None:
+        rollups = rollups.filter(account_id__in=account_ids)
+        txs = txs.filter(account_id__in=account_ids)
+
+    rollups.delete()
+    grouped = (
+        txs.annotate(date=TruncDate("occurred_at", tzinfo=rollup_timezone()))
+        .values("account_id", "date", "tx_type", "currency")
+        .annotate(total_amount=Sum("amount"), transaction_count=Count("id"))
+        .order_by()
+    )
+    created = DailyAccountRollup.objects.bulk_create(
+        (DailyAccountRollup(**row) for row in grouped), batch_size=UPSERT_CHUNK_SIZE
+    )
+    notify_ledger_changed(None)
+    return len(created)
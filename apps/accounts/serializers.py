@@ -1,12 +1,107 @@
+import os
+import uuid
+
 from rest_framework import serializers
-from .models import Account
+from .importers import PARSERS
+from .models import Account, TransactionHistory
 
 
 class AccountSerializer(serializers.ModelSerializer):
+    # 목록/상세 조회 queryset 의 annotate 값 (생성 응답에는 없음)
+    transaction_count = serializers.IntegerField(read_only=True)
+    last_activity_at = serializers.DateTimeField(read_only=True)
+
     class Meta:
         model = Account
-        fields = ["id", "name", "number", "balance", "created_at"]
+        fields = [
+            "id",
+            "name",
+            "number",
+            "balance",
+            "created_at",
+            "transaction_count",
+            "last_activity_at",
+        ]
         read_only_fields = ["id", "balance", "created_at"]
 
 
+class RecentTransactionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TransactionHistory
+        fields = ["id", "tx_type", "amount", "currency", "description", "occurred_at"]
+
+
+class AccountWithRecentSerializer(AccountSerializer):
+    # ?include=recent_transactions: Prefetch(to_attr="recent_transactions") 결과
+    recent_transactions = RecentTransactionSerializer(many=True, read_only=True)
+
+    class Meta(AccountSerializer.Meta):
+        fields = AccountSerializer.Meta.fields + ["recent_transactions"]
+
+
+class BalanceQuerySerializer(serializers.Serializer):
+    """
+    잔액 조회 조건 (쿼리 파라미터)
+    - accounts: 계좌 id 목록 (쉼표 구분)
+    - as_of: 해당 시각 잔액 (생략하면 현재), 또는 start_date/end_date: 일자별 마감 잔액
+    """
+
+    MAX_ACCOUNTS = 100
+    MAX_DAYS = 366
+
+    accounts = serializers.CharField()
+    as_of = serializers.DateTimeField(required=False)
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+
+    def validate_accounts(self, value):
+        try:
+            ids = list(dict.fromkeys(uuid.UUID(v.strip()) for v in value.split(",")))
+        except ValueError:
+            raise serializers.ValidationError("올바른 계좌 id 가 아닙니다.")
+        if len(ids) > self.MAX_ACCOUNTS:
+            raise serializers.ValidationError(
+                f"계좌는 최대 {self.MAX_ACCOUNTS}개까지 조회할 수 있습니다."
+            )
+        return ids
+
+    def validate(self, attrs):
+        start, end = attrs.get("start_date"), attrs.get("end_date")
+        if (start is None) != (end is None):
+            raise serializers.ValidationError(
+                "start_date 와 end_date 를 함께 지정해주세요."
+            )
+        if start is not None:
+            if "as_of" in attrs:
+                raise serializers.ValidationError(
+                    "as_of 와 start_date/end_date 는 함께 쓸 수 없습니다."
+                )
+            if start > end:
+                raise serializers.ValidationError(
+                    {"end_date": "end_date 는 start_date 이후여야 합니다."}
+                )
+            if (end - start).days + 1 > self.MAX_DAYS:
+                raise serializers.ValidationError(
+                    {"end_date": f"기간은 최대 {self.MAX_DAYS}일입니다."}
+                )
+        return attrs
+
+
+class StatementImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    # 생략하면 파일 확장자로 판단
+    file_format = serializers.ChoiceField(choices=sorted(PARSERS), required=False)
+    encoding = serializers.CharField(required=False, default="utf-8-sig")
+
+    def validate(self, attrs):
+        if "file_format" not in attrs:
+            ext = os.path.splitext(attrs["file"].name)[1][1:].lower()
+            if ext not in PARSERS:
+                raise serializers.ValidationError(
+                    {"file_format": "파일 형식을 지정해주세요 (csv, ofx)"}
+                )
+            attrs["file_format"] = ext
+        return attrs
+
+
 # model 과 테이블 이름 일치하게 수정
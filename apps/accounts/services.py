@@ -1,13 +1,40 @@
-from decimal import Decimal, ROUND_HALF_UP
-from django.db import transaction
-from django.db.models import F
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Sum
 from django.utils import timezone
+import json
+import random
 import uuid
 
-from .models import Account, TransactionHistory as TH
+from .models import Account, AccountBalanceBucket, TransactionHistory as TH
+from .partitions import history_partitioned
+from .rollups import (
+    bump_rollups,
+    local_date,
+    notify_ledger_changed,
+    rollup_rows,
+    rollup_upsert_sql,
+)
 
 TWO_DP = Decimal("0.01")
 
+# 잔액 증감 방향 (+1: 입금성, -1: 출금성)
+TX_SIGN = {
+    TH.TxType.DEPOSIT: 1,
+    TH.TxType.TRANSFER_IN: 1,
+    TH.TxType.REVERSAL: 1,
+    TH.TxType.WITHDRAW: -1,
+    TH.TxType.TRANSFER_OUT: -1,
+    TH.TxType.FEE: -1,
+}
+
+# post_batch 결과 상태
+POSTED = "posted"
+DUPLICATE = "duplicate"
+REJECTED = "rejected"
+
 
 def _q(amount: Decimal) -> Decimal:
     # 소수점 2자리 반올림 고정
@@ -21,20 +48,465 @@ def _ensure_currency(account: Account, currency: str):
         )
 
 
+PESSIMISTIC = "pessimistic"
+OPTIMISTIC = "optimistic"
+
+
+def _locking_mode():
+    return getattr(settings, "ACCOUNTS_LOCKING_MODE", PESSIMISTIC)
+
+
+def _use_guarded(idempotency_key):
+    """단일 문장(가드된 UPDATE + INSERT) 경로 사용 여부 (PostgreSQL 전용)"""
+    if connection.vendor != "postgresql":
+        return False
+    if _locking_mode() == OPTIMISTIC:
+        return True
+    return bool(idempotency_key) and getattr(
+        settings, "ACCOUNTS_IDEMPOTENCY_INSERT_FIRST", True
+    )
+
+
+def _lock_idempotency_key(account_id, idempotency_key):
+    """
+    파티션 테이블이면 (계좌, 멱등성 키) 단위 트랜잭션 advisory lock
+    - 파티션 테이블의 유일 제약 조건은 occurred_at 을 포함하므로 같은 키라도 시각이 다르면
+      막지 못함 → 같은 키의 동시 요청을 직렬화한 뒤 존재 확인으로 중복 제거
+    """
+    if not history_partitioned():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_advisory_xact_lock(hashtextextended(%s, 0))",
+            [f"{account_id}:{idempotency_key}"],
+        )
+
+
+# external_ref advisory lock: (클래스, 구간) 두 정수 키 → 멱등성 키의 bigint 키와 겹치지 않음
+EXTERNAL_REF_LOCK_CLASS = 1
+EXTERNAL_REF_LOCK_STRIPES = 64
+
+
+def _lock_external_refs(refs):
+    """
+    파티션 테이블이면 external_ref 해시 구간 단위 트랜잭션 advisory lock
+    - 파티션 테이블에서는 external_ref 유일 제약 조건이 (external_ref, occurred_at) 이라 전역 유일을 보장하지 못함
+      → 같은 참조를 가져오는 요청을 직렬화한 뒤 존재 확인으로 중복 제거
+    - 참조마다 잠그면 잠금 테이블이 넘칠 수 있어 EXTERNAL_REF_LOCK_STRIPES 개 구간으로 나눠 잠금
+      (교착 방지를 위해 구간 번호 순서대로)
+    """
+    if not refs or not history_partitioned():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT pg_advisory_xact_lock(%s, s.stripe)
+              FROM (
+                  SELECT DISTINCT hashtext(r) & %s AS stripe
+                    FROM unnest(%s::text[]) AS r
+                   ORDER BY stripe
+              ) AS s
+            """,
+            [EXTERNAL_REF_LOCK_CLASS, EXTERNAL_REF_LOCK_STRIPES - 1, list(refs)],
+        )
+
+
+def _guarded_post_sql(keyed, check_version):
+    acc_table = Account._meta.db_table
+    th_table = TH._meta.db_table
+    # 잔액/상태/통화/버전 조건을 WHERE 에서 확인 → 조건 실패 시 아무 행도 바뀌지 않음
+    guard = """
+        id = %(account_id)s::uuid
+        AND currency = %(currency)s
+        AND posting_mode = 'STANDARD'
+        AND (%(delta)s >= 0 OR (status = 'ACTIVE' AND balance + %(delta)s >= 0))
+    """
+    if check_version:
+        guard += " AND version = %(expected_version)s"
+    insert = f"""
+        INSERT INTO {th_table} (
+            id, account_id, tx_type, amount, running_balance, currency,
+            description, occurred_at, posted_at, transfer_id,
+            idempotency_key, external_ref, counterparty_id, metadata
+        )
+        SELECT %(id)s::uuid, %(account_id)s::uuid, %(tx_type)s, %(amount)s,
+               {{balance}}, %(currency)s, %(description)s,
+               %(occurred_at)s, %(now)s, NULL, %(idempotency_key)s, %(external_ref)s,
+               NULL, %(metadata)s::jsonb
+    """
+    # roll: INSERT 된 거래를 같은 문장에서 일별 롤업에 더함
+    roll = rollup_upsert_sql(
+        """
+        SELECT %(account_id)s::uuid, %(rollup_date)s::date, %(tx_type)s,
+               %(currency)s, %(amount)s, 1
+          FROM ins
+        """
+    )
+
+    if not keyed:
+        # upd: 잔액 갱신과 동시에 행 잠금, 갱신된 잔액으로 바로 INSERT
+        return f"""
+            WITH upd AS (
+                UPDATE {acc_table}
+                   SET balance = balance + %(delta)s, version = version + 1
+                 WHERE {guard}
+                RETURNING balance, owner_id
+            ), ins AS (
+                {insert.format(balance="upd.balance")}
+                  FROM upd
+                RETURNING running_balance, seq
+            ), roll AS ({roll})
+            SELECT ins.running_balance, upd.owner_id, ins.seq FROM ins, upd
+        """
+
+    # cur: 가드 조건을 통과하고 키가 없을 때만 계좌 행 잠금 (replay 는 잠그지 않음)
+    # ins: ON CONFLICT 로 동시 재시도 중복을 걸러냄
+    #      (파티션 테이블은 (account_id, idempotency_key) 유일 인덱스가 없어 대상 없이 지정,
+    #       중복은 _lock_idempotency_key 로 막음)
+    # upd: INSERT 가 성공한 경우에만 잔액/버전 갱신
+    conflict = (
+        "ON CONFLICT DO NOTHING"
+        if history_partitioned()
+        else "ON CONFLICT (account_id, idempotency_key) DO NOTHING"
+    )
+    return f"""
+        WITH cur AS (
+            SELECT balance, owner_id FROM {acc_table}
+             WHERE {guard}
+               AND NOT EXISTS (
+                   SELECT 1 FROM {th_table}
+                    WHERE account_id = %(account_id)s::uuid
+                      AND idempotency_key = %(idempotency_key)s
+               )
+               FOR UPDATE
+        ), ins AS (
+            {insert.format(balance="cur.balance + %(delta)s")}
+              FROM cur
+            {conflict}
+            RETURNING running_balance, seq
+        ), upd AS (
+            UPDATE {acc_table}
+               SET balance = ins.running_balance, version = version + 1
+              FROM ins
+             WHERE id = %(account_id)s::uuid
+        ), roll AS ({roll})
+        SELECT ins.running_balance, cur.owner_id, ins.seq FROM ins, cur
+    """
+
+
+def _post_guarded(
+    account_id,
+    tx_type,
+    amount,
+    currency,
+    description,
+    idempotency_key,
+    metadata,
+    expected_version=None,
+    occurred_at=None,
+):
+    """
+    입출금을 계좌 행 선점(select_for_update) 없이 한 문장으로 처리 (PostgreSQL)
+    - 키 없음: UPDATE ... WHERE 가드 RETURNING balance → 같은 문장에서 INSERT
+    - 키 있음: INSERT ... ON CONFLICT DO NOTHING 이 성공한 경우에만 잔액 UPDATE
+      재요청(replay)은 잠금 없이 저장된 TransactionHistory 를 그대로 반환
+    - expected_version 이 있으면 version 이 같을 때만 반영 (낙관적 락)
+    - 가드 조건이 실패하면 기존 방식과 같은 ValueError 를 발생
+    - 고처리량 계좌면 None 을 반환 → 호출부의 일반 경로로 처리
+    """
+    now = timezone.now()
+    tx_id = uuid.uuid4()
+    params = {
+        "id": str(tx_id),
+        "account_id": str(account_id),
+        "tx_type": tx_type,
+        "delta": TX_SIGN[tx_type] * amount,
+        "amount": amount,
+        "currency": currency,
+        "description": description,
+        "now": now,
+        "occurred_at": occurred_at or now,
+        "rollup_date": local_date(occurred_at or now),
+        "idempotency_key": idempotency_key,
+        "external_ref": str(uuid.uuid4()),
+        "metadata": json.dumps(metadata or {}),
+        "expected_version": expected_version,
+    }
+    if idempotency_key:
+        _lock_idempotency_key(account_id, idempotency_key)
+    sql = _guarded_post_sql(bool(idempotency_key), expected_version is not None)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+
+    if row is not None:
+        tx = TH(
+            id=tx_id,
+            account_id=account_id,
+            tx_type=tx_type,
+            amount=amount,
+            running_balance=row[0],
+            currency=currency,
+            description=description,
+            occurred_at=occurred_at or now,
+            posted_at=now,
+            seq=row[2],
+            idempotency_key=idempotency_key,
+            external_ref=params["external_ref"],
+            metadata=metadata or {},
+        )
+        tx._state.adding = False
+        tx._state.db = connection.alias
+        notify_ledger_changed({row[1]: {params["rollup_date"]}})
+        return tx
+
+    # replay 라면 조회 1회로 끝
+    existing = None
+    if idempotency_key:
+        existing = (
+            TH.objects.filter(account_id=account_id, idempotency_key=idempotency_key)
+            .select_related("account")
+            .first()
+        )
+        if existing and existing.account.currency == currency:
+            return existing
+
+    # 가드 실패: 기존 방식과 같은 순서로 원인 확인 (계좌 → 통화 → 상태/잔액)
+    acc = existing.account if existing else Account.objects.get(pk=account_id)
+    _ensure_currency(acc, currency)
+    if acc.posting_mode != Account.PostingMode.STANDARD:
+        return None
+    _ensure_version(acc, expected_version)
+    if acc.status != "ACTIVE":
+        raise ValueError(f"account status not ACTIVE: {acc.status}")
+    raise ValueError("insufficient funds")
+
+
+def _ensure_version(account: Account, expected_version):
+    if expected_version is not None and account.version != expected_version:
+        raise ValueError(
+            f"account version conflict: expected={expected_version}, "
+            f"actual={account.version}"
+        )
+
+
+def _materialize_locked(acc):
+    """
+    잠금된 계좌의 대기 중(running_balance IS NULL) 거래를 반영 순서(seq)로 잔액에 반영
+    - SHARDED 계좌는 버킷도 잠근 뒤 0으로 비움 (버킷 합계 == 대기 중 입금 합계)
+    - 반영 건수 반환, acc.balance 도 갱신
+    """
+    sharded = acc.posting_mode == Account.PostingMode.SHARDED
+    if sharded:
+        # 진행 중인 입금이 커밋될 때까지 대기 → 이후 조회에서 해당 내역도 보임
+        list(
+            AccountBalanceBucket.objects.select_for_update()
+            .filter(account=acc)
+            .order_by("bucket")
+        )
+
+    pending = list(
+        TH.objects.filter(account=acc, running_balance__isnull=True)
+        .order_by("seq")
+        .only("id", "account_id", "tx_type", "amount", "currency", "occurred_at")
+    )
+    if not pending:
+        return 0
+
+    balance = acc.balance
+    for tx in pending:
+        balance = _q(balance + TX_SIGN[tx.tx_type] * tx.amount)
+        tx.running_balance = balance
+        tx.account = acc
+    TH.objects.bulk_update(pending, ["running_balance"], batch_size=1000)
+    bump_rollups(rollup_rows(pending))
+    Account.objects.filter(pk=acc.pk).update(balance=balance, version=F("version") + 1)
+    if sharded:
+        AccountBalanceBucket.objects.filter(account=acc).exclude(
+            balance=Decimal("0.00")
+        ).update(balance=Decimal("0.00"))
+    acc.balance = balance
+    return len(pending)
+
+
+def _lock_accounts(account_ids):
+    """
+    교착 방지를 위해 pk 순서로 계좌를 한 번에 잠그고 {pk: Account} 반환
+    고처리량 계좌는 잠근 김에 대기 중인 입금을 먼저 반영 → 정확한 가용 잔액
+    """
+    accounts = {
+        acc.pk: acc
+        for acc in Account.objects.select_for_update()
+        .filter(pk__in=account_ids)
+        .order_by("pk")
+    }
+    for acc in accounts.values():
+        if acc.posting_mode != Account.PostingMode.STANDARD:
+            _materialize_locked(acc)
+    return accounts
+
+
+def _ensure_buckets(acc):
+    AccountBalanceBucket.objects.bulk_create(
+        [AccountBalanceBucket(account=acc, bucket=i) for i in range(acc.bucket_count)],
+        ignore_conflicts=True,
+    )
+
+
+def _bump_bucket(acc, amount):
+    """임의의 버킷 하나만 증가 (해당 버킷 행만 잠김)"""
+    bucket = random.randrange(acc.bucket_count)
+    buckets = AccountBalanceBucket.objects.filter(account=acc, bucket=bucket)
+    if not buckets.update(balance=F("balance") + amount):
+        _ensure_buckets(acc)
+        buckets.update(balance=F("balance") + amount)
+
+
+def _append_deposit(
+    acc,
+    amount,
+    currency,
+    description,
+    idempotency_key,
+    metadata,
+    tx_type=TH.TxType.DEPOSIT,
+    occurred_at=None,
+):
+    """
+    고처리량 계좌 입금성 거래: 계좌 행을 잠그지 않고 대기 중 거래로 추가만 함
+    - SHARDED 계좌는 버킷 하나에도 금액을 더함
+    """
+    if idempotency_key:
+        _lock_idempotency_key(acc.pk, idempotency_key)
+        existing = TH.objects.filter(
+            account=acc, idempotency_key=idempotency_key
+        ).first()
+        if existing:
+            return existing
+
+    fields = dict(
+        account=acc,
+        tx_type=tx_type,
+        amount=amount,
+        running_balance=None,
+        currency=currency,
+        description=description,
+        occurred_at=occurred_at or timezone.now(),
+        idempotency_key=idempotency_key,
+        metadata=metadata or {},
+    )
+
+    def _insert():
+        tx = TH.objects.create(**fields)
+        if acc.posting_mode == Account.PostingMode.SHARDED:
+            _bump_bucket(acc, amount)
+        return tx
+
+    if not idempotency_key:
+        return _insert()
+    try:
+        with transaction.atomic():
+            return _insert()
+    except IntegrityError:
+        # 같은 키로 동시에 들어온 요청이 먼저 커밋됨
+        return TH.objects.get(account=acc, idempotency_key=idempotency_key)
+
+
 @transaction.atomic
-def deposit(
+def materialize_pending(account_id):
+    """
+    고처리량 계좌의 대기 중 거래를 잔액/running_balance 에 반영 (compactor 용)
+    """
+    acc = Account.objects.select_for_update().get(pk=account_id)
+    return _materialize_locked(acc)
+
+
+def get_available_balance(account_id):
+    """반영된 잔액 + 아직 반영되지 않은 대기 중 거래 합계"""
+    acc = Account.objects.get(pk=account_id)
+    if acc.posting_mode == Account.PostingMode.STANDARD:
+        return acc.balance
+    if acc.posting_mode == Account.PostingMode.SHARDED:
+        pending = acc.balance_buckets.aggregate(total=Sum("balance"))["total"]
+        return _q(acc.balance + (pending or 0))
+    balance = acc.balance
+    for tx_type, amount in TH.objects.filter(
+        account=acc, running_balance__isnull=True
+    ).values_list("tx_type", "amount"):
+        balance += TX_SIGN[tx_type] * amount
+    return _q(balance)
+
+
+@transaction.atomic
+def set_posting_mode(account_id, posting_mode, bucket_count=None):
+    """
+    계좌 처리 모드 변경
+    - 변경 전 대기 중 거래를 먼저 반영
+    - SHARDED 로 바꿀 때 버킷 행을 미리 생성
+    """
+    acc = Account.objects.select_for_update().get(pk=account_id)
+    _materialize_locked(acc)
+    acc.posting_mode = posting_mode
+    if bucket_count:
+        acc.bucket_count = bucket_count
+    Account.objects.filter(pk=acc.pk).update(
+        posting_mode=acc.posting_mode, bucket_count=acc.bucket_count
+    )
+    if posting_mode == Account.PostingMode.SHARDED:
+        _ensure_buckets(acc)
+
+
+@transaction.atomic
+def _credit(
+    tx_type,
     account_id,
     amount,
     currency="KRW",
     description="",
     idempotency_key=None,
     metadata=None,
+    expected_version=None,
+    occurred_at=None,
 ):
     amount = _q(amount)
     if amount <= 0:
         raise ValueError("amount must be > 0")
 
-    acc = Account.objects.select_for_update().get(pk=account_id)
+    if _use_guarded(idempotency_key):
+        tx = _post_guarded(
+            account_id,
+            tx_type,
+            amount,
+            currency,
+            description,
+            idempotency_key,
+            metadata,
+            expected_version,
+            occurred_at,
+        )
+        if tx is not None:
+            return tx
+
+    # 일반 계좌만 잠금 (고처리량 계좌는 잠그지 않고 내역만 추가)
+    acc = (
+        Account.objects.select_for_update()
+        .filter(pk=account_id, posting_mode=Account.PostingMode.STANDARD)
+        .first()
+    )
+    if acc is None:
+        acc = Account.objects.get(pk=account_id)
+        _ensure_currency(acc, currency)
+        _ensure_version(acc, expected_version)
+        return _append_deposit(
+            acc,
+            amount,
+            currency,
+            description,
+            idempotency_key,
+            metadata,
+            tx_type,
+            occurred_at,
+        )
     _ensure_currency(acc, currency)
 
     # 멱등성: 동일 키가 이미 존재하면 그대로 반환
@@ -44,42 +516,65 @@ def deposit(
         ).first()
         if existing:
             return existing
+    _ensure_version(acc, expected_version)
 
     new_balance = _q(acc.balance + amount)
 
     tx = TH.objects.create(
         account=acc,
-        tx_type=TH.TxType.DEPOSIT,
+        tx_type=tx_type,
         amount=amount,
         running_balance=new_balance,
         currency=currency,
         description=description,
-        occurred_at=timezone.now(),
+        occurred_at=occurred_at or timezone.now(),
         idempotency_key=idempotency_key,
         metadata=metadata or {},
     )
 
-    # 잔액/버전 갱신
+    # 잔액/버전 갱신 + 일별 롤업
     Account.objects.filter(pk=acc.pk).update(
         balance=new_balance, version=F("version") + 1
     )
+    bump_rollups(rollup_rows([tx]))
     return tx
 
 
 @transaction.atomic
-def withdraw(
+def _debit(
+    tx_type,
     account_id,
     amount,
     currency="KRW",
     description="",
     idempotency_key=None,
     metadata=None,
+    expected_version=None,
+    occurred_at=None,
 ):
     amount = _q(amount)
     if amount <= 0:
         raise ValueError("amount must be > 0")
 
-    acc = Account.objects.select_for_update().get(pk=account_id)
+    if _use_guarded(idempotency_key):
+        tx = _post_guarded(
+            account_id,
+            tx_type,
+            amount,
+            currency,
+            description,
+            idempotency_key,
+            metadata,
+            expected_version,
+            occurred_at,
+        )
+        if tx is not None:
+            return tx
+
+    accounts = _lock_accounts([account_id])
+    if not accounts:
+        raise Account.DoesNotExist("Account matching query does not exist.")
+    acc = accounts.popitem()[1]
     _ensure_currency(acc, currency)
 
     if idempotency_key:
@@ -88,6 +583,7 @@ def withdraw(
         ).first()
         if existing:
             return existing
+    _ensure_version(acc, expected_version)
 
     if acc.status != "ACTIVE":
         raise ValueError(f"account status not ACTIVE: {acc.status}")
@@ -99,12 +595,12 @@ def withdraw(
 
     tx = TH.objects.create(
         account=acc,
-        tx_type=TH.TxType.WITHDRAW,
+        tx_type=tx_type,
         amount=amount,
         running_balance=new_balance,
         currency=currency,
         description=description,
-        occurred_at=timezone.now(),
+        occurred_at=occurred_at or timezone.now(),
         idempotency_key=idempotency_key,
         metadata=metadata or {},
     )
@@ -112,73 +608,314 @@ def withdraw(
     Account.objects.filter(pk=acc.pk).update(
         balance=new_balance, version=F("version") + 1
     )
+    bump_rollups(rollup_rows([tx]))
     return tx
 
 
-@transaction.atomic
-def transfer(from_account_id, to_account_id, amount, currency="KRW", description=""):
-    if from_account_id == to_account_id:
-        raise ValueError("cannot transfer to the same account")
+def deposit(
+    account_id,
+    amount,
+    currency="KRW",
+    description="",
+    idempotency_key=None,
+    metadata=None,
+    expected_version=None,
+):
+    return _credit(
+        TH.TxType.DEPOSIT,
+        account_id,
+        amount,
+        currency,
+        description,
+        idempotency_key,
+        metadata,
+        expected_version,
+    )
 
-    amount = _q(amount)
-    if amount <= 0:
-        raise ValueError("amount must be > 0")
 
-    # 교착 방지: id 순서로 잠금
-    a_id, b_id = sorted([from_account_id, to_account_id])
-    a, b = (
-        Account.objects.select_for_update().filter(pk__in=[a_id, b_id]).order_by("pk")
+def withdraw(
+    account_id,
+    amount,
+    currency="KRW",
+    description="",
+    idempotency_key=None,
+    metadata=None,
+    expected_version=None,
+):
+    return _debit(
+        TH.TxType.WITHDRAW,
+        account_id,
+        amount,
+        currency,
+        description,
+        idempotency_key,
+        metadata,
+        expected_version,
     )
-    from_acc = a if a.pk == from_account_id else b
-    to_acc = b if a.pk == from_account_id else a
 
-    _ensure_currency(from_acc, currency)
-    _ensure_currency(to_acc, currency)
 
-    if from_acc.status != "ACTIVE" or to_acc.status != "ACTIVE":
-        raise ValueError("both accounts must be ACTIVE")
+def post_transaction(account_id, tx_type, amount, **kwargs):
+    """
+    단건 거래 생성 (API 등): tx_type 부호에 따라 입금/출금 경로로 처리
+    - 계좌 잠금 + 잔액 검증 + running_balance/잔액 갱신을 deposit/withdraw 와 동일하게 수행
+    - 이체(TRANSFER_IN/OUT)는 상대 계좌가 필요하므로 transfer() 사용
+    """
+    if tx_type not in TX_SIGN or tx_type in (
+        TH.TxType.TRANSFER_IN,
+        TH.TxType.TRANSFER_OUT,
+    ):
+        raise ValueError(f"unsupported tx_type: {tx_type}")
+    post = _credit if TX_SIGN[tx_type] > 0 else _debit
+    return post(tx_type, account_id, amount, **kwargs)
+
+
+def _apply_balances(balances):
+    """
+    {account_pk: 새 잔액} 을 한 번에 반영 (버전 +1)
+    PostgreSQL 은 UPDATE ... FROM (VALUES ...) 한 문장, 그 외 DB는 계좌별 UPDATE
+    """
+    if not balances:
+        return
+    if connection.vendor != "postgresql":
+        for pk, balance in balances.items():
+            Account.objects.filter(pk=pk).update(
+                balance=balance, version=F("version") + 1
+            )
+        return
+
+    values = ", ".join(["(%s::uuid, %s::numeric)"] * len(balances))
+    params = [p for pk, balance in balances.items() for p in (str(pk), balance)]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {Account._meta.db_table} AS a
+               SET balance = v.balance, version = a.version + 1
+              FROM (VALUES {values}) AS v(id, balance)
+             WHERE a.id = v.id
+            """,
+            params,
+        )
 
-    if from_acc.balance < amount:
-        raise ValueError("insufficient funds")
+
+@transaction.atomic
+def post_journal(legs, description=""):
+    """
+    N-leg 분개를 원자적으로 처리 (분할 결제, 수수료/원금/세금 등)
+    - legs: dict 목록
+      {account_id, tx_type, amount(>0), currency, description, metadata, counterparty_id}
+    - tx_type 의 방향(TX_SIGN)으로 부호를 정하고, 통화별 합계가 0 이어야 함
+    - 관련 계좌 전체를 pk 순서로 한 번에 잠금 → 교착 없음
+    - 모든 내역은 같은 transfer_id 로 bulk_create, 잔액은 UPDATE 한 문장으로 갱신
+    - 반환: legs 순서와 같은 TransactionHistory 목록
+    """
+    legs = list(legs)
+    if len(legs) < 2:
+        raise ValueError("journal needs at least 2 legs")
+
+    totals = defaultdict(Decimal)
+    prepared = []
+    for leg in legs:
+        tx_type = leg["tx_type"]
+        if tx_type not in TX_SIGN:
+            raise ValueError(f"unsupported tx_type: {tx_type}")
+        amount = _q(leg["amount"])
+        if amount <= 0:
+            raise ValueError("amount must be > 0")
+        currency = leg.get("currency", "KRW")
+        totals[currency] += TX_SIGN[tx_type] * amount
+        prepared.append((uuid.UUID(str(leg["account_id"])), tx_type, amount, currency))
+
+    unbalanced = {c: t for c, t in totals.items() if t != 0}
+    if unbalanced:
+        raise ValueError(f"journal legs do not balance: {unbalanced}")
+
+    accounts = _lock_accounts({account_id for account_id, *_ in prepared})
+    for account_id, _, _, currency in prepared:
+        acc = accounts.get(account_id)
+        if acc is None:
+            raise Account.DoesNotExist(f"account not found: {account_id}")
+        _ensure_currency(acc, currency)
+        if acc.status != "ACTIVE":
+            raise ValueError(f"account status not ACTIVE: {acc.status}")
 
     transfer_id = uuid.uuid4()
+    occurred_at = timezone.now()
+    balances = {pk: acc.balance for pk, acc in accounts.items()}
+    rows = []
+    for leg, (account_id, tx_type, amount, currency) in zip(legs, prepared):
+        balance = _q(balances[account_id] + TX_SIGN[tx_type] * amount)
+        if balance < 0:
+            raise ValueError("insufficient funds")
+        balances[account_id] = balance
+        rows.append(
+            TH(
+                account=accounts[account_id],
+                tx_type=tx_type,
+                amount=amount,
+                running_balance=balance,
+                currency=currency,
+                description=leg.get("description", description),
+                occurred_at=occurred_at,
+                transfer_id=transfer_id,
+                counterparty_id=leg.get("counterparty_id"),
+                metadata=leg.get("metadata") or {},
+            )
+        )
 
-    # 출금(OUT)
-    from_new_bal = _q(from_acc.balance - amount)
-    out_tx = TH.objects.create(
-        account=from_acc,
-        tx_type=TH.TxType.TRANSFER_OUT,
-        amount=amount,
-        running_balance=from_new_bal,
-        currency=currency,
-        description=description,
-        occurred_at=timezone.now(),
-        transfer_id=transfer_id,
-        counterparty=to_acc,
-        metadata={"side": "out"},
-    )
+    TH.objects.bulk_create(rows)
+    _apply_balances(balances)
+    bump_rollups(rollup_rows(rows))
+    return rows
 
-    # 입금(IN)
-    to_new_bal = _q(to_acc.balance + amount)
-    in_tx = TH.objects.create(
-        account=to_acc,
-        tx_type=TH.TxType.TRANSFER_IN,
-        amount=amount,
-        running_balance=to_new_bal,
-        currency=currency,
+
+@transaction.atomic
+def transfer(from_account_id, to_account_id, amount, currency="KRW", description=""):
+    if from_account_id == to_account_id:
+        raise ValueError("cannot transfer to the same account")
+
+    amount = _q(amount)
+    if amount <= 0:
+        raise ValueError("amount must be > 0")
+
+    out_tx, in_tx = post_journal(
+        [
+            {
+                "account_id": from_account_id,
+                "tx_type": TH.TxType.TRANSFER_OUT,
+                "amount": amount,
+                "currency": currency,
+                "counterparty_id": to_account_id,
+                "metadata": {"side": "out"},
+            },
+            {
+                "account_id": to_account_id,
+                "tx_type": TH.TxType.TRANSFER_IN,
+                "amount": amount,
+                "currency": currency,
+                "counterparty_id": from_account_id,
+                "metadata": {"side": "in"},
+            },
+        ],
         description=description,
-        occurred_at=out_tx.occurred_at,
-        transfer_id=transfer_id,
-        counterparty=from_acc,
-        metadata={"side": "in"},
     )
+    return out_tx, in_tx
 
-    # 두 계좌 잔액/버전 갱신
-    Account.objects.filter(pk=from_acc.pk).update(
-        balance=from_new_bal, version=F("version") + 1
-    )
-    Account.objects.filter(pk=to_acc.pk).update(
-        balance=to_new_bal, version=F("version") + 1
-    )
 
-    return out_tx, in_tx
+def _result(status, tx=None, error=None):
+    return {"status": status, "transaction": tx, "error": error}
+
+
+@transaction.atomic
+def post_batch(postings):
+    """
+    대량 입출금 일괄 처리 (급여/카드정산 파일 등)
+    - postings: dict 목록
+      {account_id, tx_type, amount, currency, description, idempotency_key, metadata}
+    - 계좌별로 묶어 계좌당 1회만 잠금 → 메모리에서 running_balance 계산
+    - TransactionHistory 는 bulk_create 한 번, 잔액/버전은 UPDATE 한 문장, 롤업은 UPSERT 한 문장
+    - 반환: 입력 순서와 같은 결과 목록
+      {"status": posted|duplicate|rejected, "transaction": TH|None, "error": str|None}
+    """
+    postings = list(postings)
+    results = [None] * len(postings)
+    by_account = defaultdict(list)
+
+    # 1) 입력 검증 + 계좌별 그룹핑 (DB 조회 없음)
+    for idx, p in enumerate(postings):
+        tx_type = p.get("tx_type", TH.TxType.DEPOSIT)
+        if tx_type not in TX_SIGN or tx_type in (
+            TH.TxType.TRANSFER_IN,
+            TH.TxType.TRANSFER_OUT,
+        ):
+            results[idx] = _result(REJECTED, error=f"unsupported tx_type: {tx_type}")
+            continue
+        try:
+            account_id = uuid.UUID(str(p["account_id"]))
+            amount = _q(p["amount"])
+        except (KeyError, ValueError, TypeError, InvalidOperation):
+            results[idx] = _result(REJECTED, error="invalid account_id or amount")
+            continue
+        if amount <= 0:
+            results[idx] = _result(REJECTED, error="amount must be > 0")
+            continue
+        by_account[account_id].append((idx, p, tx_type, amount))
+
+    if not by_account:
+        return results
+
+    # 2) 교착 방지: 관련 계좌 전체를 pk 순서로 한 번에 잠금
+    accounts = _lock_accounts(by_account.keys())
+
+    # 3) 멱등성 키 일괄 조회 (쿼리 1회)
+    keys = {
+        p["idempotency_key"]
+        for items in by_account.values()
+        for _, p, _, _ in items
+        if p.get("idempotency_key")
+    }
+    existing = {}
+    if keys:
+        for tx in TH.objects.filter(
+            account_id__in=accounts.keys(), idempotency_key__in=keys
+        ):
+            existing[(tx.account_id, tx.idempotency_key)] = tx
+
+    # 4) 계좌별로 메모리에서 잔액 계산
+    new_rows = []
+    new_balances = {}
+    for account_id, items in by_account.items():
+        acc = accounts.get(account_id)
+        balance = acc.balance if acc else None
+        for idx, p, tx_type, amount in items:
+            if acc is None:
+                results[idx] = _result(REJECTED, error="account not found")
+                continue
+
+            currency = p.get("currency", "KRW")
+            try:
+                _ensure_currency(acc, currency)
+            except ValueError as e:
+                results[idx] = _result(REJECTED, error=str(e))
+                continue
+
+            key = p.get("idempotency_key")
+            if key and (acc.pk, key) in existing:
+                results[idx] = _result(DUPLICATE, existing[(acc.pk, key)])
+                continue
+
+            sign = TX_SIGN[tx_type]
+            if sign < 0:
+                if acc.status != "ACTIVE":
+                    results[idx] = _result(
+                        REJECTED, error=f"account status not ACTIVE: {acc.status}"
+                    )
+                    continue
+                if balance < amount:
+                    results[idx] = _result(REJECTED, error="insufficient funds")
+                    continue
+
+            balance = _q(balance + sign * amount)
+            tx = TH(
+                account=acc,
+                tx_type=tx_type,
+                amount=amount,
+                running_balance=balance,
+                currency=currency,
+                description=p.get("description", ""),
+                occurred_at=timezone.now(),
+                idempotency_key=key,
+                metadata=p.get("metadata") or {},
+            )
+            new_rows.append(tx)
+            new_balances[acc.pk] = balance
+            results[idx] = _result(POSTED, tx)
+            if key:
+                # 같은 배치 안에서 중복된 키도 duplicate 처리
+                existing[(acc.pk, key)] = tx
+
+    # 5) 거래내역 일괄 INSERT + 잔액/버전 갱신 (UPDATE 한 문장)
+    TH.objects.bulk_create(new_rows, batch_size=1000)
+    _apply_balances(new_balances)
+    bump_rollups(rollup_rows(new_rows))
+
+    return results
@@ -0,0 +1,28 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .models import Account
+from .summary import invalidate_account_summaries
+from .versions import bump_ledger_versions
+
+# 거래 반영(잔액/일별 롤업 갱신)이 커밋된 뒤 발생
+# - changes: {owner_id: {변경된 일자(TIME_ZONE 기준), ...}}
+#   None 이면 전체 사용자 (rebuild_rollups 등)
+# - 분석 결과/계좌 요약 캐시 무효화 등에 사용
+ledger_changed = Signal()
+
+
+@receiver(ledger_changed)
+def bump_versions_on_ledger_change(sender, changes, **kwargs):
+    """
+    거래 반영 시 해당 (사용자, 월) 원장 버전을 올림
+    - 분석 결과 캐시와 계좌 요약 캐시(사용자 버전 합계)가 함께 무효화됨
+    """
+    bump_ledger_versions(changes)
+
+
+@receiver([post_save, post_delete], sender=Account)
+def invalidate_summary_on_account_change(sender, instance, **kwargs):
+    """계좌 생성/수정/삭제 시 소유자 계좌 요약 무효화 (커밋 후)"""
+    transaction.on_commit(lambda: invalidate_account_summaries([instance.owner_id]))
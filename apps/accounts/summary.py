@@ -0,0 +1,97 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Max, OuterRef, Subquery, Sum
+
+from .models import Account, LedgerVersion, TransactionHistory as TH
+from .versions import bump_versions
+
+CACHE_ALIAS = "accounts"
+
+
+def get_account_summary(user):
+    """
+    사용자 계좌 요약: 통화별 잔액 합계, 상태별 계좌 수, 마지막 거래 시각
+    - (통화, 상태) GROUP BY 쿼리 1회, 계좌별 마지막 거래는 상관 서브쿼리
+      → 계좌마다 (account, -occurred_at) 인덱스에서 1건만 읽음 (LATERAL 과 같은 실행 계획)
+    - 그룹 수(통화 × 상태)만큼의 행을 합쳐 통화별/상태별 합계 계산
+    """
+    last_activity = (
+        TH.objects.filter(account=OuterRef("pk"))
+        .order_by("-occurred_at")
+        .values("occurred_at")[:1]
+    )
+    grouped = (
+        Account.objects.filter(owner=user)
+        .values("currency", "status")
+        .annotate(
+            balance=Sum("balance"),
+            accounts=Count("pk"),
+            last_activity_at=Max(Subquery(last_activity)),
+        )
+        .order_by("currency", "status")
+    )
+
+    currencies, statuses = {}, {}
+    for row in grouped:
+        currency = currencies.setdefault(
+            row["currency"],
+            {
+                "currency": row["currency"],
+                "balance": 0,
+                "accounts": 0,
+                "last_activity_at": None,
+            },
+        )
+        currency["balance"] += row["balance"]
+        currency["accounts"] += row["accounts"]
+        if row["last_activity_at"] and (
+            currency["last_activity_at"] is None
+            or row["last_activity_at"] > currency["last_activity_at"]
+        ):
+            currency["last_activity_at"] = row["last_activity_at"]
+        statuses[row["status"]] = statuses.get(row["status"], 0) + row["accounts"]
+
+    activity = [
+        c["last_activity_at"] for c in currencies.values() if c["last_activity_at"]
+    ]
+    return {
+        "account_count": sum(statuses.values()),
+        "currencies": list(currencies.values()),
+        "statuses": statuses,
+        "last_activity_at": max(activity) if activity else None,
+    }
+
+
+# ----------------------------
+# 사용자별 캐시 (DB 원장 버전 키)
+# ----------------------------
+def _summary_version(user_id):
+    """
+    사용자 LedgerVersion 합계: 거래 반영(월별 행) 또는 계좌 변경(month=NULL 행)마다 1 이상 증가
+    - DB 에 있으므로 다른 프로세스(import_statement, reconcile_ledger --repair 등)의 변경도 바로 보임
+    """
+    return (
+        LedgerVersion.objects.filter(user_id=user_id).aggregate(v=Sum("version"))["v"]
+        or 0
+    )
+
+
+def get_cached_account_summary(user):
+    """
+    get_account_summary 캐시 조회
+    - 키: 사용자 + 요약 버전, 거래 반영/계좌 변경이 커밋되면 버전이 올라 다음 조회 때 다시 계산
+    - 버전을 요약 쿼리 전에 읽으므로 갱신 중 읽은 오래된 결과는 이전 버전 키에만 저장됨
+    - 유효기간: ACCOUNT_SUMMARY_CACHE_TIMEOUT
+    """
+    cache = caches[CACHE_ALIAS]
+    key = f"accounts:summary:{user.pk}:{_summary_version(user.pk)}"
+    data = cache.get(key)
+    if data is None:
+        data = get_account_summary(user)
+        cache.set(key, data, settings.ACCOUNT_SUMMARY_CACHE_TIMEOUT)
+    return data
+
+
+def invalidate_account_summaries(user_ids):
+    """계좌 변경/잔액 수정 시 사용자별 (user, NULL) 버전을 올려 캐시된 요약 무효화"""
+    bump_versions((user_id, None) for user_id in user_ids)
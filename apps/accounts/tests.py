@@ -1,8 +1,18 @@
 import pytest
 from decimal import Decimal
+from django.test import override_settings
 from django.urls import reverse
-from apps.accounts.models import Account
-from apps.accounts.services import deposit, withdraw, transfer
+from apps.accounts.models import Account, TransactionHistory
+from apps.accounts.services import (
+    deposit,
+    withdraw,
+    transfer,
+    post_batch,
+    post_journal,
+    get_available_balance,
+    materialize_pending,
+    set_posting_mode,
+)
 from apps.accounts.serializers import AccountSerializer
 from apps.users.models import CustomUser
 
@@ -53,6 +63,550 @@ class TestAccountUnit:
         assert self.account.balance == Decimal("100.0")
         assert account2.balance == Decimal("100.0")
 
+    @pytest.mark.parametrize("insert_first", [True, False])
+    def test_idempotent_replay(self, insert_first):
+        with override_settings(ACCOUNTS_IDEMPOTENCY_INSERT_FIRST=insert_first):
+            tx1 = deposit(self.account.id, Decimal("100"), idempotency_key="K1")
+            tx2 = deposit(self.account.id, Decimal("100"), idempotency_key="K1")
+            wd = withdraw(self.account.id, Decimal("30"), idempotency_key="K2")
+            with pytest.raises(ValueError, match="insufficient funds"):
+                withdraw(self.account.id, Decimal("500"), idempotency_key="K3")
+            with pytest.raises(ValueError, match="Currency mismatch"):
+                deposit(
+                    self.account.id, Decimal("1"), currency="USD", idempotency_key="K4"
+                )
+
+        assert tx1.pk == tx2.pk
+        assert wd.running_balance == Decimal("70.00")
+        self.account.refresh_from_db()
+        assert self.account.balance == Decimal("70.00")
+        assert self.account.version == 2
+        assert TransactionHistory.objects.filter(account=self.account).count() == 2
+
+    def test_post_journal(self, django_assert_max_num_queries):
+        merchant = Account.objects.create(
+            owner=self.owner, name="가맹점", number="2222", currency="KRW"
+        )
+        fee = Account.objects.create(
+            owner=self.owner, name="수수료", number="3333", currency="KRW"
+        )
+        deposit(self.account.id, Decimal("1000"))
+
+        legs = [
+            {"account_id": self.account.id, "tx_type": "TRANSFER_OUT", "amount": "500"},
+            {"account_id": merchant.id, "tx_type": "TRANSFER_IN", "amount": "500"},
+            {"account_id": merchant.id, "tx_type": "FEE", "amount": "10"},
+            {"account_id": fee.id, "tx_type": "TRANSFER_IN", "amount": "20"},
+            {"account_id": self.account.id, "tx_type": "FEE", "amount": "10"},
+        ]
+        # 잠금 1 + bulk INSERT 1 + 잔액 UPDATE 1 + 롤업 UPSERT 1 (+ savepoint)
+        with django_assert_max_num_queries(6):
+            rows = post_journal(legs)
+
+        assert len({tx.transfer_id for tx in rows}) == 1
+        assert [tx.running_balance for tx in rows] == [
+            Decimal("500.00"),
+            Decimal("500.00"),
+            Decimal("490.00"),
+            Decimal("20.00"),
+            Decimal("490.00"),
+        ]
+        for acc, expected in ((self.account, "490"), (merchant, "490"), (fee, "20")):
+            acc.refresh_from_db()
+            assert acc.balance == Decimal(expected)
+
+        with pytest.raises(ValueError, match="do not balance"):
+            post_journal(legs[:3])
+        with pytest.raises(ValueError, match="insufficient funds"):
+            post_journal(
+                [
+                    {"account_id": fee.id, "tx_type": "WITHDRAW", "amount": "50"},
+                    {"account_id": merchant.id, "tx_type": "DEPOSIT", "amount": "50"},
+                ]
+            )
+
+    def test_append_only_account(self):
+        self.account.posting_mode = Account.PostingMode.APPEND_ONLY
+        self.account.save()
+
+        d1 = deposit(self.account.id, Decimal("100"))
+        d2 = deposit(self.account.id, Decimal("50"), idempotency_key="HOT1")
+        assert deposit(self.account.id, Decimal("50"), idempotency_key="HOT1") == d2
+        assert d1.running_balance is None
+
+        # 입금은 잠금 없이 추가만 → 잔액은 아직 그대로, 가용 잔액엔 포함
+        self.account.refresh_from_db()
+        assert self.account.balance == Decimal("0.00")
+        assert get_available_balance(self.account.id) == Decimal("150.00")
+
+        # 출금은 대기 중 입금을 먼저 반영한 잔액으로 판단
+        wd = withdraw(self.account.id, Decimal("120"))
+        assert wd.running_balance == Decimal("30.00")
+        d1.refresh_from_db()
+        assert d1.running_balance == Decimal("100.00")
+
+        deposit(self.account.id, Decimal("5"))
+        assert materialize_pending(self.account.id) == 1
+        assert materialize_pending(self.account.id) == 0
+        self.account.refresh_from_db()
+        assert self.account.balance == Decimal("35.00")
+
+    def test_sharded_account(self):
+        set_posting_mode(self.account.id, Account.PostingMode.SHARDED, bucket_count=4)
+        for _ in range(10):
+            deposit(self.account.id, Decimal("10"))
+        assert self.account.balance_buckets.count() == 4
+
+        self.account.refresh_from_db()
+        assert self.account.balance == Decimal("0.00")
+        assert get_available_balance(self.account.id) == Decimal("100.00")
+
+        assert materialize_pending(self.account.id) == 10
+        self.account.refresh_from_db()
+        assert self.account.balance == Decimal("100.00")
+        assert get_available_balance(self.account.id) == Decimal("100.00")
+        assert not self.account.balance_buckets.exclude(balance=0).exists()
+
+        wd = withdraw(self.account.id, Decimal("40"))
+        assert wd.running_balance == Decimal("60.00")
+
+    @pytest.mark.parametrize("mode", ["pessimistic", "optimistic"])
+    def test_locking_mode(self, mode, django_assert_max_num_queries):
+        with override_settings(ACCOUNTS_LOCKING_MODE=mode):
+            tx = deposit(self.account.id, Decimal("100"))
+            assert tx.running_balance == Decimal("100.00")
+
+            # 낙관적 락: version 이 다르면 반영하지 않음
+            with pytest.raises(ValueError, match="version conflict"):
+                withdraw(self.account.id, Decimal("10"), expected_version=0)
+            with pytest.raises(ValueError, match="insufficient funds"):
+                withdraw(self.account.id, Decimal("101"))
+
+            with django_assert_max_num_queries(3 if mode == "optimistic" else 6) as ctx:
+                wd = withdraw(self.account.id, Decimal("40"), expected_version=1)
+            if mode == "optimistic":
+                # 가드된 UPDATE + INSERT + 롤업 UPSERT 한 문장
+                assert sum("UPDATE" in q["sql"] for q in ctx.captured_queries) == 1
+
+        assert wd.running_balance == Decimal("60.00")
+        self.account.refresh_from_db()
+        assert self.account.balance == Decimal("60.00")
+        assert self.account.version == 2
+
+    def test_post_batch(self, django_assert_max_num_queries):
+        deposit(self.account.id, Decimal("100"), idempotency_key="PAY-0")
+        postings = [
+            {"account_id": self.account.id, "amount": "50", "idempotency_key": "PAY-1"},
+            {"account_id": self.account.id, "amount": "30", "tx_type": "WITHDRAW"},
+            {"account_id": self.account.id, "amount": "999", "tx_type": "WITHDRAW"},
+            {"account_id": self.account.id, "amount": "10", "idempotency_key": "PAY-0"},
+            {"account_id": self.account.id, "amount": "10", "idempotency_key": "PAY-1"},
+            {"account_id": self.account.id, "amount": "-5"},
+        ]
+        # 잠금 1 + 멱등성 조회 1 + bulk INSERT 1 + 잔액 UPDATE 1 + 롤업 UPSERT 1 (+ savepoint)
+        with django_assert_max_num_queries(7):
+            results = post_batch(postings)
+
+        assert [r["status"] for r in results] == [
+            "posted",
+            "posted",
+            "rejected",
+            "duplicate",
+            "duplicate",
+            "rejected",
+        ]
+        assert results[1]["transaction"].running_balance == Decimal("120.00")
+        assert results[4]["transaction"] == results[0]["transaction"]
+        self.account.refresh_from_db()
+        assert self.account.balance == Decimal("120.00")
+        assert self.account.version == 2
+        assert TransactionHistory.objects.filter(account=self.account).count() == 3
+
+    def test_daily_rollups(self):
+        from apps.accounts.models import DailyAccountRollup
+        from apps.accounts.rollups import rebuild_rollups
+
+        other = Account.objects.create(owner=self.owner, name="b", number="5678")
+        deposit(self.account.id, Decimal("100"))
+        withdraw(self.account.id, Decimal("30"))
+        transfer(self.account.id, other.id, Decimal("20"))
+        post_batch([{"account_id": other.id, "amount": "5", "tx_type": "FEE"}])
+        with override_settings(ACCOUNTS_LOCKING_MODE="optimistic"):
+            deposit(self.account.id, Decimal("7"))
+            deposit(self.account.id, Decimal("8"), idempotency_key="R1")
+        set_posting_mode(other.id, Account.PostingMode.APPEND_ONLY)
+        deposit(other.id, Decimal("50"))
+
+        def snapshot():
+            return sorted(
+                DailyAccountRollup.objects.values_list(
+                    "account_id", "date", "tx_type", "total_amount", "transaction_count"
+                )
+            )
+
+        # 대기 중 거래는 compactor 가 반영할 때 집계
+        assert not DailyAccountRollup.objects.filter(
+            account=other, tx_type="DEPOSIT"
+        ).exists()
+        materialize_pending(other.id)
+
+        incremental = snapshot()
+        rebuild_rollups()
+        assert snapshot() == incremental
+        deposits = DailyAccountRollup.objects.get(
+            account=self.account, tx_type="DEPOSIT"
+        )
+        assert deposits.total_amount == Decimal("115.00")
+        assert deposits.transaction_count == 3
+
+    def test_import_statement(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from rest_framework.test import APIClient
+
+        deposit(self.account.id, Decimal("100"))
+        csv_body = (
+            "occurred_at,amount,description,external_ref\n"
+            "2025-01-03,-30,카드,\n"
+            "2025-01-01T09:00:00,50,급여,EXT-1\n"
+            '2025-01-02,"1,000",이체,\n'
+            "2025-01-03,-30,카드,\n"
+        ).encode()
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        url = f"/api/accounts/accounts/{self.account.id}/import-statement/"
+
+        resp = client.post(
+            url, {"file": SimpleUploadedFile("s.csv", csv_body)}, format="multipart"
+        )
+        assert resp.status_code == 201, resp.data
+        assert resp.data["imported"] == 4 and resp.data["duplicates"] == 0
+        rows = TransactionHistory.objects.filter(
+            account=self.account, occurred_at__year=2025
+        ).order_by("occurred_at", "running_balance")
+        assert [r.running_balance for r in rows] == [
+            Decimal("150.00"),
+            Decimal("1150.00"),
+            Decimal("1090.00"),
+            Decimal("1120.00"),
+        ]
+        assert rows[0].external_ref == "EXT-1"
+
+        # 같은 파일 재업로드: 동일 내용 2건(카드 -30)도 각각 한 번만 반영
+        resp = client.post(
+            url, {"file": SimpleUploadedFile("s.csv", csv_body)}, format="multipart"
+        )
+        assert resp.data["imported"] == 0 and resp.data["duplicates"] == 4
+
+        ofx = SimpleUploadedFile(
+            "s.ofx",
+            b"OFXHEADER:100\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><CURDEF>KRW\n"
+            b"<STMTTRN>\n<TRNTYPE>SRVCHG\n<DTPOSTED>20250105120000[+9:KST]\n"
+            b"<TRNAMT>-20.00\n<FITID>F1\n<NAME>fee\n</STMTTRN>\n"
+            b"<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20250104<TRNAMT>5<FITID>F2</STMTTRN>\n"
+            b"</STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n",
+        )
+        resp = client.post(url, {"file": ofx}, format="multipart")
+        assert resp.status_code == 201, resp.data
+        assert resp.data["imported"] == 2
+        assert resp.data["balance"] == Decimal("1075.00")
+        fee = TransactionHistory.objects.get(account=self.account, idempotency_key="F1")
+        assert fee.tx_type == "FEE"
+        self.account.refresh_from_db()
+        assert self.account.balance == Decimal("1075.00")
+
+        bad = SimpleUploadedFile("s.csv", b"occurred_at,amount\n2025-01-01,abc\n")
+        resp = client.post(url, {"file": bad}, format="multipart")
+        assert resp.status_code == 400
+        assert "line 2" in resp.data["detail"]
+
+        # 키 컬럼이 모델 max_length(64) 를 넘으면 적재 전에 줄 번호와 함께 400
+        long_ref = "x" * 65
+        too_long = SimpleUploadedFile(
+            "s.csv",
+            f"occurred_at,amount,external_ref\n2025-01-01,1,ok\n2025-01-02,1,{long_ref}\n".encode(),
+        )
+        resp = client.post(url, {"file": too_long}, format="multipart")
+        assert resp.status_code == 400
+        assert resp.data["detail"] == "line 3: external_ref longer than 64 characters"
+        assert not TransactionHistory.objects.filter(external_ref="ok").exists()
+
+    def test_import_same_date_rows(self):
+        from datetime import date, datetime, timezone as dt_timezone
+        from apps.accounts.balances import balances_as_of, daily_balances
+        from apps.accounts.importers import import_statement
+        from apps.accounts.reconcile import reconcile_range
+
+        # 같은 일자 40건을 여러 chunk 로 가져와도 반영 순서(seq)가 파일 순서 그대로
+        lines = ["occurred_at,amount,description\n"] + [
+            f"2025-01-03,{-i if i % 3 == 0 else i * 10},row{i}\n" for i in range(1, 41)
+        ]
+        result = import_statement(self.account.id, lines, chunk_size=7)
+        assert result["imported"] == 40
+        self.account.refresh_from_db()
+        assert self.account.balance == result["balance"] == Decimal("5197.00")
+
+        at = datetime(2025, 1, 4, tzinfo=dt_timezone.utc)
+        assert balances_as_of([self.account.id], at)[self.account.id]["balance"] == (
+            self.account.balance
+        )
+        series = daily_balances([self.account.id], date(2025, 1, 3), date(2025, 1, 3))
+        assert series[self.account.id] == [(date(2025, 1, 3), self.account.balance)]
+        assert reconcile_range(None, None) == (1, 40, [])
+
+    def test_account_list_summary(self, django_assert_num_queries):
+        from datetime import datetime, timezone as dt_timezone
+        from apps.accounts.services import post_transaction
+        from rest_framework.test import APIClient
+
+        other = Account.objects.create(owner=self.owner, name="빈계좌", number="5678")
+        for day in range(1, 8):
+            post_transaction(
+                self.account.id,
+                "DEPOSIT",
+                Decimal("10"),
+                occurred_at=datetime(2025, 1, day, tzinfo=dt_timezone.utc),
+            )
+        transfer(self.account.id, other.id, Decimal("5"))
+        client = APIClient()
+        client.force_authenticate(self.owner)
+
+        # 요약은 계좌 조회 쿼리에 포함 (COUNT 1 + 목록 1), 거래내역은 읽지 않음
+        with django_assert_num_queries(2):
+            resp = client.get("/api/accounts/accounts/")
+        rows = {row["id"]: row for row in resp.data["results"]}
+        mine = rows[str(self.account.id)]
+        assert mine["transaction_count"] == 8
+        assert "recent_transactions" not in mine
+        assert rows[str(other.id)]["transaction_count"] == 1
+
+        # 최근 거래는 계좌당 N건만 쿼리 1회로
+        with django_assert_num_queries(3):
+            resp = client.get("/api/accounts/accounts/?include=recent_transactions")
+        rows = {row["id"]: row for row in resp.data["results"]}
+        recent = rows[str(self.account.id)]["recent_transactions"]
+        assert len(recent) == 5
+        assert recent[0]["tx_type"] == "TRANSFER_OUT"
+        assert [r["occurred_at"][:10] for r in recent[1:]] == [
+            "2025-01-07",
+            "2025-01-06",
+            "2025-01-05",
+            "2025-01-04",
+        ]
+        assert len(rows[str(other.id)]["recent_transactions"]) == 1
+
+        resp = client.get(f"/api/accounts/accounts/{self.account.id}/")
+        assert resp.data["last_activity_at"] == recent[0]["occurred_at"]
+        assert client.get("/api/accounts/accounts/?include=all").status_code == 400
+
+    def test_account_summary(
+        self, django_assert_num_queries, django_capture_on_commit_callbacks
+    ):
+        from django.core.cache import caches
+        from rest_framework.test import APIClient
+
+        caches["accounts"].clear()
+        with django_capture_on_commit_callbacks(execute=True):
+            usd = Account.objects.create(
+                owner=self.owner, name="달러", number="USD-1", currency="USD"
+            )
+            Account.objects.create(
+                owner=self.owner, name="해지", number="OLD-1", status="CLOSED"
+            )
+            deposit(self.account.id, Decimal("100"))
+            deposit(usd.id, Decimal("7"), currency="USD")
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        url = "/api/accounts/accounts/summary/"
+
+        # 버전 조회 + 요약 쿼리
+        with django_assert_num_queries(2):
+            resp = client.get(url)
+        assert resp.status_code == 200
+        assert resp.data["account_count"] == 3
+        assert resp.data["statuses"] == {"ACTIVE": 2, "CLOSED": 1}
+        krw, usd_total = resp.data["currencies"]
+        assert (krw["currency"], krw["balance"], krw["accounts"]) == (
+            "KRW",
+            Decimal("100.00"),
+            2,
+        )
+        assert (usd_total["currency"], usd_total["balance"]) == ("USD", Decimal("7.00"))
+        last = TransactionHistory.objects.latest("occurred_at").occurred_at
+        assert resp.data["last_activity_at"] == last
+
+        # 캐시 적중: 버전 조회만
+        with django_assert_num_queries(1):
+            client.get(url)
+
+        # 거래 반영이 커밋되면 다시 계산
+        with django_capture_on_commit_callbacks(execute=True):
+            withdraw(self.account.id, Decimal("30"))
+        resp = client.get(url)
+        assert resp.data["currencies"][0]["balance"] == Decimal("70.00")
+
+        # 다른 프로세스의 잔액 수정(reconcile_ledger --repair 등)도 DB 버전으로 전달
+        from apps.accounts.summary import invalidate_account_summaries
+
+        Account.objects.filter(pk=self.account.pk).update(balance=Decimal("1.00"))
+        invalidate_account_summaries([self.owner.pk])
+        resp = client.get(url)
+        assert resp.data["currencies"][0]["balance"] == Decimal("1.00")
+
+    def test_balances_as_of(self, django_assert_num_queries):
+        from datetime import date, datetime, timezone as dt_timezone
+        from apps.accounts.balances import balances_as_of, daily_balances
+        from apps.accounts.services import post_transaction
+        from rest_framework.test import APIClient
+
+        other = Account.objects.create(owner=self.owner, name="빈계좌", number="5678")
+        for day, tx_type, amount in (
+            (1, "DEPOSIT", "100"),
+            (3, "WITHDRAW", "30"),
+            (3, "DEPOSIT", "5"),
+            (6, "DEPOSIT", "10"),
+        ):
+            post_transaction(
+                self.account.id,
+                tx_type,
+                Decimal(amount),
+                occurred_at=datetime(2025, 1, day, 3, tzinfo=dt_timezone.utc),
+            )
+        ids = [self.account.id, other.id]
+
+        with django_assert_num_queries(1):
+            balances = balances_as_of(ids, datetime(2025, 1, 4, tzinfo=dt_timezone.utc))
+        assert balances[self.account.id]["balance"] == Decimal("75.00")
+        assert balances[other.id] == {"balance": Decimal("0.00"), "occurred_at": None}
+
+        with django_assert_num_queries(2):
+            series = daily_balances(ids, date(2025, 1, 2), date(2025, 1, 6))
+        assert [b for _, b in series[self.account.id]] == [
+            Decimal("100.00"),
+            Decimal("75.00"),
+            Decimal("75.00"),
+            Decimal("75.00"),
+            Decimal("85.00"),
+        ]
+        assert series[other.id][0] == (date(2025, 1, 2), Decimal("0.00"))
+
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        url = "/api/accounts/accounts/balances/"
+        resp = client.get(
+            url, {"accounts": f"{self.account.id}", "as_of": "2025-01-02T00:00:00Z"}
+        )
+        assert resp.status_code == 200
+        assert resp.data["balances"][0]["balance"] == Decimal("100.00")
+        resp = client.get(
+            url,
+            {
+                "accounts": f"{self.account.id},{other.id}",
+                "start_date": "2025-01-05",
+                "end_date": "2025-01-06",
+            },
+        )
+        assert [d["balance"] for d in resp.data["balances"][0]["daily"]] == [
+            Decimal("75.00"),
+            Decimal("85.00"),
+        ]
+        # 다른 사용자 계좌는 조회 불가
+        stranger = CustomUser.objects.create_user(
+            email="u9@test.com", password="pw", is_active=True
+        )
+        client.force_authenticate(stranger)
+        assert client.get(url, {"accounts": str(self.account.id)}).status_code == 400
+
+    def test_reconcile_ledger(self):
+        from unittest import mock
+        from django.core.management import call_command
+
+        other = Account.objects.create(owner=self.owner, name="계좌2", number="5678")
+        deposit(self.account.id, Decimal("100"))
+        withdraw(self.account.id, Decimal("30"))
+        transfer(self.account.id, other.id, Decimal("20"))
+        Account.objects.filter(pk=other.pk).update(balance=Decimal("999.00"))
+
+        def run(*args):
+            out = mock.Mock()
+            call_command("reconcile_ledger", "--chunk-size", "1", *args, stdout=out)
+            return [call.args[0] for call in out.write.call_args_list]
+
+        lines = run()
+        assert len(lines) == 2
+        assert str(other.pk) in lines[0] and "거래합계=20.00" in lines[0]
+        assert "계좌 2개, 거래 4건 대조, 불일치 1개" in lines[1]
+
+        assert "잔액 1개 수정" in run("--repair")[-1]
+        other.refresh_from_db()
+        assert other.balance == Decimal("20.00")
+        assert "불일치 0개" in run()[-1]
+
+    def test_partition_transactions(self):
+        from django.db import connection
+        from django.utils import timezone
+        from apps.accounts import partitions
+        from apps.accounts.services import post_transaction
+
+        now = timezone.now()
+        current = partitions.month_start(partitions.local_date(now))
+        old = partitions.month_bounds(partitions.add_months(current, -2))[0]
+        future = partitions.month_bounds(partitions.add_months(current, 5))[0]
+        deposit(self.account.id, Decimal("100"), idempotency_key="P1")
+        post_transaction(self.account.id, "DEPOSIT", Decimal("50"), occurred_at=old)
+
+        # 테스트 트랜잭션 안에서 변환 → 테스트 종료 시 DDL 도 롤백
+        try:
+            assert partitions.convert_to_partitioned(months_ahead=1) == 4
+            partitions.history_partitioned.cache_clear()
+            assert partitions.history_partitioned()
+            assert TransactionHistory.objects.filter(account=self.account).count() == 2
+
+            # 멱등성 키 재요청은 기존 거래 반환, 새 거래는 정상 반영
+            replay = deposit(self.account.id, Decimal("100"), idempotency_key="P1")
+            assert replay.amount == Decimal("100.00")
+            deposit(self.account.id, Decimal("10"), idempotency_key="P2")
+            self.account.refresh_from_db()
+            assert self.account.balance == Decimal("160.00")
+
+            # external_ref 는 파티션 안에서만 유일 → 다른 달/다른 계좌로 가져와도 중복으로 제외
+            from apps.accounts.importers import import_statement
+
+            header = "occurred_at,amount,external_ref\n"
+            first = import_statement(
+                self.account.id, [header, f"{old.date()},5,EXT-P\n"]
+            )
+            assert first["imported"] == 1
+            second_account = Account.objects.create(
+                owner=self.owner, name="두번째", number="P-2"
+            )
+            second = import_statement(
+                second_account.id, [header, f"{now.date()},5,EXT-P\n"]
+            )
+            assert (second["imported"], second["duplicates"]) == (0, 1)
+
+            # 범위 밖 거래는 기본 파티션 → ensure 가 해당 월 파티션으로 옮김
+            post_transaction(
+                self.account.id, "DEPOSIT", Decimal("1"), occurred_at=future
+            )
+            name = partitions.partition_name(partitions.add_months(current, 5))
+            assert name in partitions.ensure_partitions(months_ahead=5)
+            assert partitions.ensure_partitions(months_ahead=5) == []
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT count(*) FROM {name}")
+                assert cursor.fetchone()[0] == 1
+                cursor.execute(f"SELECT count(*) FROM {partitions.default_partition()}")
+                assert cursor.fetchone()[0] == 0
+
+            # 월 범위 조회는 해당 월 파티션만 읽음
+            lower, upper = partitions.month_bounds(current)
+            plan = TransactionHistory.objects.filter(
+                account=self.account, occurred_at__gte=lower, occurred_at__lt=upper
+            ).explain()
+            assert partitions.partition_name(current) in plan
+            assert name not in plan and partitions.default_partition() not in plan
+        finally:
+            partitions.history_partitioned.cache_clear()
+
     def test_account_serialization(self):
         serializer = AccountSerializer(self.account)
         data = serializer.data
@@ -0,0 +1,82 @@
+from datetime import date
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Q
+
+from .models import LedgerVersion
+
+# 전체 무효화용 키 (user, month 모두 NULL)
+GLOBAL = (None, None)
+
+
+def month_of(day):
+    return date(day.year, day.month, 1)
+
+
+def _sort_key(key):
+    # NULL 은 앞으로, 교착 방지를 위해 항상 같은 순서로 반영
+    user_id, month = key
+    return (user_id is not None, str(user_id), month is not None, month or date.min)
+
+
+def bump_versions(keys):
+    """
+    (user_id, month) 키의 버전을 1씩 올림, 없으면 1 로 생성
+    - PostgreSQL: INSERT ... ON CONFLICT DO UPDATE 한 문장 (NULLS NOT DISTINCT 유일 제약)
+    """
+    keys = sorted(set(keys), key=_sort_key)
+    if not keys:
+        return
+    if connection.vendor != "postgresql":
+        for user_id, month in keys:
+            # filter(필드=None) 은 IS NULL 로 변환됨
+            versions = LedgerVersion.objects.filter(user_id=user_id, month=month)
+            if not versions.update(version=F("version") + 1):
+                try:
+                    with transaction.atomic():
+                        LedgerVersion.objects.create(user_id=user_id, month=month)
+                except IntegrityError:
+                    versions.update(version=F("version") + 1)
+        return
+
+    table = LedgerVersion._meta.db_table
+    user_type = LedgerVersion._meta.get_field("user").db_type(connection)
+    values = ", ".join([f"(%s::{user_type}, %s::date)"] * len(keys))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} (user_id, month, version)
+            SELECT v.user_id, v.month, 1 FROM (VALUES {values}) AS v (user_id, month)
+            ON CONFLICT (user_id, month) DO UPDATE
+               SET version = {table}.version + 1
+            """,
+            [p for key in keys for p in key],
+        )
+
+
+def bump_ledger_versions(changes):
+    """
+    거래가 반영된 (사용자, 월) 의 버전을 올림
+    - changes: {owner_id: {일자, ...}}, None 이면 전체
+    """
+    if changes is None:
+        bump_versions([GLOBAL])
+        return
+    bump_versions(
+        (user_id, month_of(day)) for user_id, days in changes.items() for day in days
+    )
+
+
+def get_versions(keys):
+    """키 목록 → 같은 순서의 버전 목록 (쿼리 1회, 행이 없으면 0)"""
+    keys = list(keys)
+    condition = Q(pk__in=[])
+    for user_id, month in set(keys):
+        condition |= Q(user_id=user_id, month=month)
+    found = {
+        (user_id, month): version
+        for user_id, month, version in LedgerVersion.objects.filter(
+            condition
+        ).values_list("user_id", "month", "version")
+    }
+    return [found.get(key, 0) for key in keys]
@@ -1,7 +1,28 @@
-from rest_framework import viewsets
+import io
+
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
-from .models import Account
-from .serializers import AccountSerializer
+from rest_framework.response import Response
+from django.db.models import Count, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .balances import balances_as_of, daily_balances
+from .importers import import_statement
+from .models import Account, TransactionHistory
+from .summary import get_cached_account_summary
+from .serializers import (
+    AccountSerializer,
+    AccountWithRecentSerializer,
+    BalanceQuerySerializer,
+    StatementImportSerializer,
+)
+
+# ?include= 로 추가할 수 있는 항목
+INCLUDE_OPTIONS = ("recent_transactions",)
+RECENT_TRANSACTIONS_LIMIT = 5
 
 
 class AccountViewSet(viewsets.ModelViewSet):
@@ -9,18 +30,144 @@ class AccountViewSet(viewsets.ModelViewSet):
     사용자 계좌 API
     - GET /api/accounts/        : 본인 계좌 목록 조회
     - POST /api/accounts/       : 본인 계좌 생성
+    - GET /api/accounts/summary/: 통화별 잔액 합계/상태별 계좌 수/마지막 거래 시각
+    - GET /api/accounts/balances/: 여러 계좌의 특정 시각 잔액 / 일자별 마감 잔액
     - GET /api/accounts/<id>/   : 특정 계좌 조회
     - DELETE /api/accounts/<id>/: 계좌 삭제
+    - POST /api/accounts/<id>/import-statement/: 은행 거래내역(CSV/OFX) 가져오기
+    - 계좌별 transaction_count / last_activity_at 포함 (같은 쿼리의 서브쿼리로 계산)
+    - ?include=recent_transactions: 계좌별 최근 거래 RECENT_TRANSACTIONS_LIMIT 건 포함
     """
 
     serializer_class = AccountSerializer
     permission_classes = [IsAuthenticated]
 
+    def get_includes(self):
+        includes = {
+            value
+            for value in self.request.query_params.get("include", "").split(",")
+            if value
+        }
+        unknown = includes.difference(INCLUDE_OPTIONS)
+        if unknown:
+            raise ValidationError(
+                {"include": f"지원하지 않는 항목입니다: {', '.join(sorted(unknown))}"}
+            )
+        return includes
+
+    def get_serializer_class(self):
+        if self.action in ("list", "retrieve") and (
+            "recent_transactions" in self.get_includes()
+        ):
+            return AccountWithRecentSerializer
+        return super().get_serializer_class()
+
     def get_queryset(self):
-        return (
+        """
+        계좌 목록 + 거래 요약
+        - 거래내역 전체를 prefetch 하지 않음 (직렬화하지 않는 행을 모두 메모리에 올리게 됨)
+        - 건수/마지막 거래 시각은 계좌별 상관 서브쿼리 → (account, -occurred_at) 인덱스 사용,
+          GROUP BY 없이 계좌 조회 쿼리 1회로 계산
+        - 최근 거래는 슬라이스한 Prefetch → ROW_NUMBER() OVER (PARTITION BY account_id ...)
+          로 계좌당 N건만 조회
+        """
+        transactions = TransactionHistory.objects.filter(account=OuterRef("pk"))
+        queryset = (
             Account.objects.filter(owner=self.request.user)
             .select_related("owner")
-            .prefetch_related("transactions", "counter_transactions")
+            .order_by("created_at", "pk")
+            .annotate(
+                transaction_count=Coalesce(
+                    Subquery(
+                        transactions.order_by()
+                        .values("account")
+                        .annotate(count=Count("pk"))
+                        .values("count")
+                    ),
+                    0,
+                ),
+                last_activity_at=Subquery(
+                    transactions.order_by("-occurred_at").values("occurred_at")[:1]
+                ),
+            )
+        )
+        if self.action in ("list", "retrieve") and (
+            "recent_transactions" in self.get_includes()
+        ):
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "transactions",
+                    queryset=TransactionHistory.objects.order_by("-occurred_at", "-id")[
+                        :RECENT_TRANSACTIONS_LIMIT
+                    ],
+                    to_attr="recent_transactions",
+                )
+            )
+        return queryset
+
+    @action(detail=False, methods=["get"])
+    def summary(self, request):
+        """
+        계좌 요약 (GET /api/accounts/accounts/summary/)
+        - (통화, 상태) 그룹 쿼리 1회로 계산, 사용자별 캐시 (거래 반영/계좌 변경 시 무효화)
+        """
+        return Response(get_cached_account_summary(request.user))
+
+    @action(detail=False, methods=["get"])
+    def balances(self, request):
+        """
+        계좌별 과거 잔액 (GET /api/accounts/accounts/balances/?accounts=id1,id2)
+        - &as_of=시각 (생략하면 현재): 해당 시각 잔액
+        - &start_date=&end_date=: 일자별 마감 잔액
+        - 본인 계좌만 조회 가능, 관리자(is_staff)는 모든 계좌 (감사/고객 지원)
+        """
+        params = BalanceQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+
+        accounts = Account.objects.all()
+        if not request.user.is_staff:
+            accounts = accounts.filter(owner=request.user)
+        currencies = dict(
+            accounts.filter(pk__in=data["accounts"]).values_list("pk", "currency")
+        )
+        missing = [str(pk) for pk in data["accounts"] if pk not in currencies]
+        if missing:
+            raise ValidationError(
+                {"accounts": f"계좌를 찾을 수 없습니다: {', '.join(missing)}"}
+            )
+        account_ids = data["accounts"]
+
+        if "start_date" in data:
+            series = daily_balances(account_ids, data["start_date"], data["end_date"])
+            return Response(
+                {
+                    "start_date": data["start_date"],
+                    "end_date": data["end_date"],
+                    "balances": [
+                        {
+                            "account": pk,
+                            "currency": currencies[pk],
+                            "daily": [
+                                {"date": day, "balance": balance}
+                                for day, balance in series[pk]
+                            ],
+                        }
+                        for pk in account_ids
+                    ],
+                }
+            )
+
+        as_of = data.get("as_of") or timezone.now()
+        balances = balances_as_of(account_ids, as_of)
+        return Response(
+            {
+                "as_of": as_of,
+                "balances": [
+                    {"account": pk, "currency": currencies[pk], **balances[pk]}
+                    for pk in account_ids
+                ],
+            }
         )
 
     def perform_create(self, serializer):
@@ -28,3 +175,27 @@ class AccountViewSet(viewsets.ModelViewSet):
         계좌 생성 시, 로그인한 사용자를 자동으로 연결
         """
         serializer.save(owner=self.request.user)
+
+    @action(
+        detail=True,
+        methods=["post"],
+        url_path="import-statement",
+        parser_classes=[MultiPartParser],
+        serializer_class=StatementImportSerializer,
+    )
+    def import_statement(self, request, pk=None):
+        """
+        은행 거래내역 파일 업로드 → 계좌에 일괄 반영
+        - 업로드 파일을 한 줄씩 읽어 처리, 이미 가져온 거래는 중복으로 건너뜀
+        """
+        account = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        lines = io.TextIOWrapper(data["file"], encoding=data["encoding"], newline="")
+        try:
+            result = import_statement(account.pk, lines, data["file_format"])
+        except (ValueError, UnicodeDecodeError) as e:
+            raise ValidationError({"detail": str(e)})
+        return Response(result, status=status.HTTP_201_CREATED)
@@ -0,0 +1,84 @@
+import hashlib
+from datetime import date
+
+from apps.accounts.versions import GLOBAL, get_versions
+from django.conf import settings
+from django.core.cache import caches
+
+CACHE_ALIAS = "analysis"
+HIT_KEY = "analysis:stats:hits"
+MISS_KEY = "analysis:stats:misses"
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+# ----------------------------
+# 원장 버전 (사용자 × 월, DB 의 LedgerVersion)
+# ----------------------------
+def analysis_months(analysis):
+    """분석 기간에 걸친 월(1일) 목록"""
+    months = []
+    month = date(analysis.start_date.year, analysis.start_date.month, 1)
+    while month <= analysis.end_date:
+        months.append(month)
+        month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+    return months
+
+
+def result_key(analysis, kind="data", versions=None):
+    """
+    분석 id/수정 시각 + 분석 기간에 걸친 월별 원장 버전으로 결과 키 생성
+    - 버전은 DB 에서 읽으므로 다른 프로세스의 거래 반영도 바로 새 키가 됨 (쿼리 1회)
+    - versions: 이미 읽은 [전체, 월별...] 버전 (generate_analyses 처럼 묶음으로 읽은 경우)
+    """
+    if versions is None:
+        versions = get_versions(
+            [GLOBAL]
+            + [(analysis.user_id, month) for month in analysis_months(analysis)]
+        )
+    digest = hashlib.sha1(
+        "|".join(str(v) for v in versions).encode(), usedforsecurity=False
+    ).hexdigest()
+    return f"analysis:{kind}:{analysis.pk}:{analysis.updated_at.timestamp()}:{digest}"
+
+
+def cached_result(analysis, kind, compute):
+    """
+    분석 결과 캐시 조회, 없으면 compute(analysis) 결과 저장
+    - 유효기간/최대 항목 수: ANALYSIS_CACHE_TIMEOUT / ANALYSIS_CACHE_MAX_ENTRIES
+    """
+    cache = get_cache()
+    key = result_key(analysis, kind)
+    data = cache.get(key)
+    record(hit=data is not None)
+    if data is None:
+        data = compute(analysis)
+        cache.set(key, data, settings.ANALYSIS_CACHE_TIMEOUT)
+    return data
+
+
+# ----------------------------
+# 적중/실패 통계
+# ----------------------------
+def record(hit):
+    cache = get_cache()
+    key = HIT_KEY if hit else MISS_KEY
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def cache_stats():
+    cache = get_cache()
+    stats = cache.get_many([HIT_KEY, MISS_KEY])
+    hits, misses = stats.get(HIT_KEY, 0), stats.get(MISS_KEY, 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total, 4) if total else None,
+    }
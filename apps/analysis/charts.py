@@ -0,0 +1,75 @@
+import io
+
+from PIL import Image, ImageDraw, ImageFont
+
+WIDTH, HEIGHT = 800, 400
+MARGIN_LEFT, MARGIN_RIGHT, MARGIN_TOP, MARGIN_BOTTOM = 80, 20, 30, 50
+BACKGROUND = "white"
+AXIS = (120, 120, 120)
+TEXT = (40, 40, 40)
+# (키, 색상): CASHFLOW 는 수입/지출 두 막대, 그 외는 total_amount 한 막대
+SERIES = {
+    "CASHFLOW": (("income", (46, 160, 67)), ("expense", (218, 54, 51))),
+    "INCOME": (("total_amount", (46, 160, 67)),),
+    "EXPENSE": (("total_amount", (218, 54, 51)),),
+}
+MAX_LABELS = 12
+
+
+def _period_label(period, period_type):
+    if period_type == "YEARLY":
+        return f"{period:%Y}"
+    if period_type == "MONTHLY":
+        return f"{period:%Y-%m}"
+    return f"{period:%m-%d}"
+
+
+def render_chart(analysis, data):
+    """
+    분석 결과(period_data) → 기간별 막대 차트 PNG bytes
+    - Pillow 만 사용 (요청 스레드가 아닌 render_charts 워커에서 호출)
+    """
+    image = Image.new("RGB", (WIDTH, HEIGHT), BACKGROUND)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default()
+
+    series = SERIES[analysis.analysis_target]
+    periods = data["period_data"]
+    left, top = MARGIN_LEFT, MARGIN_TOP
+    right, bottom = WIDTH - MARGIN_RIGHT, HEIGHT - MARGIN_BOTTOM
+
+    # 기본 폰트에 한글이 없어 표시명 대신 코드값 사용
+    title = (
+        f"{analysis.analysis_target} {analysis.period_type} "
+        f"{analysis.start_date} ~ {analysis.end_date} ({data['currency']})"
+    )
+    draw.text((left, 8), title, fill=TEXT, font=font)
+    draw.line([(left, top), (left, bottom), (right, bottom)], fill=AXIS)
+
+    peak = max(
+        (max(p[key], 0) for p in periods for key, _ in series),
+        default=0,
+    )
+    draw.text((8, top), f"{peak:,.0f}", fill=TEXT, font=font)
+    draw.text((8, bottom - 10), "0", fill=TEXT, font=font)
+    if not periods or not peak:
+        draw.text((left + 10, top + 10), "no data", fill=TEXT, font=font)
+    else:
+        slot = (right - left) / len(periods)
+        bar = max(slot * 0.8 / len(series), 1)
+        step = -(-len(periods) // MAX_LABELS)  # 라벨이 겹치지 않게 일부만 표시
+        for i, p in enumerate(periods):
+            x = left + i * slot + slot * 0.1
+            for j, (key, color) in enumerate(series):
+                height = max(p[key], 0) / peak * (bottom - top)
+                x0 = x + j * bar
+                draw.rectangle(
+                    [x0, bottom - float(height), x0 + bar - 1, bottom], fill=color
+                )
+            if i % step == 0:
+                label = _period_label(p["period"], analysis.period_type)
+                draw.text((x, bottom + 6), label, fill=TEXT, font=font)
+
+    buf = io.BytesIO()
+    image.save(buf, format="PNG", optimize=True)
+    return buf.getvalue()
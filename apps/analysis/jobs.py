@@ -0,0 +1,116 @@
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .charts import render_chart
+from .models import Analysis, ChartRenderJob
+from .services import AnalysisService
+
+Status = ChartRenderJob.Status
+MAX_ATTEMPTS = 3
+# RUNNING 인 채로 이 시간이 지나면 워커가 죽은 것으로 보고 다시 가져감
+STALE_AFTER = timedelta(minutes=10)
+
+
+def enqueue_chart_renders(analysis_ids):
+    """
+    차트 렌더링 요청 (분석당 작업 1행 UPSERT, 렌더링은 render_charts 워커가 처리)
+    - 이미 대기 중이면 requested_at 만 갱신, 완료/실패한 작업은 다시 PENDING
+    """
+    analysis_ids = sorted(set(analysis_ids))
+    if not analysis_ids:
+        return 0
+    now = timezone.now()
+    ChartRenderJob.objects.bulk_create(
+        [
+            ChartRenderJob(
+                analysis_id=pk,
+                status=Status.PENDING,
+                requested_at=now,
+                attempts=0,
+                last_error="",
+                updated_at=now,
+            )
+            for pk in analysis_ids
+        ],
+        update_conflicts=True,
+        unique_fields=["analysis"],
+        update_fields=[
+            "status",
+            "requested_at",
+            "attempts",
+            "last_error",
+            "updated_at",
+        ],
+    )
+    return len(analysis_ids)
+
+
+def analyses_affected_by(changes):
+    """ledger_changed 의 변경 일자가 분석 기간에 걸치는 분석 id 목록 (None 이면 전체)"""
+    analyses = Analysis.objects.all()
+    if changes is not None:
+        window = Q(pk__in=[])
+        for user_id, dates in changes.items():
+            window |= Q(
+                user_id=user_id,
+                start_date__lte=max(dates),
+                end_date__gte=min(dates),
+            )
+        analyses = analyses.filter(window)
+    return analyses.values_list("pk", flat=True)
+
+
+@transaction.atomic
+def claim_jobs(limit):
+    """
+    대기 작업을 오래된 순으로 가져와 RUNNING 표시
+    - SKIP LOCKED: 여러 워커가 동시에 돌아도 같은 작업을 가져가지 않음
+    """
+    stale = timezone.now() - STALE_AFTER
+    jobs = list(
+        ChartRenderJob.objects.select_for_update(skip_locked=True)
+        .filter(
+            Q(status=Status.PENDING) | Q(status=Status.RUNNING, updated_at__lt=stale)
+        )
+        .select_related("analysis")
+        .order_by("requested_at")[:limit]
+    )
+    ChartRenderJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+        status=Status.RUNNING, attempts=F("attempts") + 1, updated_at=timezone.now()
+    )
+    return jobs
+
+
+def run_job(job):
+    """
+    차트를 렌더링해 result_image 로 저장, 성공 여부 반환
+    - 분석 데이터는 웹 조회와 같은 캐시 경로 (원장 버전은 DB 에 있어 프로세스와 무관하게 최신,
+      REDIS_URL 이 있으면 계산 결과도 웹 프로세스와 공유)
+    - Analysis.save() 대신 update → post_save(재요청)/updated_at(캐시 키) 에 영향 없음
+    - 렌더링 중 새 요청이 들어왔으면(requested_at 변경) PENDING 으로 남겨 다시 렌더링
+    """
+    analysis = job.analysis
+    jobs = ChartRenderJob.objects.filter(pk=job.pk, requested_at=job.requested_at)
+    try:
+        png = render_chart(analysis, AnalysisService.get_cached_analysis_data(analysis))
+    except Exception as e:
+        failed = job.attempts + 1 >= MAX_ATTEMPTS
+        jobs.update(
+            status=Status.FAILED if failed else Status.PENDING,
+            last_error=str(e)[:1000],
+            updated_at=timezone.now(),
+        )
+        return False
+
+    old_name = analysis.result_image.name
+    field = analysis.result_image
+    field.save("chart.png", ContentFile(png), save=False)
+    Analysis.objects.filter(pk=analysis.pk).update(result_image=field.name)
+    if old_name and old_name != field.name:
+        field.storage.delete(old_name)
+    jobs.update(status=Status.DONE, last_error="", updated_at=timezone.now())
+    return True
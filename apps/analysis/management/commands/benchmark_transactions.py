@@ -0,0 +1,213 @@
+import random
+import statistics
+import time
+import tracemalloc
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.pagination import Cursor, PageNumberPagination
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.accounts.models import Account, TransactionHistory
+from apps.accounts.rollups import rebuild_rollups
+from apps.analysis.analytics import compute_statistics, load_columns
+from apps.analysis.models import Analysis
+from apps.analysis.pagination import TransactionHistoryCursorPagination
+from apps.analysis.services import AnalysisService
+from apps.analysis.views import TransactionHistoryViewSet
+from apps.users.models import CustomUser
+
+
+class Command(BaseCommand):
+    """
+    대량 거래내역 조회 벤치마크
+    - 현재 DB에 임시 사용자/계좌/거래내역을 만들고 종료 시 삭제
+    - 예) python manage.py benchmark_transactions pagination --rows 200000
+    """
+
+    help = "대량 거래내역 조회 벤치마크"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "scenario", choices=["pagination", "analysis", "statistics"]
+        )
+        parser.add_argument("--rows", type=int, default=200_000)
+        parser.add_argument("--accounts", type=int, default=2)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--depths", type=int, nargs="+", default=[1, 100, 1000, 5000]
+        )
+
+    def handle(self, *args, **options):
+        self.user = CustomUser.objects.create_user(
+            email=f"bench-{uuid.uuid4().hex[:12]}@bench.local", password=None
+        )
+        try:
+            self.accounts = self._make_transactions(
+                options["rows"], options["accounts"]
+            )
+            getattr(self, f"bench_{options['scenario']}")(**options)
+        finally:
+            Analysis.objects.filter(user=self.user).delete()
+            TransactionHistory.objects.filter(account__owner=self.user).delete()
+            Account.objects.filter(owner=self.user).delete()
+            self.user.delete()
+
+    # ----------------------------
+    # 공통 도구
+    # ----------------------------
+    def _make_transactions(self, rows, account_count, batch_size=10_000):
+        accounts = [
+            Account.objects.create(
+                owner=self.user, name="bench", number=uuid.uuid4().hex[:32]
+            )
+            for _ in range(account_count)
+        ]
+        started = time.perf_counter()
+        end = timezone.now()
+        for offset in range(0, rows, batch_size):
+            TransactionHistory.objects.bulk_create(
+                TransactionHistory(
+                    account=random.choice(accounts),
+                    tx_type=random.choice(TransactionHistory.TxType.values),
+                    amount=Decimal(random.randint(1, 100_000)),
+                    running_balance=Decimal("0.00"),
+                    occurred_at=end - timedelta(seconds=random.randint(0, 86400 * 365)),
+                )
+                for _ in range(min(batch_size, rows - offset))
+            )
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {TransactionHistory._meta.db_table}")
+        self.stdout.write(
+            f"거래내역 {rows}건 생성 ({time.perf_counter() - started:.1f}s)"
+        )
+
+        # 서비스를 거치지 않고 만든 거래내역 → 일별 롤업 재생성
+        started = time.perf_counter()
+        created = rebuild_rollups(account_ids=[acc.pk for acc in accounts])
+        self.stdout.write(
+            f"일별 롤업 {created}건 생성 ({time.perf_counter() - started:.1f}s)"
+        )
+        return accounts
+
+    def _timed(self, fn, repeat):
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - started)
+        return statistics.median(samples) * 1000
+
+    # ----------------------------
+    # 시나리오
+    # ----------------------------
+    def bench_pagination(self, repeat, depths, **_):
+        """
+        깊은 페이지 조회 지연: PageNumberPagination(COUNT + OFFSET) vs 커서 페이지네이션
+        """
+        factory = APIRequestFactory(SERVER_NAME="localhost")
+        url = "/api/analysis/transactions/"
+        page_size = 20
+
+        def call(view, query):
+            request = factory.get(url, query)
+            force_authenticate(request, user=self.user)
+            response = view(request)
+            assert response.status_code == 200, response.data
+
+        offset_view = TransactionHistoryViewSet.as_view(
+            {"get": "list"}, pagination_class=PageNumberPagination
+        )
+        cursor_view = TransactionHistoryViewSet.as_view({"get": "list"})
+        ordered = TransactionHistory.objects.filter(account__in=self.accounts).order_by(
+            "-occurred_at", "-id"
+        )
+
+        self.stdout.write(f"{'page':>8} {'offset(ms)':>12} {'cursor(ms)':>12}")
+        for page in depths:
+            offset_ms = self._timed(lambda: call(offset_view, {"page": page}), repeat)
+
+            # 같은 깊이의 커서: 이전 페이지 마지막 행의 (occurred_at, id)
+            query = {}
+            if page > 1:
+                last = ordered[(page - 1) * page_size - 1]
+                pager = TransactionHistoryCursorPagination()
+                pager.base_url = url
+                cursor_url = pager.encode_cursor(
+                    Cursor(0, False, f"{last.occurred_at}|{last.pk}")
+                )
+                query = {"cursor": cursor_url.split("cursor=")[1]}
+            cursor_ms = self._timed(lambda: call(cursor_view, query), repeat)
+
+            self.stdout.write(f"{page:>8} {offset_ms:>12.2f} {cursor_ms:>12.2f}")
+
+    def bench_analysis(self, repeat, **_):
+        """
+        분석 데이터 생성 비용: 쿼리 수 / 소요 시간 / Python 최대 메모리
+        """
+        today = timezone.localdate()
+        self.stdout.write(
+            f"{'period':>8} {'queries':>8} {'time(ms)':>10} {'peak(KB)':>10}"
+        )
+        for period_type in ("DAILY", "WEEKLY", "MONTHLY", "YEARLY"):
+            analysis = Analysis.objects.create(
+                user=self.user,
+                analysis_target="INCOME",
+                period_type=period_type,
+                start_date=today - timedelta(days=366),
+                end_date=today,
+            )
+            with CaptureQueriesContext(connection) as queries:
+                AnalysisService.get_analysis_data(analysis)
+            elapsed = self._timed(
+                lambda: AnalysisService.get_analysis_data(analysis), repeat
+            )
+            tracemalloc.start()
+            AnalysisService.get_analysis_data(analysis)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            self.stdout.write(
+                f"{period_type:>8} {len(queries):>8} {elapsed:>10.1f} {peak / 1024:>10.0f}"
+            )
+
+    def bench_statistics(self, repeat, **_):
+        """
+        통계(analytics) 계산 비용: 컬럼 적재 / 벡터 연산 시간과 Python 최대 메모리
+        """
+        today = timezone.localdate()
+        analysis = Analysis.objects.create(
+            user=self.user,
+            analysis_target="CASHFLOW",
+            period_type="MONTHLY",
+            start_date=today - timedelta(days=366),
+            end_date=today,
+        )
+        columns = {}
+
+        def load():
+            columns["loaded"] = load_columns(analysis)
+
+        load_ms = self._timed(load, repeat)
+        accounts, arrays = columns.pop("loaded")
+        compute_ms = self._timed(
+            lambda: compute_statistics(analysis, accounts, arrays), repeat
+        )
+        rows = len(arrays["amount"])
+        column_kb = sum(a.nbytes for a in arrays.values()) / 1024
+        del arrays
+
+        tracemalloc.start()
+        accounts, arrays = load_columns(analysis)
+        compute_statistics(analysis, accounts, arrays)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self.stdout.write(
+            f"rows={rows} load={load_ms:.0f}ms compute={compute_ms:.1f}ms "
+            f"columns={column_kb:.0f}KB peak={peak / 1024:.0f}KB"
+        )
@@ -0,0 +1,105 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+from apps.analysis.cache import get_cache
+from apps.analysis.jobs import enqueue_chart_renders
+from apps.analysis.models import Analysis
+from apps.analysis.services import generate_analyses
+from apps.users.models import CustomUser
+
+
+def _generate_chunk(user_ids, start_date, end_date, period_type, targets):
+    """사용자 묶음 1개 처리 (워커 프로세스에서도 실행)"""
+    created, analyses = generate_analyses(
+        user_ids, start_date, end_date, period_type, targets
+    )
+    enqueue_chart_renders(analysis.pk for analysis in analyses)
+    return created, len(analyses)
+
+
+def _last_month():
+    first = timezone.localdate().replace(day=1)
+    end = first - timedelta(days=1)
+    return end.replace(day=1), end
+
+
+class Command(BaseCommand):
+    """
+    활성 사용자 전체의 분석 일괄 생성 (월말 배치)
+    - 사용자를 --chunk-size 단위로 나눠 묶음마다 bulk_create 1회 + 집계 쿼리 1회
+    - 기간 버킷은 DB 에 저장, 같은 집계 행으로 만든 결과는 analysis 캐시에 저장
+      (추가 쿼리 없음, REDIS_URL 로 공유 캐시를 쓸 때만 의미 있음), 차트 렌더링 요청
+    - --workers N: 묶음을 프로세스 풀로 분산 (fork 방식, Linux/Docker 기준)
+    - 예) python manage.py generate_analyses --start 2025-07-01 --end 2025-07-31 --workers 4
+    """
+
+    help = "활성 사용자 전체의 분석 일괄 생성"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", type=date.fromisoformat, help="기본: 지난달 1일")
+        parser.add_argument("--end", type=date.fromisoformat, help="기본: 지난달 말일")
+        parser.add_argument(
+            "--period-type",
+            default="MONTHLY",
+            choices=[choice for choice, _ in Analysis.PERIOD_CHOICES],
+        )
+        parser.add_argument(
+            "--targets",
+            nargs="+",
+            default=["INCOME", "EXPENSE"],
+            choices=[choice for choice, _ in Analysis.ANALYSIS_TARGET_CHOICES],
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=500, help="묶음당 사용자 수"
+        )
+        parser.add_argument("--workers", type=int, default=1, help="프로세스 수")
+
+    def handle(self, *args, **options):
+        start_date, end_date = options["start"], options["end"]
+        if not (start_date and end_date):
+            start_date, end_date = _last_month()
+        if start_date > end_date:
+            raise CommandError("--start must be <= --end")
+        if isinstance(get_cache(), LocMemCache):
+            self.stderr.write(
+                "analysis 캐시가 프로세스 메모리라 계산 결과는 이 명령이 끝나면 사라집니다 "
+                "(REDIS_URL 설정 시 공유)"
+            )
+
+        user_ids = list(
+            CustomUser.objects.filter(is_active=True)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        size = options["chunk_size"]
+        chunks = [user_ids[i : i + size] for i in range(0, len(user_ids), size)]
+        args = (start_date, end_date, options["period_type"], options["targets"])
+
+        started = time.perf_counter()
+        if options["workers"] > 1 and len(chunks) > 1:
+            # 부모의 DB 연결을 자식이 공유하지 않도록 fork 전에 닫음
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=options["workers"],
+                mp_context=multiprocessing.get_context("fork"),
+            ) as pool:
+                futures = [
+                    pool.submit(_generate_chunk, chunk, *args) for chunk in chunks
+                ]
+                results = [future.result() for future in futures]
+        else:
+            results = [_generate_chunk(chunk, *args) for chunk in chunks]
+
+        created = sum(r[0] for r in results)
+        total = sum(r[1] for r in results)
+        self.stdout.write(
+            f"{start_date} ~ {end_date} {options['period_type']}: 사용자 {len(user_ids)}명, "
+            f"분석 {total}건 (신규 {created}건, {time.perf_counter() - started:.1f}s)"
+        )
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.analysis.jobs import claim_jobs, run_job
+
+
+class Command(BaseCommand):
+    """
+    분석 차트 렌더링 워커 (ChartRenderJob 큐 처리, 별도 브로커 없음)
+    - 기본: 대기 작업을 모두 처리하고 종료
+    - --loop: 백그라운드 워커로 계속 실행 (여러 개 띄워도 SKIP LOCKED 로 작업이 겹치지 않음)
+    """
+
+    help = "대기 중인 분석 차트를 PNG 로 렌더링"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="계속 실행")
+        parser.add_argument("--interval", type=float, default=1.0, help="반복 간격(초)")
+        parser.add_argument(
+            "--batch-size", type=int, default=20, help="한 번에 가져올 작업 수"
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            done = failed = 0
+            while jobs := claim_jobs(options["batch_size"]):
+                for job in jobs:
+                    if run_job(job):
+                        done += 1
+                    else:
+                        failed += 1
+            if done or failed or not options["loop"]:
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f"{done}건 렌더링, {failed}건 실패 ({elapsed:.2f}s)")
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
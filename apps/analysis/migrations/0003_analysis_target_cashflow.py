@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("analysis", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="analysis",
+            name="analysis_target",
+            field=models.CharField(
+                choices=[
+                    ("INCOME", "수입"),
+                    ("EXPENSE", "지출"),
+                    ("CASHFLOW", "현금흐름"),
+                ],
+                max_length=10,
+            ),
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:36
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("analysis", "0004_chart_render_job"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="analysis",
+            name="bucket_versions",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.CreateModel(
+            name="AnalysisBucket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("period", models.DateField()),
+                (
+                    "currency",
+                    models.CharField(
+                        choices=[("KRW", "KRW"), ("USD", "USD")],
+                        default="KRW",
+                        max_length=3,
+                    ),
+                ),
+                (
+                    "income",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=20
+                    ),
+                ),
+                (
+                    "expense",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=20
+                    ),
+                ),
+                (
+                    "reversal",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=20
+                    ),
+                ),
+                ("income_count", models.PositiveIntegerField(default=0)),
+                ("expense_count", models.PositiveIntegerField(default=0)),
+                (
+                    "analysis",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="buckets",
+                        to="analysis.analysis",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("analysis", "period", "currency"),
+                        name="unique_analysis_bucket",
+                    )
+                ],
+            },
+        ),
+    ]
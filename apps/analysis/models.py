@@ -1,6 +1,9 @@
+from apps.accounts.models import CURRENCY_CHOICES
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from datetime import datetime
+from decimal import Decimal
 from uuid import uuid4
 
 
@@ -26,6 +29,7 @@ class Analysis(models.Model):
     ANALYSIS_TARGET_CHOICES = [
         ("INCOME", "수입"),
         ("EXPENSE", "지출"),
+        ("CASHFLOW", "현금흐름"),  # 수입/지출/순액을 한 번에
     ]
 
     user = models.ForeignKey(
@@ -41,6 +45,8 @@ class Analysis(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # 기간 버킷(AnalysisBucket)을 집계할 때 읽은 원장 버전 {"YYYY-MM": 버전, "*": 전체 버전} (빈 값: 집계 전)
+    bucket_versions = models.JSONField(default=dict, blank=True, editable=False)
 
     class Meta:
         constraints = [
@@ -59,3 +65,77 @@ class Analysis(models.Model):
 
     def __str__(self):
         return f"{self.user} - {self.get_analysis_target_display()} ({self.get_period_type_display()})"
+
+
+class AnalysisBucket(models.Model):
+    """
+    분석 기간(period_type 단위)/통화별 거래 합계 (증분 갱신용)
+    - 분석 대상과 무관하게 수입/지출/환불 합계를 모두 저장 → analysis_target 을 바꿔도 그대로 사용
+    - 일별 롤업에서 집계, Analysis.bucket_versions 와 원장 버전(LedgerVersion)이 다른 월의 기간만 다시 집계
+    """
+
+    analysis = models.ForeignKey(
+        Analysis, on_delete=models.CASCADE, related_name="buckets"
+    )
+    period = models.DateField()
+    currency = models.CharField(max_length=3, choices=CURRENCY_CHOICES, default="KRW")
+    income = models.DecimalField(
+        max_digits=20, decimal_places=2, default=Decimal("0.00")
+    )
+    expense = models.DecimalField(
+        max_digits=20, decimal_places=2, default=Decimal("0.00")
+    )
+    reversal = models.DecimalField(
+        max_digits=20, decimal_places=2, default=Decimal("0.00")
+    )
+    income_count = models.PositiveIntegerField(default=0)
+    expense_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["analysis", "period", "currency"],
+                name="unique_analysis_bucket",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.analysis_id} {self.period} {self.currency}"
+
+
+class ChartRenderJob(models.Model):
+    """
+    분석 차트(result_image) 렌더링 작업 큐 (render_charts 워커가 처리)
+    - 분석당 1행: 다시 요청되면 같은 행을 PENDING 으로 되돌림 → 요청이 몰려도 렌더링은 1번
+    - requested_at: 마지막 요청 시각, 렌더링 중 새 요청이 오면 완료 처리하지 않고 다시 렌더링
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "PENDING"
+        RUNNING = "RUNNING", "RUNNING"
+        DONE = "DONE", "DONE"
+        FAILED = "FAILED", "FAILED"
+
+    analysis = models.OneToOneField(
+        Analysis, on_delete=models.CASCADE, related_name="render_job"
+    )
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PENDING
+    )
+    requested_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # 워커가 대기 작업만 오래된 순으로 읽음
+            models.Index(
+                fields=["requested_at"],
+                name="render_job_pending_idx",
+                condition=models.Q(status="PENDING"),
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.analysis_id} - {self.status}"
@@ -0,0 +1,119 @@
+import uuid
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+
+class TransactionHistoryCursorPagination(CursorPagination):
+    """
+    거래내역 keyset(커서) 페이지네이션
+    - COUNT(*)/OFFSET 없이 "마지막으로 본 (정렬값, id) 이후" 만 조회 → 깊은 페이지도 일정한 속도
+    - 기본 정렬: -occurred_at → (account, -occurred_at) 인덱스, 동률은 id 로 구분
+    - ?ordering=amount / -amount 는 (account, amount, id) 인덱스 사용
+    - 커서 위치는 "정렬값|id" 형태라 항상 유일 → DRF 기본 구현의 offset 이 필요 없음
+    """
+
+    ordering = "-occurred_at"
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+    def get_ordering(self, request, queryset, view):
+        # 정렬 필드와 같은 방향의 id 를 동률 해소용으로 추가
+        field = super().get_ordering(request, queryset, view)[0]
+        return (field, "-id" if field.startswith("-") else "id")
+
+    def _get_position_from_instance(self, instance, ordering):
+        field = ordering[0].lstrip("-")
+        return f"{getattr(instance, field)}|{instance.pk}"
+
+    def _keyset_filter(self, model, position, descending):
+        # 커서는 클라이언트가 바꿀 수 있으므로 필드 타입으로 먼저 변환 → 잘못된 값은 404
+        field = self.ordering[0].lstrip("-")
+        try:
+            value, pk = position.rsplit("|", 1)
+            value = model._meta.get_field(field).to_python(value)
+            pk = uuid.UUID(pk)
+        except (ValueError, TypeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if value is None:
+            raise NotFound(self.invalid_cursor_message)
+        lookup = "lt" if descending else "gt"
+        return Q(**{f"{field}__{lookup}": value}) | Q(
+            **{field: value, f"id__{lookup}": pk}
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            self.cursor = Cursor(offset=0, reverse=False, position=None)
+        reverse, current_position = self.cursor.reverse, self.cursor.position
+
+        if reverse:
+            queryset = queryset.order_by(
+                *[o[1:] if o.startswith("-") else f"-{o}" for o in self.ordering]
+            )
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            # (커서 역방향) XOR (정렬 역방향) 이면 "작은 쪽" 으로 이동
+            descending = reverse != self.ordering[0].startswith("-")
+            queryset = queryset.filter(
+                self._keyset_filter(queryset.model, current_position, descending)
+            )
+
+        # 다음 페이지 존재 여부 확인용으로 1건 더 조회
+        results = list(queryset[: self.page_size + 1])
+        self.page = results[: self.page_size]
+        has_following = len(results) > len(self.page)
+        following_position = (
+            self._get_position_from_instance(self.page[-1], self.ordering)
+            if has_following
+            else None
+        )
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = current_position is not None
+            self.has_previous = has_following
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = has_following
+            self.has_previous = current_position is not None
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        position = (
+            self._get_position_from_instance(self.page[-1], self.ordering)
+            if self.page
+            else self.next_position
+        )
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        position = (
+            self._get_position_from_instance(self.page[0], self.ordering)
+            if self.page
+            else self.previous_position
+        )
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
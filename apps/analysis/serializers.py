@@ -1,19 +1,35 @@
 from rest_framework import serializers
-from .models import Analysis
+from .models import Analysis, ChartRenderJob
 from apps.accounts.models import TransactionHistory
 
 
 class AnalysisSerializer(serializers.ModelSerializer):
     # 클라이언트가 보낼 필요 없이, 현재 요청을 보낸 사용자를 자동으로 할당
     user = serializers.HiddenField(default=serializers.CurrentUserDefault())
+    # 차트(result_image) 상태: pending(렌더링 대기/중) / ready / failed, 요청 이력이 없으면 null
+    chart_status = serializers.SerializerMethodField()
 
     class Meta:
         model = Analysis
         fields = "__all__"
 
+    def get_chart_status(self, obj):
+        job = getattr(obj, "render_job", None)
+        if job is None:
+            return "ready" if obj.result_image else None
+        if job.status == ChartRenderJob.Status.DONE:
+            return "ready"
+        if job.status == ChartRenderJob.Status.FAILED:
+            return "failed"
+        return "pending"
+
 
 class TransactionHistorySerializer(serializers.ModelSerializer):
     class Meta:
         model = TransactionHistory
         fields = "__all__"
-        read_only_fields = ("id", "running_balance", "posted_at")
+        # occurred_at: 서버 시각으로 기록 (과거 일자 거래는 명세서 가져오기로 반영)
+        read_only_fields = ("id", "running_balance", "posted_at", "occurred_at")
+        # (account, idempotency_key) 유일성 검사는 posting 서비스가 처리
+        # → 같은 키로 다시 요청하면 400 대신 기존 거래를 그대로 반환
+        validators = []
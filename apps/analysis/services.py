@@ -1,44 +1,504 @@
-from apps.accounts.models import TransactionHistory, Account
-from django.db.models import Sum, Count
-from django.db.models.functions import TruncDay, TruncWeek, TruncMonth, TruncYear
+from collections import Counter
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import groupby
+from operator import itemgetter
+
+from apps.accounts.models import Account, DailyAccountRollup, TransactionHistory
+from apps.accounts.rollups import day_bounds
+from apps.accounts.versions import GLOBAL, get_versions
+from .cache import analysis_months, cached_result, get_cache, result_key
+from .models import Analysis, AnalysisBucket
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.db.models.functions import (
+    TruncDay,
+    TruncWeek,
+    TruncMonth,
+    TruncYear,
+)
+
+TxType = TransactionHistory.TxType
+
+# 분석 대상별 거래유형 (REVERSAL 은 지출 취소/환불 → 지출에서 차감)
+INCOME_TX_TYPES = (TxType.DEPOSIT, TxType.TRANSFER_IN)
+EXPENSE_TX_TYPES = (TxType.WITHDRAW, TxType.TRANSFER_OUT, TxType.FEE)
+TARGET_TX_TYPES = {
+    "INCOME": INCOME_TX_TYPES,
+    "EXPENSE": EXPENSE_TX_TYPES + (TxType.REVERSAL,),
+    "CASHFLOW": INCOME_TX_TYPES + EXPENSE_TX_TYPES + (TxType.REVERSAL,),
+}
+ZERO = Decimal("0.00")
+
+
+def _shift_months(day, months):
+    """day 에서 months 개월 이동 (말일은 해당 월 말일로 맞춤)"""
+    index = day.year * 12 + day.month - 1 + months
+    year, month = divmod(index, 12)
+    next_month = date(year + (month + 1) // 12, (month + 1) % 12 + 1, 1)
+    return date(year, month + 1, min(day.day, (next_month - timedelta(days=1)).day))
+
+
+def previous_window(analysis):
+    """
+    분석 기간 바로 앞의 같은 길이 기간 (period_type 단위)
+    - DAILY: 일수, WEEKLY: 주 수(7일 단위 올림), MONTHLY/YEARLY: 개월/연 수만큼 이전
+      예) 2025-07-01~07-31 MONTHLY → 2025-06-01~06-30, 2025 YEARLY → 2024
+    """
+    start, end = analysis.start_date, analysis.end_date
+    days = (end - start).days + 1
+    if analysis.period_type in ("MONTHLY", "YEARLY"):
+        months = (end.year - start.year) * 12 + end.month - start.month + 1
+        if analysis.period_type == "YEARLY":
+            months = -(-months // 12) * 12
+        # 말일로 끝나는 기간은 이전 기간도 말일까지 (2월 → 1월 31일)
+        next_day = end + timedelta(days=1)
+        if next_day.day == 1:
+            previous_end = _shift_months(next_day, -months) - timedelta(days=1)
+        else:
+            previous_end = _shift_months(end, -months)
+        return _shift_months(start, -months), previous_end
+    if analysis.period_type == "WEEKLY":
+        days = -(-days // 7) * 7
+    shift = timedelta(days=days)
+    return start - shift, end - shift
+
+
+TRUNC_FUNCS = {
+    "DAILY": TruncDay,
+    "WEEKLY": TruncWeek,
+    "MONTHLY": TruncMonth,
+    "YEARLY": TruncYear,
+}
+# 조건부 집계: 수입/지출/환불 합계를 한 번의 GROUP BY 로 계산
+TARGET_SUMS = {
+    "income": Sum("total_amount", filter=Q(tx_type__in=INCOME_TX_TYPES)),
+    "expense": Sum("total_amount", filter=Q(tx_type__in=EXPENSE_TX_TYPES)),
+    "reversal": Sum("total_amount", filter=Q(tx_type=TxType.REVERSAL)),
+    "income_count": Sum("transaction_count", filter=Q(tx_type__in=INCOME_TX_TYPES)),
+    "expense_count": Sum(
+        "transaction_count", filter=Q(tx_type__in=TARGET_TX_TYPES["EXPENSE"])
+    ),
+}
+
+
+def _target_count(target, row):
+    if target == "INCOME":
+        return row["income_count"] or 0
+    if target == "EXPENSE":
+        return row["expense_count"] or 0
+    return (row["income_count"] or 0) + (row["expense_count"] or 0)
+
+
+def build_analysis_data(target, grouped):
+    """
+    (기간, 통화)별 TARGET_SUMS 집계 행 → 분석 데이터
+    - grouped: period, currency 순으로 정렬된 dict 목록
+      다른 대상의 거래유형이 섞여 있어도 됨 (건수는 대상별로 따로 집계, 해당 거래가 없는 행은 제외)
+    """
+    cashflow = target == "CASHFLOW"
+    period_data = []
+    currencies = Counter()
+    for row in grouped:
+        count = _target_count(target, row)
+        if not count:
+            continue
+        currencies[row["currency"]] += count
+        income = row["income"] or ZERO
+        expense = (row["expense"] or ZERO) - (row["reversal"] or ZERO)
+        if not period_data or period_data[-1]["period"] != row["period"]:
+            period_data.append(
+                {"period": row["period"], "income": ZERO, "expense": ZERO}
+                if cashflow
+                else {"period": row["period"], "total_amount": ZERO}
+            )
+            period_data[-1]["transaction_count"] = 0
+        current = period_data[-1]
+        current["transaction_count"] += count
+        if cashflow:
+            current["income"] += income
+            current["expense"] += expense
+            current["net"] = current["income"] - current["expense"]
+        else:
+            current["total_amount"] += income if target == "INCOME" else expense
+
+    data = {
+        "transaction_count": sum(p["transaction_count"] for p in period_data),
+        "period_data": period_data,
+        # 가장 많이 사용된 통화 (거래가 없으면 KRW)
+        "currency": currencies.most_common(1)[0][0] if currencies else "KRW",
+    }
+    if cashflow:
+        data["income"] = sum((p["income"] for p in period_data), ZERO)
+        data["expense"] = sum((p["expense"] for p in period_data), ZERO)
+        data["net"] = data["income"] - data["expense"]
+        data["total_amount"] = data["net"]
+    else:
+        data["total_amount"] = sum((p["total_amount"] for p in period_data), ZERO)
+    return data
+
+
+# ----------------------------
+# 기간 버킷 증분 갱신
+# ----------------------------
+BUCKET_FIELDS = ("income", "expense", "reversal", "income_count", "expense_count")
+# bucket_versions 의 전체(롤업 재생성) 버전 키
+GLOBAL_BUCKET_VERSION = "*"
+
+
+def period_start(period_type, day):
+    """일자 → 해당 기간(period_type 단위) 시작일 (TRUNC_FUNCS 와 같은 경계, 주는 월요일 시작)"""
+    if period_type == "WEEKLY":
+        return day - timedelta(days=day.weekday())
+    if period_type == "MONTHLY":
+        return day.replace(day=1)
+    if period_type == "YEARLY":
+        return date(day.year, 1, 1)
+    return day
+
+
+def _version_names(months):
+    """bucket_versions 키 목록: 전체 버전 + 월("YYYY-MM")"""
+    return [GLOBAL_BUCKET_VERSION] + [f"{month:%Y-%m}" for month in months]
+
+
+def _stale_periods(analysis, months):
+    """바뀐 월들의 분석 기간 안 일자가 속한 기간 시작일 집합"""
+    periods = set()
+    for month in months:
+        day = max(month, analysis.start_date)
+        while day.month == month.month and day <= analysis.end_date:
+            periods.add(period_start(analysis.period_type, day))
+            day += timedelta(days=1)
+    return periods
+
+
+def refresh_analysis_buckets(analysis):
+    """
+    기간 버킷을 원장 버전이 바뀐 월만 다시 집계해 갱신하고 (기간, 통화)별 합계 행 반환
+    - 일별 롤업(get_analysis_data 와 같은 원천)에서 집계 → 잔액 미반영 거래는 양쪽 모두 제외
+    - Analysis.bucket_versions: 버킷을 만들 때 읽은 (사용자, 월)별 LedgerVersion 과 전체 버전
+      → 버전이 다른 월에 걸친 기간만 롤업에서 다시 집계, 전체 버전이 바뀌면 분석 기간 전체
+    - 버전은 거래 커밋 후 올라가므로 롤업보다 먼저 읽음
+      → 읽은 뒤 커밋된 거래는 다음 갱신 때 버전 차이로 반드시 다시 집계됨
+    - 같은 분석을 동시에 갱신하지 않도록 분석 행을 잠그고 갱신
+    - 반환 행은 build_analysis_data 입력 형태 (기간, 통화 순)
+    """
+    months = analysis_months(analysis)
+    with transaction.atomic():
+        stored = (
+            Analysis.objects.select_for_update()
+            .values_list("bucket_versions", flat=True)
+            .get(pk=analysis.pk)
+        )
+        versions = dict(
+            zip(
+                _version_names(months),
+                get_versions(
+                    [GLOBAL] + [(analysis.user_id, month) for month in months]
+                ),
+            )
+        )
+        if stored.get(GLOBAL_BUCKET_VERSION) != versions[GLOBAL_BUCKET_VERSION]:
+            stale = months
+        else:
+            stale = [
+                m for m in months if stored.get(f"{m:%Y-%m}") != versions[f"{m:%Y-%m}"]
+            ]
+
+        if stale:
+            periods = _stale_periods(analysis, stale)
+            grouped = (
+                DailyAccountRollup.objects.filter(
+                    account__owner_id=analysis.user_id,
+                    date__range=[analysis.start_date, analysis.end_date],
+                    tx_type__in=TARGET_TX_TYPES["CASHFLOW"],
+                )
+                .annotate(period=TRUNC_FUNCS[analysis.period_type]("date"))
+                .filter(period__in=periods)
+                .values("period", "currency")
+                .annotate(**TARGET_SUMS)
+                .order_by()
+            )
+            AnalysisBucket.objects.filter(
+                analysis_id=analysis.pk, period__in=periods
+            ).delete()
+            AnalysisBucket.objects.bulk_create(
+                AnalysisBucket(
+                    analysis_id=analysis.pk,
+                    period=row["period"],
+                    currency=row["currency"],
+                    **{field: row[field] or 0 for field in BUCKET_FIELDS},
+                )
+                for row in grouped
+                if row["income_count"] or row["expense_count"]
+            )
+            Analysis.objects.filter(pk=analysis.pk).update(bucket_versions=versions)
+
+        return list(
+            AnalysisBucket.objects.filter(analysis_id=analysis.pk)
+            .order_by("period", "currency")
+            .values("period", "currency", *BUCKET_FIELDS)
+        )
+
+
+@transaction.atomic
+def reset_analysis_buckets(analyses):
+    """
+    기간 버킷을 비워 다음 조회 때 분석 기간 전체를 다시 집계
+    - 분석 기간/단위가 바뀌어 기존 버킷을 쓸 수 없을 때
+    - 분석 행을 먼저 갱신 → 진행 중인 refresh_analysis_buckets 가 끝난 뒤에 비움
+    """
+    analyses.update(bucket_versions={})
+    AnalysisBucket.objects.filter(analysis__in=analyses).delete()
 
 
 class AnalysisService:
     @staticmethod
     def get_transaction_queryset(analysis):
-        """분석 대상 거래 내역 조회"""
+        """
+        분석 대상 거래 내역 조회 (analysis_target 에 해당하는 거래유형만)
+        - 기간은 TIME_ZONE 기준 반열림 구간 → (account, -occurred_at) 인덱스 범위 검색
+          (월 파티션 테이블이면 분석 기간에 걸친 파티션만 읽음, partition_transactions 참고)
+        """
+        lower, upper = day_bounds(analysis.start_date, analysis.end_date)
         user_accounts = Account.objects.filter(owner=analysis.user)
         qs = TransactionHistory.objects.filter(
             account__in=user_accounts,
-            occurred_at__date__range=[analysis.start_date, analysis.end_date],
+            occurred_at__gte=lower,
+            occurred_at__lt=upper,
+            tx_type__in=TARGET_TX_TYPES[analysis.analysis_target],
         ).select_related("account")  # 1:1 관계 N+1 문제 해결
 
         return qs  # ⚡ 반환 추가
 
+    @staticmethod
+    def get_rollup_queryset(analysis, start_date=None, end_date=None):
+        """분석 대상 일별 롤업 (계좌/일자/유형/통화별 합계), 기간 생략 시 분석 기간"""
+        return DailyAccountRollup.objects.filter(
+            account__owner=analysis.user,
+            date__range=[
+                start_date or analysis.start_date,
+                end_date or analysis.end_date,
+            ],
+            tx_type__in=TARGET_TX_TYPES[analysis.analysis_target],
+        )
+
     @staticmethod
     def get_analysis_data(analysis):
-        """분석 데이터 생성"""
-        qs = AnalysisService.get_transaction_queryset(analysis)
-        total_amount = sum(t.amount for t in qs)
-        transaction_count = qs.count()
-
-        trunc_func = {
-            "DAILY": TruncDay,
-            "WEEKLY": TruncWeek,
-            "MONTHLY": TruncMonth,
-            "YEARLY": TruncYear,
-        }[analysis.period_type]
-
-        period_data = (
-            qs.annotate(period=trunc_func("occurred_at"))
-            .values("period")
-            .annotate(total_amount=Sum("amount"), transaction_count=Count("id"))
-            .order_by("period")
-        )
-
-        return {
-            "total_amount": total_amount,
-            "transaction_count": transaction_count,
-            "period_data": list(period_data),
-            "currency": qs.first().currency if qs.exists() else "KRW",
+        """
+        분석 데이터 생성
+        - 원본 거래내역 대신 일별 롤업에서 (기간, 통화) 단위로 집계
+          → 연간 분석도 계좌당 최대 365일 × 유형 수 행만 읽음
+        - 롤업 일자가 이미 TIME_ZONE 기준이라 주/월/연 Trunc 는 날짜 컬럼에서 시간대 변환 없이 계산
+        - INCOME: 입금/이체입금 합계, EXPENSE: 출금/이체출금/수수료 합계 - 환불(REVERSAL)
+        - CASHFLOW: 기간별 income/expense/net 을 같은 쿼리에서 함께 계산
+        - 전체 합계/건수/통화는 그 결과(기간 수만큼의 행)를 합쳐서 계산
+        """
+        qs = AnalysisService.get_rollup_queryset(analysis)
+        grouped = (
+            qs.annotate(period=TRUNC_FUNCS[analysis.period_type]("date"))
+            .values("period", "currency")
+            .annotate(**TARGET_SUMS)
+            .order_by("period", "currency")
+        )
+        return build_analysis_data(analysis.analysis_target, grouped)
+
+    @staticmethod
+    def get_incremental_analysis_data(analysis):
+        """
+        기간 버킷 기반 분석 데이터 (get_analysis_data 와 같은 형태)
+        - 분석 기간 전체를 다시 집계하지 않고 원장 버전이 바뀐 월에 걸친 기간 버킷만 롤업에서 다시 집계
+        """
+        rows = refresh_analysis_buckets(analysis)
+        return build_analysis_data(analysis.analysis_target, rows)
+
+    @staticmethod
+    def get_cached_analysis_data(analysis):
+        """
+        분석 데이터 캐시 조회
+        - 키: 분석 id/수정 시각 + 분석 기간에 걸친 (사용자, 월) 원장 버전
+        - 거래가 반영되면 posting 서비스가 커밋 후 ledger_changed 로 해당 월 버전을 올림
+          → 분석 기간 밖의 거래는 캐시에 영향 없음
+        - 캐시가 없으면 기간 버킷을 증분 갱신해 계산 (get_incremental_analysis_data)
+        - 유효기간/최대 항목 수: ANALYSIS_CACHE_TIMEOUT / ANALYSIS_CACHE_MAX_ENTRIES
+        """
+        return cached_result(
+            analysis, "data", AnalysisService.get_incremental_analysis_data
+        )
+
+    @staticmethod
+    def get_comparison_data(analysis):
+        """
+        현재 분석 기간 vs 직전 같은 길이 기간 비교
+        - 두 기간을 합친 날짜 범위를 한 번만 읽고, 기간별 합계는 조건부 집계(Sum filter)로 계산
+          → 분석 두 번 대신 롤업 인덱스 범위 검색 1회
+        - change: 현재 - 이전 total_amount, rate: 이전 대비 증감률(%) (이전이 0 이면 null)
+        """
+        previous_start, previous_end = previous_window(analysis)
+        windows = {
+            "current": (analysis.start_date, analysis.end_date),
+            "previous": (previous_start, previous_end),
         }
+        aggregates = {}
+        for name, (start, end) in windows.items():
+            window = Q(date__range=[start, end])
+            aggregates.update(
+                {
+                    f"{name}_income": Sum(
+                        "total_amount", filter=window & Q(tx_type__in=INCOME_TX_TYPES)
+                    ),
+                    f"{name}_expense": Sum(
+                        "total_amount", filter=window & Q(tx_type__in=EXPENSE_TX_TYPES)
+                    ),
+                    f"{name}_reversal": Sum(
+                        "total_amount", filter=window & Q(tx_type=TxType.REVERSAL)
+                    ),
+                    f"{name}_count": Sum("transaction_count", filter=window),
+                }
+            )
+        totals = AnalysisService.get_rollup_queryset(
+            analysis, previous_start, analysis.end_date
+        ).aggregate(**aggregates)
+
+        data = {}
+        for name, (start, end) in windows.items():
+            income = totals[f"{name}_income"] or ZERO
+            expense = (totals[f"{name}_expense"] or ZERO) - (
+                totals[f"{name}_reversal"] or ZERO
+            )
+            result = {
+                "start_date": start,
+                "end_date": end,
+                "transaction_count": totals[f"{name}_count"] or 0,
+            }
+            if analysis.analysis_target == "CASHFLOW":
+                result.update(income=income, expense=expense, net=income - expense)
+                result["total_amount"] = result["net"]
+            else:
+                result["total_amount"] = (
+                    income if analysis.analysis_target == "INCOME" else expense
+                )
+            data[name] = result
+
+        current = data["current"]["total_amount"]
+        previous = data["previous"]["total_amount"]
+        data["change"] = current - previous
+        data["rate"] = (
+            ((current - previous) / abs(previous) * 100).quantize(ZERO)
+            if previous
+            else None
+        )
+        return data
+
+
+def generate_analyses(
+    user_ids,
+    start_date,
+    end_date,
+    period_type="MONTHLY",
+    targets=("INCOME", "EXPENSE"),
+):
+    """
+    사용자 묶음의 분석 일괄 생성 + 기간 버킷/결과 캐시 채우기 (월말 배치용)
+    - Analysis 는 bulk_create(ignore_conflicts=True) → 이미 있으면 unique_analysis 로 건너뜀
+    - 기간 버킷은 (사용자, 기간, 통화) GROUP BY 롤업 쿼리 1회로 모든 분석을 채우고,
+      그보다 먼저 읽은 원장 버전을 bucket_versions 에 저장 (refresh_analysis_buckets 와 같은 규칙)
+    - 결과 캐시도 같은 집계 행으로 build_analysis_data 를 계산해 set_many 1회
+      (키는 bucket_versions 와 같은 버전 → 조회 때 get_cached_analysis_data 와 같은 키)
+    - 반환: (새로 만든 건수, 대상 분석 목록)
+    """
+    user_ids = list(user_ids)
+    analyses = Analysis.objects.filter(
+        user_id__in=user_ids,
+        analysis_target__in=targets,
+        period_type=period_type,
+        start_date=start_date,
+        end_date=end_date,
+    )
+    before = analyses.count()
+    Analysis.objects.bulk_create(
+        [
+            Analysis(
+                user_id=user_id,
+                analysis_target=target,
+                period_type=period_type,
+                start_date=start_date,
+                end_date=end_date,
+            )
+            for user_id in user_ids
+            for target in targets
+        ],
+        ignore_conflicts=True,
+    )
+    analyses = list(analyses)
+    months = analysis_months(analyses[0]) if analyses else []
+
+    with transaction.atomic():
+        # 같은 분석의 refresh_analysis_buckets 와 겹치지 않도록 분석 행 잠금
+        list(
+            Analysis.objects.select_for_update()
+            .filter(pk__in=[analysis.pk for analysis in analyses])
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        keys = [GLOBAL] + [
+            (owner_id, month)
+            for owner_id in {analysis.user_id for analysis in analyses}
+            for month in months
+        ]
+        found = dict(zip(keys, get_versions(keys)))
+
+        grouped = (
+            DailyAccountRollup.objects.filter(
+                account__owner_id__in=user_ids,
+                date__range=[start_date, end_date],
+                tx_type__in=TARGET_TX_TYPES["CASHFLOW"],
+            )
+            .annotate(
+                user_id=F("account__owner_id"),
+                period=TRUNC_FUNCS[period_type]("date"),
+            )
+            .values("user_id", "period", "currency")
+            .annotate(**TARGET_SUMS)
+            .order_by("user_id", "period", "currency")
+        )
+        rows = {
+            user_id: list(user_rows)
+            for user_id, user_rows in groupby(grouped, key=itemgetter("user_id"))
+        }
+
+        AnalysisBucket.objects.filter(analysis__in=analyses).delete()
+        AnalysisBucket.objects.bulk_create(
+            AnalysisBucket(
+                analysis_id=analysis.pk,
+                period=row["period"],
+                currency=row["currency"],
+                **{field: row[field] or 0 for field in BUCKET_FIELDS},
+            )
+            for analysis in analyses
+            for row in rows.get(analysis.user_id, ())
+            if row["income_count"] or row["expense_count"]
+        )
+        versions = {
+            analysis.pk: [found[GLOBAL]]
+            + [found[(analysis.user_id, month)] for month in months]
+            for analysis in analyses
+        }
+        for analysis in analyses:
+            analysis.bucket_versions = dict(
+                zip(_version_names(months), versions[analysis.pk])
+            )
+        Analysis.objects.bulk_update(analyses, ["bucket_versions"])
+
+    get_cache().set_many(
+        {
+            result_key(analysis, "data", versions[analysis.pk]): build_analysis_data(
+                analysis.analysis_target, rows.get(analysis.user_id, ())
+            )
+            for analysis in analyses
+        },
+        settings.ANALYSIS_CACHE_TIMEOUT,
+    )
+    return len(analyses) - before, analyses
@@ -1,6 +1,9 @@
-from django.db.models.signals import post_delete
+from apps.accounts.signals import ledger_changed
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from .jobs import analyses_affected_by, enqueue_chart_renders
 from .models import Analysis
+from .services import reset_analysis_buckets
 import os
 
 
@@ -9,3 +12,22 @@ def delete_analysis_file(sender, instance, **kwargs):
     """Analysis 인스턴스 삭제 시 result_image 파일도 제거"""
     if instance.result_image and os.path.isfile(instance.result_image.path):
         os.remove(instance.result_image.path)
+
+
+@receiver(post_save, sender=Analysis)
+def reset_buckets_on_save(sender, instance, created, **kwargs):
+    """분석 수정 시 기간 버킷 초기화 (기간/단위가 바뀌면 기존 버킷을 쓸 수 없음)"""
+    if not created:
+        reset_analysis_buckets(Analysis.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Analysis)
+def request_chart_on_save(sender, instance, **kwargs):
+    """분석 생성/수정 시 차트 렌더링 요청 (같은 트랜잭션에서 작업 행만 추가)"""
+    enqueue_chart_renders([instance.pk])
+
+
+@receiver(ledger_changed)
+def request_chart_on_ledger_change(sender, changes, **kwargs):
+    """새 거래가 분석 기간에 들어온 분석의 차트 다시 렌더링 요청"""
+    enqueue_chart_renders(analyses_affected_by(changes))
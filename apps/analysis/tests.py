@@ -1,15 +1,33 @@
+import csv
+import json
 import pytest
-from datetime import date, timedelta
+import tracemalloc
+from base64 import b64encode
+from datetime import date, datetime, timedelta, timezone as dt_timezone
 from decimal import Decimal
 from unittest import mock
+from urllib.parse import urlencode
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import RequestFactory
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
 
-from apps.analysis.models import Analysis
+from apps.analysis import analytics
+from apps.analysis.analytics import get_statistics
+from apps.analysis.cache import cache_stats, get_cache, result_key
+from apps.analysis.jobs import MAX_ATTEMPTS, claim_jobs, run_job
+from apps.analysis.models import Analysis, AnalysisBucket, ChartRenderJob
 from apps.analysis.serializers import AnalysisSerializer
-from apps.analysis.services import AnalysisService
+from apps.analysis.services import AnalysisService, generate_analyses, previous_window
 from apps.users.models import CustomUser
-from apps.accounts.models import Account, TransactionHistory
+from apps.accounts.models import Account, DailyAccountRollup, TransactionHistory
+from apps.accounts.rollups import rebuild_rollups
+from apps.accounts.services import post_transaction
+from apps.accounts.versions import bump_ledger_versions
 
 
 @pytest.mark.django_db
@@ -40,6 +58,8 @@ class TestAnalysisUnit:
             currency="KRW",
             occurred_at=date(2025, 1, 2),
         )
+        # 서비스를 거치지 않고 만든 거래내역 → 일별 롤업 재생성
+        rebuild_rollups()
 
         self.analysis = Analysis.objects.create(
             user=self.user,
@@ -85,30 +105,670 @@ class TestAnalysisUnit:
     @mock.patch("os.path.isfile", return_value=True)
     @mock.patch("os.remove")
     def test_result_image_file_deleted_on_instance_delete(
-        self, mock_remove, mock_isfile
+        self, mock_remove, mock_isfile, tmp_path
     ):
         image_file = SimpleUploadedFile("test.jpg", b"file_content")
-        analysis = Analysis.objects.create(
-            user=self.user,
-            analysis_target="EXPENSE",
-            period_type="WEEKLY",
-            start_date=date.today(),
-            end_date=date.today() + timedelta(days=7),
-            result_image=image_file,
-        )
-        # 삭제 시 경로 존재 확인 및 삭제 시그널 테스트
-        analysis.delete()
+        # 업로드 파일은 임시 MEDIA_ROOT 에 저장 (실제 media/ 에 남지 않게)
+        with override_settings(MEDIA_ROOT=tmp_path):
+            analysis = Analysis.objects.create(
+                user=self.user,
+                analysis_target="EXPENSE",
+                period_type="WEEKLY",
+                start_date=date.today(),
+                end_date=date.today() + timedelta(days=7),
+                result_image=image_file,
+            )
+            # 삭제 시 경로 존재 확인 및 삭제 시그널 테스트
+            analysis.delete()
         mock_isfile.assert_called_once()
         mock_remove.assert_called_once()
 
     def test_get_transaction_queryset(self):
+        # INCOME 분석 → 입금성 거래만
         qs = AnalysisService.get_transaction_queryset(self.analysis)
-        assert qs.count() == 2
+        assert qs.count() == 1
         assert qs.first().account == self.account
+        assert qs.first().tx_type == "DEPOSIT"
+
+    def test_transaction_queryset_uses_index_range(self):
+        if connection.vendor != "postgresql":
+            pytest.skip("EXPLAIN 형식은 PostgreSQL 기준")
+        # 분석 기간(1개월)이 전체의 일부가 되도록 여러 해에 걸친 거래를 만들고 통계 갱신
+        start = datetime(2017, 1, 1, tzinfo=dt_timezone.utc)
+        TransactionHistory.objects.bulk_create(
+            TransactionHistory(
+                account=self.account,
+                tx_type=TransactionHistory.TxType.DEPOSIT,
+                amount=Decimal("1.00"),
+                running_balance=Decimal("0.00"),
+                occurred_at=start + timedelta(days=i),
+            )
+            for i in range(3000)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {TransactionHistory._meta.db_table}")
+        plan = AnalysisService.get_transaction_queryset(self.analysis).explain()
+        # 기간 조건이 날짜 캐스트 없이 (account, -occurred_at) 인덱스의 범위 조건으로 쓰임
+        index = next(
+            i.name
+            for i in TransactionHistory._meta.indexes
+            if i.fields == ["account", "-occurred_at"]
+        )
+        assert index in plan, plan
+        conds = [line for line in plan.splitlines() if "Index Cond" in line]
+        assert any(
+            "occurred_at >= '" in line and "occurred_at < '" in line for line in conds
+        ), plan
+        assert "::date" not in plan, plan
+
+    def test_period_boundaries_use_settings_timezone(self):
+        # 2024-12-31 15:30 UTC = 2025-01-01 00:30 KST (포함)
+        # 2025-01-31 15:30 UTC = 2025-02-01 00:30 KST (제외)
+        for day in (datetime(2024, 12, 31, 15, 30), datetime(2025, 1, 31, 15, 30)):
+            TransactionHistory.objects.create(
+                account=self.account,
+                tx_type="DEPOSIT",
+                amount=Decimal("7.00"),
+                running_balance=Decimal("0.00"),
+                occurred_at=day.replace(tzinfo=dt_timezone.utc),
+            )
+        # 요청별로 다른 시간대가 활성화되어 있어도 경계는 settings.TIME_ZONE 기준
+        with timezone.override("UTC"):
+            rebuild_rollups()
+            qs = AnalysisService.get_transaction_queryset(self.analysis)
+            data = AnalysisService.get_analysis_data(self.analysis)
+        assert qs.count() == 2
+        assert data["total_amount"] == Decimal("107.00")
+        assert data["period_data"][0]["period"] == date(2025, 1, 1)
 
     def test_get_analysis_data(self):
         data = AnalysisService.get_analysis_data(self.analysis)
-        assert "total_amount" in data
-        assert data["transaction_count"] == 2
+        assert data["total_amount"] == Decimal("100.00")
+        assert data["transaction_count"] == 1
         assert isinstance(data["period_data"], list)
         assert data["currency"] == "KRW"
+
+    def test_get_analysis_data_by_target(self, django_assert_num_queries):
+        for tx_type, amount, day in (
+            ("FEE", "5.00", 2),
+            ("REVERSAL", "20.00", 3),
+            ("TRANSFER_IN", "30.00", 3),
+        ):
+            TransactionHistory.objects.create(
+                account=self.account,
+                tx_type=tx_type,
+                amount=Decimal(amount),
+                running_balance=Decimal("0.00"),
+                occurred_at=datetime(2025, 1, day, 12, tzinfo=dt_timezone.utc),
+            )
+        rebuild_rollups()
+
+        # 지출 = 출금 50 + 수수료 5 - 환불 20
+        self.analysis.analysis_target = "EXPENSE"
+        data = AnalysisService.get_analysis_data(self.analysis)
+        assert data["total_amount"] == Decimal("35.00")
+        assert data["transaction_count"] == 3
+
+        # 현금흐름: 기간별 수입/지출/순액을 쿼리 한 번으로
+        self.analysis.analysis_target = "CASHFLOW"
+        with django_assert_num_queries(1):
+            data = AnalysisService.get_analysis_data(self.analysis)
+        assert (data["income"], data["expense"], data["net"]) == (
+            Decimal("130.00"),
+            Decimal("35.00"),
+            Decimal("95.00"),
+        )
+        assert [(p["income"], p["expense"], p["net"]) for p in data["period_data"]] == [
+            (Decimal("100.00"), Decimal("0.00"), Decimal("100.00")),
+            (Decimal("0.00"), Decimal("55.00"), Decimal("-55.00")),
+            (Decimal("30.00"), Decimal("-20.00"), Decimal("50.00")),
+        ]
+
+    @pytest.mark.parametrize("extra_rows", [0, 3000])
+    def test_get_analysis_data_constant_cost(
+        self, extra_rows, django_assert_num_queries
+    ):
+        TransactionHistory.objects.bulk_create(
+            TransactionHistory(
+                account=self.account,
+                tx_type=TransactionHistory.TxType.DEPOSIT,
+                amount=Decimal("1.00"),
+                running_balance=Decimal("0.00"),
+                occurred_at=datetime(2025, 1, 1 + i % 28, tzinfo=dt_timezone.utc),
+            )
+            for i in range(extra_rows)
+        )
+        rebuild_rollups(date(2025, 1, 1), date(2025, 1, 31))
+        # 거래 건수와 무관하게 롤업은 일자 × 거래유형 수만큼만 존재
+        assert DailyAccountRollup.objects.count() <= 28 + 1
+
+        # 거래 건수와 무관하게 쿼리 1회 + 메모리 사용량 일정
+        tracemalloc.start()
+        with django_assert_num_queries(1):
+            data = AnalysisService.get_analysis_data(self.analysis)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        assert data["transaction_count"] == 1 + extra_rows
+        assert data["total_amount"] == Decimal("100.00") + extra_rows
+        assert (
+            sum(p["transaction_count"] for p in data["period_data"]) == 1 + extra_rows
+        )
+        assert peak < 512 * 1024
+
+    def test_transaction_cursor_pagination(self):
+        # 같은 occurred_at 이 여러 건이어도 누락/중복 없이 순회되는지 확인
+        TransactionHistory.objects.bulk_create(
+            TransactionHistory(
+                account=self.account,
+                tx_type=TransactionHistory.TxType.DEPOSIT,
+                amount=Decimal(i % 3 + 1),
+                running_balance=Decimal("0.00"),
+                occurred_at=datetime(2025, 2, 1 + i % 4, tzinfo=dt_timezone.utc),
+            )
+            for i in range(23)
+        )
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        for ordering in ("-occurred_at", "amount"):
+            seen = []
+            url = f"/api/analysis/transactions/?ordering={ordering}&page_size=4"
+            while url:
+                resp = client.get(url)
+                assert resp.status_code == 200
+                assert "count" not in resp.data
+                seen.extend(item["id"] for item in resp.data["results"])
+                last, url = resp.data, resp.data["next"]
+            assert len(seen) == len(set(seen)) == 25
+
+            # 마지막 페이지에서 이전 페이지로 되돌아가기
+            resp = client.get(last["previous"])
+            back = [item["id"] for item in resp.data["results"]]
+            assert back == seen[-4 - len(last["results"]) : -len(last["results"])]
+
+        # 변조된 커서 (정렬값/id 형식 오류) 는 500 이 아니라 404
+        for ordering, position in (
+            ("-occurred_at", "garbage|notuuid"),
+            ("-occurred_at", "2025-02-01 00:00:00+00:00|notuuid"),
+            ("amount", f"abc|{self.account.id}"),
+            ("amount", "no-separator"),
+        ):
+            cursor = b64encode(urlencode({"p": position}).encode()).decode()
+            resp = client.get(
+                "/api/analysis/transactions/",
+                {"ordering": ordering, "cursor": cursor},
+            )
+            assert resp.status_code == 404
+
+    def test_transaction_export(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = "/api/analysis/transactions/export/"
+
+        resp = client.get(url, {"file_format": "csv", "tx_type": "DEPOSIT"})
+        assert resp.status_code == 200
+        assert resp.streaming
+        rows = list(csv.reader(b"".join(resp.streaming_content).decode().splitlines()))
+        assert rows[0][:4] == ["id", "account_id", "tx_type", "amount"]
+        assert len(rows) == 2 and rows[1][2] == "DEPOSIT" and rows[1][3] == "100.00"
+
+        resp = client.get(url, {"file_format": "ndjson", "ordering": "occurred_at"})
+        lines = b"".join(resp.streaming_content).decode().splitlines()
+        records = [json.loads(line) for line in lines]
+        assert [r["tx_type"] for r in records] == ["DEPOSIT", "WITHDRAW"]
+        assert records[0]["account_id"] == str(self.account.id)
+
+        assert client.get(url, {"file_format": "xlsx"}).status_code == 400
+
+    def test_transaction_create_uses_account_balance(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = "/api/analysis/transactions/"
+        self.account.balance = Decimal("1000.00")
+        self.account.save()
+
+        # running_balance 는 마지막 내역이 아니라 Account.balance 기준, 부호는 tx_type 기준
+        for tx_type, amount, expected in (
+            ("DEPOSIT", "200", "1200.00"),
+            ("WITHDRAW", "300", "900.00"),
+            ("FEE", "10", "890.00"),
+        ):
+            resp = client.post(
+                url,
+                {"account": str(self.account.id), "tx_type": tx_type, "amount": amount},
+            )
+            assert resp.status_code == 201, resp.data
+            assert resp.data["running_balance"] == expected
+        self.account.refresh_from_db()
+        assert self.account.balance == Decimal("890.00")
+
+        resp = client.post(
+            url,
+            {
+                "account": str(self.account.id),
+                "tx_type": "WITHDRAW",
+                "amount": "5000",
+                "occurred_at": "2025-01-05T00:00:00Z",
+            },
+        )
+        assert resp.status_code == 400
+        assert resp.data["detail"] == "insufficient funds"
+
+        other = CustomUser.objects.create_user(email="other@test.com", password="pw")
+        other_account = Account.objects.create(owner=other, name="남의계좌", number="9")
+        resp = client.post(
+            url,
+            {"account": str(other_account.id), "tx_type": "DEPOSIT", "amount": "1"},
+        )
+        assert resp.status_code == 403
+
+        # 같은 idempotency_key 재요청 → 400 이 아니라 처음 거래를 그대로 반환
+        # occurred_at 은 읽기 전용 (과거 일자를 보내도 요청 시각으로 기록)
+        payload = {
+            "account": str(self.account.id),
+            "tx_type": "DEPOSIT",
+            "amount": "10",
+            "idempotency_key": "replay-1",
+            "occurred_at": "2020-01-01T00:00:00Z",
+        }
+        first = client.post(url, payload)
+        replay = client.post(url, payload)
+        assert first.status_code == replay.status_code == 201, replay.data
+        assert replay.data["id"] == first.data["id"]
+        assert not first.data["occurred_at"].startswith("2020")
+        self.account.refresh_from_db()
+        assert self.account.balance == Decimal("900.00")
+
+        # 수정/삭제는 잔액/롤업을 거치지 않으므로 제공하지 않음
+        tx = TransactionHistory.objects.filter(account=self.account).first()
+        detail = f"{url}{tx.pk}/"
+        assert client.patch(detail, {"amount": "1"}).status_code == 405
+        assert client.put(detail, {"amount": "1"}).status_code == 405
+        assert client.delete(detail).status_code == 405
+        assert client.get(detail).status_code == 200
+
+    def test_analysis_result_cache(self, django_capture_on_commit_callbacks):
+        get_cache().clear()
+        client = APIClient()
+        client.force_authenticate(self.user)
+        detail = f"/api/analysis/analysis/{self.analysis.pk}/"
+        url = f"{detail}?include=statistics"
+
+        # 통계는 요청할 때만 계산
+        resp = client.get(detail)
+        assert resp.status_code == 200
+        assert "statistics" not in resp.data
+        assert client.get(f"{detail}?include=foo").status_code == 400
+        get_cache().clear()
+
+        resp = client.get(url)
+        assert resp.status_code == 200
+        assert resp.data["data"]["total_amount"] == Decimal("100.00")
+        assert resp.data["statistics"]["transaction_count"] == 1
+        with mock.patch.object(
+            AnalysisService, "get_analysis_data", side_effect=AssertionError
+        ):
+            assert client.get(url).data["data"]["total_amount"] == Decimal("100.00")
+        # 분석 결과(data) + 통계(statistics) 각각 1회씩
+        assert cache_stats() == {"hits": 2, "misses": 2, "hit_rate": 0.5}
+
+        # 분석 기간 밖(2월) 거래 → 1월 버전은 그대로라 캐시 유지
+        with django_capture_on_commit_callbacks(execute=True):
+            post_transaction(
+                self.account.pk,
+                "DEPOSIT",
+                "30",
+                occurred_at=datetime(2025, 2, 10, tzinfo=dt_timezone.utc),
+            )
+        client.get(url)
+        assert cache_stats()["hits"] == 4
+
+        # 분석 기간 안 거래 → 커밋 후 버전이 올라가 다시 계산
+        with django_capture_on_commit_callbacks(execute=True):
+            post_transaction(
+                self.account.pk,
+                "DEPOSIT",
+                "20",
+                occurred_at=datetime(2025, 1, 10, tzinfo=dt_timezone.utc),
+            )
+        assert client.get(url).data["data"]["total_amount"] == Decimal("120.00")
+        assert cache_stats()["misses"] == 4
+
+        # 버전은 DB 에 있으므로 다른 프로세스(compactor 등)가 올린 버전도 바로 반영
+
+        bump_ledger_versions({self.user.pk: {date(2025, 1, 20)}})
+        client.get(url)
+        assert cache_stats()["misses"] == 6
+        bump_ledger_versions(None)
+        client.get(url)
+        assert cache_stats()["misses"] == 8
+
+        assert client.get("/api/analysis/analysis/cache-stats/").status_code == 403
+
+    def test_chart_render_jobs(
+        self, settings, tmp_path, django_capture_on_commit_callbacks
+    ):
+        settings.MEDIA_ROOT = tmp_path
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = f"/api/analysis/analysis/{self.analysis.pk}/"
+
+        # 생성 시 작업만 추가되고 요청 스레드에서는 렌더링하지 않음
+        job = ChartRenderJob.objects.get(analysis=self.analysis)
+        assert job.status == ChartRenderJob.Status.PENDING
+        resp = client.get(url)
+        assert resp.data["chart_status"] == "pending"
+        assert resp.data["result_image"] is None
+
+        call_command("render_charts", stdout=mock.Mock())
+        job.refresh_from_db()
+        assert job.status == ChartRenderJob.Status.DONE
+        resp = client.get(url)
+        assert resp.data["chart_status"] == "ready"
+        self.analysis.refresh_from_db()
+        first = self.analysis.result_image.name
+        with Image.open(self.analysis.result_image.path) as image:
+            assert image.format == "PNG"
+
+        # 분석 기간 밖 거래는 다시 렌더링하지 않음, 기간 안 거래는 다시 요청
+        for occurred_at, expected in (
+            (datetime(2025, 3, 1, tzinfo=dt_timezone.utc), "ready"),
+            (datetime(2025, 1, 20, tzinfo=dt_timezone.utc), "pending"),
+        ):
+            with django_capture_on_commit_callbacks(execute=True):
+                post_transaction(
+                    self.account.pk, "DEPOSIT", "10", occurred_at=occurred_at
+                )
+            assert client.get(url).data["chart_status"] == expected
+
+        # 다시 렌더링하면 이전 이미지 파일은 삭제
+        call_command("render_charts", stdout=mock.Mock())
+        self.analysis.refresh_from_db()
+        assert self.analysis.result_image.name != first
+        assert not (tmp_path / first).exists()
+        assert (tmp_path / self.analysis.result_image.name).exists()
+
+    def test_chart_render_job_retries_then_fails(self):
+        with mock.patch(
+            "apps.analysis.jobs.render_chart", side_effect=RuntimeError("boom")
+        ):
+            for _ in range(MAX_ATTEMPTS):
+                (job,) = claim_jobs(10)
+                assert not run_job(job)
+        job = ChartRenderJob.objects.get(analysis=self.analysis)
+        assert job.status == ChartRenderJob.Status.FAILED
+        assert job.last_error == "boom"
+        assert claim_jobs(10) == []
+
+    def test_analysis_statistics(self):
+        other = Account.objects.create(
+            owner=self.user, name="두번째", number="5678", currency="KRW"
+        )
+        kst = dt_timezone(timedelta(hours=9))
+        for account, tx_type, amount, occurred_at in (
+            # 2025-02-01 00:30 KST = 2025-01-31 15:30 UTC → 2월로 집계
+            (other, "DEPOSIT", "300", datetime(2025, 2, 1, 0, 30, tzinfo=kst)),
+            (other, "WITHDRAW", "40", datetime(2025, 2, 3, tzinfo=kst)),
+            (self.account, "REVERSAL", "10", datetime(2025, 2, 3, tzinfo=kst)),
+        ):
+            TransactionHistory.objects.create(
+                account=account,
+                tx_type=tx_type,
+                amount=Decimal(amount),
+                running_balance=Decimal("0.00"),
+                currency="KRW",
+                occurred_at=occurred_at,
+            )
+        # 잔액 미반영(대기 중) 거래는 분석 결과(data)와 마찬가지로 제외
+        TransactionHistory.objects.create(
+            account=other,
+            tx_type="DEPOSIT",
+            amount=Decimal("999"),
+            running_balance=None,
+            currency="KRW",
+            occurred_at=datetime(2025, 2, 5, tzinfo=kst),
+        )
+        analysis = Analysis.objects.create(
+            user=self.user,
+            analysis_target="CASHFLOW",
+            period_type="MONTHLY",
+            start_date=date(2025, 1, 1),
+            end_date=date(2025, 2, 28),
+        )
+
+        stats = get_statistics(analysis)
+        assert stats["transaction_count"] == 5
+        # 1월: +100 -50, 2월: +300 -40 +10(환불)
+        assert [(m["month"], m["total"], m["delta"]) for m in stats["monthly"]] == [
+            ("2025-01", 50.0, None),
+            ("2025-02", 270.0, 220.0),
+        ]
+        assert stats["monthly"][1]["delta_pct"] == 440.0
+        series = stats["daily_moving_average"]["series"]
+        assert len(series) == 59
+        assert series[0] == {"date": "2025-01-01", "value": 100.0}
+        assert series[1] == {"date": "2025-01-02", "value": 25.0}  # (100 - 50) / 2
+        assert stats["percentiles"]["max"] == 300.0
+        assert stats["percentiles"]["p50"] == 50.0
+        assert stats["type_share"]["DEPOSIT"] == {
+            "amount": 400.0,
+            "count": 2,
+            "share": 80.0,
+        }
+        assert stats["account_share"][str(other.pk)]["count"] == 2
+
+        # COPY BINARY 경로와 values_list 경로의 컬럼이 같아야 함
+
+        _, copied = analytics.load_columns(analysis)
+        with mock.patch.object(analytics, "_fetch_copy", analytics._fetch_values):
+            iterated_accounts, iterated = analytics.load_columns(analysis)
+        for name, dtype in analytics.COLUMNS.items():
+            assert copied[name].dtype == dtype
+            assert sorted(copied[name]) == sorted(iterated[name])
+        # 계좌 코드는 거래 행의 account_id 에서 매김 (계좌 id 순서, 거래 없는 계좌는 제외)
+        Account.objects.create(owner=self.user, name="빈계좌", number="0")
+        accounts, columns = analytics.load_columns(analysis)
+        assert accounts == iterated_accounts == sorted([self.account.pk, other.pk])
+        assert columns["account"].tolist().count(accounts.index(other.pk)) == 2
+        assert columns["account"].tolist().count(accounts.index(self.account.pk)) == 3
+
+        # 거래가 없는 기간
+        analysis.start_date, analysis.end_date = date(2024, 1, 1), date(2024, 1, 3)
+        empty = get_statistics(analysis)
+        assert empty["transaction_count"] == 0
+        assert empty["percentiles"] == {}
+        assert [p["value"] for p in empty["daily_moving_average"]["series"]] == [0] * 3
+
+    def test_previous_window(self):
+        for period_type, start, end, expected in (
+            (
+                "MONTHLY",
+                date(2025, 3, 1),
+                date(2025, 3, 31),
+                ("2025-02-01", "2025-02-28"),
+            ),
+            (
+                "MONTHLY",
+                date(2025, 2, 1),
+                date(2025, 2, 28),
+                ("2025-01-01", "2025-01-31"),
+            ),
+            (
+                "MONTHLY",
+                date(2025, 1, 15),
+                date(2025, 2, 14),
+                ("2024-11-15", "2024-12-14"),
+            ),
+            (
+                "YEARLY",
+                date(2025, 1, 1),
+                date(2025, 12, 31),
+                ("2024-01-01", "2024-12-31"),
+            ),
+            (
+                "WEEKLY",
+                date(2025, 1, 6),
+                date(2025, 1, 15),
+                ("2024-12-23", "2025-01-01"),
+            ),
+            ("DAILY", date(2025, 1, 1), date(2025, 1, 3), ("2024-12-29", "2024-12-31")),
+        ):
+            analysis = Analysis(period_type=period_type, start_date=start, end_date=end)
+            assert tuple(map(str, previous_window(analysis))) == expected
+
+    def test_compare_previous_period(self, django_assert_num_queries):
+        # 12월(직전 기간) 거래 추가
+        for tx_type, amount in (("DEPOSIT", "40"), ("WITHDRAW", "30")):
+            TransactionHistory.objects.create(
+                account=self.account,
+                tx_type=tx_type,
+                amount=Decimal(amount),
+                running_balance=Decimal("0.00"),
+                currency="KRW",
+                occurred_at=datetime(2024, 12, 10, tzinfo=dt_timezone.utc),
+            )
+        rebuild_rollups()
+
+        with django_assert_num_queries(1):
+            data = AnalysisService.get_comparison_data(self.analysis)
+        assert data["current"]["total_amount"] == Decimal("100.00")
+        assert data["previous"]["total_amount"] == Decimal("40.00")
+        assert data["previous"]["start_date"] == date(2024, 12, 1)
+        assert data["change"] == Decimal("60.00")
+        assert data["rate"] == Decimal("150.00")
+
+        self.analysis.analysis_target = "CASHFLOW"
+        data = AnalysisService.get_comparison_data(self.analysis)
+        assert data["current"]["net"] == Decimal("50.00")
+        assert data["previous"]["net"] == Decimal("10.00")
+        assert data["previous"]["transaction_count"] == 2
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        resp = client.get(f"/api/analysis/analysis/{self.analysis.pk}/compare/")
+        assert resp.status_code == 200
+        assert resp.data["current"]["total_amount"] == Decimal("100.00")
+
+    def test_generate_analyses_command(self):
+        other = CustomUser.objects.create_user(
+            email="other@test.com", password="pw", is_active=True
+        )
+        CustomUser.objects.create_user(email="inactive@test.com", password="pw")
+        account = Account.objects.create(owner=other, name="다른계좌", number="77")
+        TransactionHistory.objects.create(
+            account=account,
+            tx_type=TransactionHistory.TxType.FEE,
+            amount=Decimal("7.00"),
+            running_balance=Decimal("0.00"),
+            currency="KRW",
+            occurred_at=datetime(2025, 1, 5, tzinfo=dt_timezone.utc),
+        )
+        rebuild_rollups()
+        get_cache().clear()
+
+        options = ["--start", "2025-01-01", "--end", "2025-01-31", "--chunk-size", "1"]
+        call_command(
+            "generate_analyses", *options, stdout=mock.Mock(), stderr=mock.Mock()
+        )
+        analyses = Analysis.objects.filter(period_type="MONTHLY")
+        assert analyses.count() == 4  # 활성 사용자 2명 × INCOME/EXPENSE
+        assert not analyses.filter(user__is_active=False).exists()
+        # 캐시된 결과는 단건 계산과 같아야 함
+        for analysis in analyses:
+            cached = get_cache().get(result_key(analysis))
+            assert cached == AnalysisService.get_analysis_data(analysis)
+        expense = analyses.get(user=other, analysis_target="EXPENSE")
+        assert get_cache().get(result_key(expense))["total_amount"] == Decimal("7.00")
+        income = analyses.get(user=other, analysis_target="INCOME")
+        assert get_cache().get(result_key(income))["transaction_count"] == 0
+        # 기간 버킷도 채워져 조회 시 롤업을 다시 집계하지 않음
+
+        bucket = AnalysisBucket.objects.get(analysis=expense)
+        assert (bucket.period, bucket.expense) == (date(2025, 1, 1), Decimal("7.00"))
+        assert set(expense.bucket_versions) == {"*", "2025-01"}
+        with mock.patch.object(
+            DailyAccountRollup.objects, "filter", side_effect=AssertionError
+        ):
+            get_cache().clear()
+            data = AnalysisService.get_cached_analysis_data(expense)
+        assert data["total_amount"] == Decimal("7.00")
+        assert ChartRenderJob.objects.filter(analysis__in=analyses).count() == 4
+
+        # 다시 실행해도 unique_analysis 로 중복 생성되지 않음
+        out = mock.Mock()
+        call_command("generate_analyses", *options, stdout=out, stderr=mock.Mock())
+        assert analyses.count() == 4
+        assert "신규 0건" in out.write.call_args[0][0]
+
+        # 사용자 묶음마다 롤업 집계 쿼리 1회 (결과 캐시도 그 행으로 채움)
+        with CaptureQueriesContext(connection) as ctx:
+            generate_analyses(
+                [self.user.pk, other.pk], date(2025, 1, 1), date(2025, 1, 31)
+            )
+        rollup_table = DailyAccountRollup._meta.db_table
+        assert sum(rollup_table in q["sql"] for q in ctx.captured_queries) == 1
+
+    def test_incremental_analysis_buckets(self, django_capture_on_commit_callbacks):
+        self.analysis.period_type = "MONTHLY"
+        self.analysis.save()
+
+        # 처음에는 분석 기간 전체 집계 → 월 버킷 1개 + 읽은 원장 버전 저장
+        data = AnalysisService.get_incremental_analysis_data(self.analysis)
+        assert data == AnalysisService.get_analysis_data(self.analysis)
+        bucket = AnalysisBucket.objects.get(analysis=self.analysis)
+        assert (bucket.income, bucket.expense) == (Decimal("100.00"), Decimal("50.00"))
+        self.analysis.refresh_from_db()
+        assert set(self.analysis.bucket_versions) == {"*", "2025-01"}
+
+        # 버전이 그대로면 롤업을 다시 읽지 않음
+        DailyAccountRollup.objects.filter(tx_type="DEPOSIT").update(total_amount=1)
+        data = AnalysisService.get_incremental_analysis_data(self.analysis)
+        assert data["total_amount"] == Decimal("100.00")
+        # 해당 월 버전이 올라가면 그 월에 걸친 기간만 롤업에서 다시 집계
+        bump_ledger_versions({self.user.pk: {date(2025, 1, 15)}})
+        data = AnalysisService.get_incremental_analysis_data(self.analysis)
+        assert data["total_amount"] == Decimal("1")
+        # 롤업 재생성 → 전체 버전이 올라가 분석 기간 전체 재집계
+        with django_capture_on_commit_callbacks(execute=True):
+            rebuild_rollups()
+        data = AnalysisService.get_incremental_analysis_data(self.analysis)
+        assert data["total_amount"] == Decimal("100.00")
+
+        # 과거 일자로 늦게 들어온 거래 → 커밋 후 1월 버전이 올라가 1월 버킷에 반영
+        with django_capture_on_commit_callbacks(execute=True):
+            post_transaction(
+                self.account.pk,
+                "DEPOSIT",
+                "25",
+                occurred_at=datetime(2025, 1, 3, tzinfo=dt_timezone.utc),
+            )
+        data = AnalysisService.get_incremental_analysis_data(self.analysis)
+        assert (data["total_amount"], data["transaction_count"]) == (
+            Decimal("125.00"),
+            2,
+        )
+        bucket = AnalysisBucket.objects.get(analysis=self.analysis)
+        assert (bucket.income, bucket.income_count) == (Decimal("125.00"), 2)
+
+        # 잔액 미반영(대기 중) 거래는 롤업 기반 결과와 마찬가지로 제외
+        TransactionHistory.objects.create(
+            account=self.account,
+            tx_type="DEPOSIT",
+            amount=Decimal("5.00"),
+            occurred_at=datetime(2025, 1, 4, tzinfo=dt_timezone.utc),
+        )
+        bump_ledger_versions({self.user.pk: {date(2025, 1, 4)}})
+        data = AnalysisService.get_incremental_analysis_data(self.analysis)
+        assert data == AnalysisService.get_analysis_data(self.analysis)
+        assert data["total_amount"] == Decimal("125.00")
+
+        # 분석 수정 시 버킷 초기화
+        self.analysis.period_type = "DAILY"
+        self.analysis.save()
+        assert not AnalysisBucket.objects.filter(analysis=self.analysis).exists()
+        data = AnalysisService.get_incremental_analysis_data(self.analysis)
+        assert [p["period"] for p in data["period_data"]] == [
+            date(2025, 1, 1),
+            date(2025, 1, 3),
+        ]
@@ -1,19 +1,39 @@
+import csv
+import json
+
 from apps.accounts.models import TransactionHistory
+from apps.accounts.services import post_transaction
+from .analytics import get_cached_statistics
+from .cache import cache_stats
 from .models import Analysis
+from .pagination import TransactionHistoryCursorPagination
 from .serializers import AnalysisSerializer, TransactionHistorySerializer
-from decimal import Decimal
+from .services import AnalysisService
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from rest_framework import viewsets
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
 
 
 # ----------------------------
 # Analysis API (ViewSet)
 # ----------------------------
+INCLUDE_OPTIONS = ("statistics",)
+
+
 class AnalysisViewSet(viewsets.ModelViewSet):
     """
     분석 데이터 CRUD API
     - 로그인 유저의 분석 데이터만 접근 가능
     - period_type, analysis_target으로 필터링 지원
+    - 단건 조회 시 분석 결과(data) 포함, 원장 버전 기반 캐시 사용
+    - ?include=statistics: 통계(이동 평균/백분위/비중/전월 대비) 도 포함
+      (거래내역 컬럼을 읽어야 해서 요청할 때만 계산, 같은 원장 버전 키로 캐시)
+    - 차트 이미지는 render_charts 워커가 만들고, 응답에는 result_image URL 과 chart_status 만 포함
     """
 
     serializer_class = AnalysisSerializer
@@ -25,28 +45,115 @@ class AnalysisViewSet(viewsets.ModelViewSet):
     }
 
     def get_queryset(self):
-        return Analysis.objects.filter(user=self.request.user)
+        return Analysis.objects.filter(user=self.request.user).select_related(
+            "render_job"
+        )
+
+    def get_includes(self):
+        includes = {
+            value
+            for value in self.request.query_params.get("include", "").split(",")
+            if value
+        }
+        unknown = includes.difference(INCLUDE_OPTIONS)
+        if unknown:
+            raise ValidationError(
+                {"include": f"지원하지 않는 항목입니다: {', '.join(sorted(unknown))}"}
+            )
+        return includes
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    def retrieve(self, request, *args, **kwargs):
+        includes = self.get_includes()
+        instance = self.get_object()
+        data = self.get_serializer(instance).data
+        data["data"] = AnalysisService.get_cached_analysis_data(instance)
+        if "statistics" in includes:
+            data["statistics"] = get_cached_statistics(instance)
+        return Response(data)
+
+    @action(detail=True, methods=["get"])
+    def compare(self, request, pk=None):
+        """
+        직전 같은 길이 기간과 비교 (GET /analysis/{id}/compare/)
+        - 이번 달 vs 지난달, 올해 vs 작년 등을 쿼리 1회로 계산
+        """
+        return Response(AnalysisService.get_comparison_data(self.get_object()))
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="cache-stats",
+        permission_classes=[IsAdminUser],
+    )
+    def cache_stats(self, request):
+        """분석 결과 캐시 적중/실패 횟수 (관리자 전용)"""
+        return Response(cache_stats())
+
 
 # ----------------------------
 # TransactionHistory API
 # ----------------------------
+EXPORT_FIELDS = (
+    "id",
+    "account_id",
+    "tx_type",
+    "amount",
+    "running_balance",
+    "currency",
+    "description",
+    "occurred_at",
+    "posted_at",
+    "transfer_id",
+    "external_ref",
+)
+EXPORT_CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """csv.writer 가 쓴 한 줄을 그대로 돌려주는 버퍼"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_rows(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _ndjson_rows(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_FIELDS, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", _csv_rows),
+    "ndjson": ("application/x-ndjson", _ndjson_rows),
+}
 
 
 class TransactionHistoryViewSet(viewsets.ModelViewSet):
     """
-    거래내역 CRUD API
+    거래내역 조회/생성 API
     - 로그인 유저의 계정에 속한 거래내역만 조회 가능
+    - 수정/삭제(PUT/PATCH/DELETE)는 제공하지 않음: 잔액·일별 롤업을 거치지 않아 분석과 어긋남
+      (정정은 REVERSAL 등 새 거래로 반영)
     - 거래유형, 금액범위, 날짜범위, 계정별 필터링 지원
     - 금액, 날짜순 정렬 지원
     - 설명(description) 검색 지원
+    - 커서(keyset) 페이지네이션: COUNT/OFFSET 없이 next/previous 링크로 이동
+    - occurred_at__gte/lte 는 컬럼을 그대로 비교 → 월 파티션 테이블이면 범위 밖 파티션은 읽지 않음
     """
 
     serializer_class = TransactionHistorySerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = TransactionHistoryCursorPagination
+    http_method_names = ["get", "post", "head", "options"]
 
     filterset_fields = {
         "tx_type": ["exact"],
@@ -65,19 +172,58 @@ class TransactionHistoryViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         """
-        트랜잭션 생성 시 running_balance 자동 계산
+        거래 생성은 accounts 서비스(post_transaction)로 처리
+        - 계좌 잠금 후 tx_type 부호대로 잔액 검증/갱신, running_balance 는 Account.balance 기준
+        - 내역을 다시 조회하지 않으므로 동시 요청에도 잔액이 어긋나지 않음
+        - 본인 계좌에만 생성 가능
+        - 같은 idempotency_key 로 다시 요청하면 새로 만들지 않고 기존 거래를 반환
+        - occurred_at 은 읽기 전용 (요청 시각) → 과거 일자로 잔액 순서가 뒤섞이지 않음
+        """
+        data = serializer.validated_data
+        account = data["account"]
+        if account.owner_id != self.request.user.pk:
+            raise PermissionDenied("본인 계좌에만 거래를 생성할 수 있습니다.")
+        try:
+            serializer.instance = post_transaction(
+                account.pk,
+                data["tx_type"],
+                data["amount"],
+                currency=data.get("currency", account.currency),
+                description=data.get("description", ""),
+                idempotency_key=data.get("idempotency_key"),
+                metadata=data.get("metadata"),
+            )
+        except ValueError as e:
+            raise ValidationError({"detail": str(e)})
+
+    @action(detail=False, methods=["get"], pagination_class=None)
+    def export(self, request):
         """
-        account = serializer.validated_data["account"]
-        last_tx = (
-            TransactionHistory.objects.filter(account=account)
-            .order_by("-occurred_at")
-            .first()
+        거래내역 전체 내보내기 (GET /transactions/export/?file_format=csv|ndjson)
+        - 목록 조회와 같은 필터/검색/정렬 적용, 페이지네이션 없음
+        - serializer 대신 values_list + 서버사이드 커서(iterator)로 한 행씩 스트리밍
+          → 내보내는 건수와 무관하게 메모리 사용량 일정
+        - ?format= 은 DRF 렌더러 선택용으로 예약되어 있어 file_format 사용
+        """
+        file_format = request.query_params.get("file_format", "csv")
+        if file_format not in EXPORT_FORMATS:
+            raise ValidationError(
+                {
+                    "file_format": f"지원하지 않는 형식입니다: {', '.join(EXPORT_FORMATS)}"
+                }
+            )
+        content_type, render = EXPORT_FORMATS[file_format]
+
+        rows = (
+            self.filter_queryset(self.get_queryset())
+            .select_related(None)
+            .values_list(*EXPORT_FIELDS)
+            .iterator(chunk_size=EXPORT_CHUNK_SIZE)
         )
-        prev_balance = last_tx.running_balance if last_tx else Decimal("0.00")
-        amount = serializer.validated_data["amount"]
-        running_balance = prev_balance + amount
-
-        serializer.save(running_balance=running_balance)
+        response = StreamingHttpResponse(render(rows), content_type=content_type)
+        filename = f"transactions-{timezone.localdate():%Y%m%d}.{file_format}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
 
 
 # request.GET으로 수동처리하기보다 DjangoFilterBackend 를 채택했고 준 필수적인 녀석이라고함
@@ -136,6 +136,50 @@ DATABASES = {
     }
 }
 
+# ------------------------------
+# CACHE
+# ------------------------------
+# REDIS_URL 이 있으면 Redis (여러 프로세스가 계산 결과를 공유), 없으면 프로세스별 메모리 캐시
+# .env 에 값 없이 적힌 항목(빈 문자열)은 기본값 사용
+# - analysis: 분석 결과 캐시 (키에 DB 의 원장 버전(LedgerVersion)이 들어가므로
+#   어느 프로세스에서 거래가 반영되든 자연히 새 키 사용)
+ANALYSIS_CACHE_TIMEOUT = int(os.environ.get("ANALYSIS_CACHE_TIMEOUT") or 3600)  # 초
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.environ.get("ANALYSIS_CACHE_MAX_ENTRIES") or 1000)
+# - accounts: 사용자별 계좌 요약 (키에 사용자 LedgerVersion 합계가 들어가 거래 반영/계좌 변경 시 새 키)
+ACCOUNT_SUMMARY_CACHE_TIMEOUT = int(
+    os.environ.get("ACCOUNT_SUMMARY_CACHE_TIMEOUT") or 300
+)  # 초
+REDIS_URL = os.environ.get("REDIS_URL") or None
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "analysis": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "analysis",
+        "TIMEOUT": ANALYSIS_CACHE_TIMEOUT,
+        # MAX_ENTRIES 는 메모리 캐시 전용 (Redis 는 maxmemory 정책으로 제한)
+        "OPTIONS": {"MAX_ENTRIES": ANALYSIS_CACHE_MAX_ENTRIES},
+    },
+    "accounts": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "accounts",
+        "TIMEOUT": ACCOUNT_SUMMARY_CACHE_TIMEOUT,
+    },
+}
+if REDIS_URL:
+    CACHES["analysis"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_URL,
+        "TIMEOUT": ANALYSIS_CACHE_TIMEOUT,
+        "KEY_PREFIX": "analysis",
+    }
+    CACHES["accounts"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_URL,
+        "TIMEOUT": ACCOUNT_SUMMARY_CACHE_TIMEOUT,
+        "KEY_PREFIX": "accounts",
+    }
+
 # ------------------------------
 # JWT
 # ------------------------------
@@ -183,6 +227,20 @@ REST_FRAMEWORK = {
     "PAGE_SIZE": 20,
 }
 
+# ------------------------------
+# Accounts (거래 처리)
+# ------------------------------
+# 멱등성 키가 있는 입출금을 INSERT 우선 단일 문장으로 처리 (PostgreSQL 전용)
+# False 이거나 다른 DB면 기존 방식(잠금 → SELECT → INSERT → UPDATE)으로 동작
+# .env 에 값 없이 적힌 경우(빈 문자열)도 기본값 True
+ACCOUNTS_IDEMPOTENCY_INSERT_FIRST = (
+    os.environ.get("ACCOUNTS_IDEMPOTENCY_INSERT_FIRST") or "True"
+) == "True"
+# 입출금 잠금 방식
+# - pessimistic: select_for_update 로 계좌 행을 먼저 잠근 뒤 INSERT/UPDATE
+# - optimistic: 가드된 UPDATE ... RETURNING 한 문장으로 잔액 갱신 + INSERT (PostgreSQL 전용)
+ACCOUNTS_LOCKING_MODE = os.environ.get("ACCOUNTS_LOCKING_MODE") or "pessimistic"
+
 # ------------------------------
 # Swagger
 # ------------------------------